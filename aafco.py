@@ -0,0 +1,115 @@
+# --- AAFCO 貓食營養標準（每 1000 kcal ME） ---
+# 出處：reference/ 內 AAFCO 2014 年修訂版 Cat Food Nutrient Profiles「BASED ON CALORIE CONTENT」表。
+# 每個營養素對應衛福部資料庫（fda_matrix）的欄位與換算係數；資料庫的數值是「每 100 g 食物」，
+# 單位為 g / mg / ug / IU，乘上係數後即為標準表的單位。
+# 標準表裡資料庫沒有的項目（氯、碘、硒、維生素 K、泛酸、生物素、膽鹼、牛磺酸）列在 NOT_IN_DATABASE，不做限制。
+import numpy as np
+import pandas as pd
+
+# 生長 / 繁殖期 vs 成貓維持期
+STAGES = ("growth", "adult")
+STAGE_OF_AGE_GROUP = {
+    "幼貓 0-4月": "growth",
+    "幼貓 4-6月": "growth",
+    "結紮成貓": "adult",
+    "未結紮成貓": "adult",
+    "老貓": "adult",
+    "減重": "adult",
+}
+
+# 1 mg α-生育酚當量 ≈ 1.49 IU 維生素 E
+VITAMIN_E_IU_PER_MG = 1.49
+
+# key: (中文名稱, 單位, 衛福部欄位（多欄相加）, 換算係數, 生長期最低, 成貓最低, 上限)；nan = 未規定
+PROFILE = {
+    "protein":        ("粗蛋白", "g", ["粗蛋白(g)"], 1.0, 75, 65, np.nan),
+    "arginine":       ("精胺酸", "g", ["精胺酸(Arg)(mg)"], 1e-3, 3.10, 2.60, np.nan),
+    "histidine":      ("組胺酸", "g", ["組胺酸(His)(mg)"], 1e-3, 0.83, 0.78, np.nan),
+    "isoleucine":     ("異白胺酸", "g", ["異白胺酸(Ile)(mg)"], 1e-3, 1.40, 1.30, np.nan),
+    "leucine":        ("白胺酸", "g", ["白胺酸(Leu)(mg)"], 1e-3, 3.20, 3.10, np.nan),
+    "lysine":         ("離胺酸", "g", ["離胺酸(Lys)(mg)"], 1e-3, 3.00, 2.08, np.nan),
+    "methionine":     ("甲硫胺酸", "g", ["甲硫胺酸(Met)(mg)"], 1e-3, 1.55, 0.50, 3.75),
+    "met_cys":        ("甲硫胺酸＋胱胺酸", "g", ["甲硫胺酸(Met)(mg)", "胱胺酸(Cys)(mg)"], 1e-3, 2.75, 1.00, np.nan),
+    "phenylalanine":  ("苯丙胺酸", "g", ["苯丙胺酸(Phe)(mg)"], 1e-3, 1.30, 1.05, np.nan),
+    "phe_tyr":        ("苯丙胺酸＋酪胺酸", "g", ["苯丙胺酸(Phe)(mg)", "酪胺酸(Tyr)(mg)"], 1e-3, 4.80, 3.83, np.nan),
+    "threonine":      ("酥胺酸", "g", ["酥胺酸(Thr)(mg)"], 1e-3, 1.83, 1.83, np.nan),
+    "tryptophan":     ("色胺酸", "g", ["色胺酸(Trp)(mg)"], 1e-3, 0.63, 0.40, 4.25),
+    "valine":         ("纈胺酸", "g", ["纈胺酸(Val)(mg)"], 1e-3, 1.55, 1.55, np.nan),
+    "fat":            ("粗脂肪", "g", ["粗脂肪(g)"], 1.0, 22.5, 22.5, np.nan),
+    "linoleic":       ("亞麻油酸", "g", ["亞麻油酸(18:2)(mg)"], 1e-3, 1.40, 1.40, np.nan),
+    "alpha_linolenic": ("次亞麻油酸", "g", ["次亞麻油酸(18:3)(mg)"], 1e-3, 0.05, np.nan, np.nan),
+    "arachidonic":    ("花生油酸", "g", ["花生油酸(20:4)(mg)"], 1e-3, 0.05, 0.05, np.nan),
+    "epa_dha":        ("EPA＋DHA", "g", ["廿碳五烯酸(20:5)(mg)", "廿二碳六烯酸(22:6)(mg)"], 1e-3, 0.03, np.nan, np.nan),
+    "calcium":        ("鈣", "g", ["鈣(mg)"], 1e-3, 2.5, 1.5, np.nan),
+    "phosphorus":     ("磷", "g", ["磷(mg)"], 1e-3, 2.0, 1.25, np.nan),
+    "potassium":      ("鉀", "g", ["鉀(mg)"], 1e-3, 1.5, 1.5, np.nan),
+    "sodium":         ("鈉", "g", ["鈉(mg)"], 1e-3, 0.5, 0.5, np.nan),
+    "magnesium":      ("鎂", "g", ["鎂(mg)"], 1e-3, 0.20, 0.10, np.nan),
+    "iron":           ("鐵", "mg", ["鐵(mg)"], 1.0, 20.0, 20.0, np.nan),
+    "copper":         ("銅", "mg", ["銅(mg)"], 1.0, 2.10, 1.25, np.nan),  # 鮮食比照罐頭（canned）的數值
+    "manganese":      ("錳", "mg", ["錳(mg)"], 1.0, 1.90, 1.90, np.nan),
+    "zinc":           ("鋅", "mg", ["鋅(mg)"], 1.0, 18.8, 18.8, np.nan),
+    "vitamin_a":      ("維生素 A", "IU", ["維生素A總量(IU)"], 1.0, 1667, 833, 83325),
+    "vitamin_d":      ("維生素 D", "IU", ["維生素D總量(IU)"], 1.0, 70, 70, 7520),
+    "vitamin_e":      ("維生素 E", "IU", ["α-維生素E當量(α-TE)(mg)"], VITAMIN_E_IU_PER_MG, 10, 10, np.nan),
+    "thiamine":       ("維生素 B1", "mg", ["維生素B1(mg)"], 1.0, 1.40, 1.40, np.nan),
+    "riboflavin":     ("維生素 B2", "mg", ["維生素B2(mg)"], 1.0, 1.00, 1.00, np.nan),
+    "niacin":         ("菸鹼素", "mg", ["菸鹼素(mg)"], 1.0, 15, 15, np.nan),
+    "pyridoxine":     ("維生素 B6", "mg", ["維生素B6(mg)"], 1.0, 1.0, 1.0, np.nan),
+    "folic_acid":     ("葉酸", "mg", ["葉酸(ug)"], 1e-3, 0.20, 0.20, np.nan),
+    "vitamin_b12":    ("維生素 B12", "mg", ["維生素B12(ug)"], 1e-3, 0.005, 0.005, np.nan),
+}
+NOT_IN_DATABASE = ["chloride", "iodine", "selenium", "vitamin_k", "pantothenic_acid", "biotin", "choline", "taurine"]
+
+# 鈣磷比：2014 版貓的標準表沒有列出，沿用常見的 1:1 ~ 2:1（舊版犬貓標準與獸醫營養教科書的建議範圍）
+CA_P_RATIO = (1.0, 2.0)
+
+MINERALS = ["calcium", "phosphorus", "potassium", "sodium", "magnesium", "iron", "copper", "manganese", "zinc"]
+VITAMINS = ["vitamin_a", "vitamin_d", "vitamin_e", "thiamine", "riboflavin", "niacin", "pyridoxine",
+            "folic_acid", "vitamin_b12"]
+AMINO_ACIDS = ["arginine", "histidine", "isoleucine", "leucine", "lysine", "methionine", "met_cys",
+               "phenylalanine", "phe_tyr", "threonine", "tryptophan", "valine"]
+FATTY_ACIDS = ["linoleic", "alpha_linolenic", "arachidonic", "epa_dha"]
+
+
+def stage_for(age_group: str) -> str:
+    """engine.AGE_GROUPS → "growth" / "adult"；未知的年齡層當成成貓"""
+    return STAGE_OF_AGE_GROUP.get(age_group, "adult")
+
+def limits(stage: str = "adult", keys=None) -> tuple:
+    """(keys, 每 1000 kcal 最低量, 上限)；未規定者為 nan"""
+    if stage not in STAGES:
+        raise KeyError(f"未知的生命階段：{stage}")
+    keys = list(keys if keys is not None else PROFILE)
+    col = 4 if stage == "growth" else 5
+    lo = np.array([PROFILE[k][col] for k in keys], dtype=float)
+    hi = np.array([PROFILE[k][6] for k in keys], dtype=float)
+    return keys, lo, hi
+
+def table(stage: str = "adult", keys=None) -> pd.DataFrame:
+    keys, lo, hi = limits(stage, keys)
+    return pd.DataFrame({
+        "key": keys,
+        "營養素": [PROFILE[k][0] for k in keys],
+        "單位": [PROFILE[k][1] for k in keys],
+        "每1000kcal最低": lo,
+        "每1000kcal上限": hi,
+    })
+
+def per_gram(m, keys=None, rows=None) -> np.ndarray:
+    """由 fda_matrix.NutrientMatrix 取出 (食物數, len(keys)) 的「每 1 g 食物」營養量，單位同標準表
+
+    資料庫的缺值（未檢測）視為 0：最低量的限制因此偏保守，上限則可能低估。
+    """
+    keys = list(keys if keys is not None else PROFILE)
+    cols = list(dict.fromkeys(c for k in keys for c in PROFILE[k][2]))
+    raw = np.asarray(m.columns(cols), dtype=float)
+    if rows is not None:
+        raw = raw[np.asarray(rows)]
+    raw = np.nan_to_num(raw) / 100.0
+    pos = {c: i for i, c in enumerate(cols)}
+    out = np.empty((raw.shape[0], len(keys)))
+    for j, k in enumerate(keys):
+        _, _, src, factor, *_ = PROFILE[k]
+        out[:, j] = raw[:, [pos[c] for c in src]].sum(axis=1) * factor
+    return out
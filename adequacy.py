@@ -0,0 +1,152 @@
+# --- 營養充足度批次檢查（AAFCO 每 1000 kcal：胺基酸、脂肪酸、鈣磷…） ---
+# 頁面原本只報蛋白 / 脂肪 / 碳水比例。這裡一次檢查任意多組配方（搜尋或掃描的結果）：
+#   N：(食物數, 1 + k) 每 1 g 食物的熱量與 k 種營養素（aafco.per_gram，單位同標準表），建一次就重複使用
+#   G：(配方數, 食物數) 每組配方的每日克數（numpy 陣列或 scipy.sparse 皆可）
+#   G @ N 一次得到每組配方的熱量與營養素總量 → 換算成每 1000 kcal → 與成貓 / 生長期最低量、上限比較
+# 衍生比例（鈣磷比）直接由同一個乘積的兩欄相除。數千組配方只要幾毫秒。
+# 資料庫缺值視為 0（同 aafco.per_gram）：未檢測的項目會被判為不足，屬於保守的一方。
+import numpy as np
+import pandas as pd
+
+import aafco
+
+# 預設檢查：蛋白與各必需胺基酸、脂肪與必需脂肪酸、鈣磷（鈣磷比要用）
+DEFAULT_KEYS = ["protein"] + aafco.AMINO_ACIDS + ["fat"] + aafco.FATTY_ACIDS + ["calcium", "phosphorus"]
+KCAL_COLUMN = "熱量(kcal)"
+# 衍生比例：名稱 -> (中文名稱, 分子, 分母, (下限, 上限))
+RATIOS = {"ca_p": ("鈣磷比", "calcium", "phosphorus", aafco.CA_P_RATIO)}
+TOL = 1e-6  # 相對容許誤差（與 diet_lp 的達標判斷相同）
+
+
+class Checker:
+    """固定一組候選食物的營養矩陣；evaluate() 一次檢查多組配方"""
+
+    def __init__(self, m, names=None, rows=None, keys=None):
+        """m：fda_matrix.NutrientMatrix；names / rows 指定候選食物（依給定順序），都不給時為全部食物"""
+        keys = list(keys if keys is not None else DEFAULT_KEYS)
+        for _, num, den, _ in RATIOS.values():
+            keys += [k for k in (num, den) if k not in keys]
+        if names is not None:
+            pos = {}
+            for i, name in enumerate(m.foods["name"]):
+                pos.setdefault(name, i)
+            rows = [pos[n] for n in names]
+        rows = np.arange(len(m.foods["name"])) if rows is None else np.asarray(rows, dtype=np.intp)
+
+        self.keys = keys
+        self.names = [m.foods["name"][i] for i in rows]
+        self.pos = {}
+        for j, name in enumerate(self.names):
+            self.pos.setdefault(name, j)
+        kcal = np.nan_to_num(np.asarray(m.columns([KCAL_COLUMN]), dtype=float)[rows, 0]) / 100.0
+        self.matrix = np.column_stack([kcal, aafco.per_gram(m, keys, rows)])  # (n, 1 + k)
+        self.limits = {stage: aafco.limits(stage, keys)[1:] for stage in aafco.STAGES}
+        self._ratio_cols = {name: (keys.index(num), keys.index(den)) for name, (_, num, den, _) in RATIOS.items()}
+
+    def mix_matrix(self, mixes) -> np.ndarray:
+        """[(食物名稱清單, 克數清單), ...] → (配方數, 食物數) 克數矩陣"""
+        G = np.zeros((len(mixes), len(self.names)))
+        for i, (names, grams) in enumerate(mixes):
+            G[i, [self.pos[n] for n in names]] = grams
+        return G
+
+    def evaluate(self, grams, energy=None) -> dict:
+        """grams：(配方數, 食物數) 或單一配方 (食物數,)；energy：每組配方的總熱量（預設為配方本身的熱量）
+
+        回傳 {"keys", "kcal", "amount", "per_1000", "ratios", "ratio_ok", "stages"}；
+        stages[stage] = {"ok": (R, k) 各營養素達標, "coverage": 每 1000 kcal ÷ 最低量（無最低量為 nan）,
+                         "worst": 最缺的營養素位置, "shortfalls": 未達標項目數（含比例）, "adequate": 全部達標}
+        """
+        G = grams if hasattr(grams, "tocsr") else np.atleast_2d(np.asarray(grams, dtype=float))
+        totals = np.asarray(G @ self.matrix)
+        kcal, amount = totals[:, 0], totals[:, 1:]
+        energy = kcal if energy is None else np.broadcast_to(np.asarray(energy, dtype=float), kcal.shape)
+        safe = np.where(energy > 0, energy, np.nan)[:, None]
+        per_1000 = amount / safe * 1000.0
+
+        ratios, ratio_ok = {}, {}
+        for name, (i, j) in self._ratio_cols.items():
+            den = amount[:, j]
+            ratios[name] = np.divide(amount[:, i], den, out=np.full(len(den), np.nan), where=den > 0)
+            lo, hi = RATIOS[name][3]
+            ratio_ok[name] = (ratios[name] >= lo * (1 - TOL)) & (ratios[name] <= hi * (1 + TOL))
+        ratios_all_ok = np.logical_and.reduce(list(ratio_ok.values())) if ratio_ok else np.ones(len(kcal), bool)
+        ratio_misses = sum((~ok).astype(int) for ok in ratio_ok.values()) if ratio_ok else 0
+
+        stages = {}
+        with np.errstate(invalid="ignore"):
+            for stage, (lo, hi) in self.limits.items():
+                ok = ~(per_1000 < lo * (1 - TOL)) & ~(per_1000 > hi * (1 + TOL)) & ~np.isnan(per_1000)
+                coverage = per_1000 / lo
+                filled = np.where(np.isnan(coverage), np.inf, coverage)
+                stages[stage] = {
+                    "ok": ok,
+                    "coverage": coverage,
+                    "worst": filled.argmin(axis=1),
+                    "shortfalls": (~ok).sum(axis=1) + ratio_misses,
+                    "adequate": ok.all(axis=1) & ratios_all_ok,
+                }
+        return {
+            "keys": self.keys,
+            "kcal": kcal,
+            "amount": amount,
+            "per_1000": per_1000,
+            "ratios": ratios,
+            "ratio_ok": ratio_ok,
+            "stages": stages,
+        }
+
+    def report(self, result: dict, i: int = 0) -> pd.DataFrame:
+        """第 i 組配方的明細表：每個營養素一列，最後是衍生比例"""
+        lo_a, hi = self.limits["adult"]
+        lo_g, _ = self.limits["growth"]
+        df = pd.DataFrame({
+            "營養素": [aafco.PROFILE[k][0] for k in self.keys],
+            "單位": [aafco.PROFILE[k][1] for k in self.keys],
+            "每日總量": result["amount"][i],
+            "每1000kcal": result["per_1000"][i],
+            "成貓最低": lo_a,
+            "生長期最低": lo_g,
+            "上限": hi,
+            "成貓達標": result["stages"]["adult"]["ok"][i],
+            "生長期達標": result["stages"]["growth"]["ok"][i],
+        })
+        ratio_rows = pd.DataFrame([{
+            "營養素": label,
+            "單位": "",
+            "每日總量": np.nan,
+            "每1000kcal": result["ratios"][name][i],
+            "成貓最低": lo,
+            "生長期最低": lo,
+            "上限": up,
+            "成貓達標": bool(result["ratio_ok"][name][i]),
+            "生長期達標": bool(result["ratio_ok"][name][i]),
+        } for name, (label, _, _, (lo, up)) in RATIOS.items()])
+        return pd.concat([df, ratio_rows], ignore_index=True)
+
+    def summary(self, result: dict, stage: str = "adult") -> list:
+        """每組配方一句摘要：全部達標，或未達標幾項、最缺的營養素達最低量的百分比"""
+        s = result["stages"][stage]
+        out = []
+        for i in range(len(result["kcal"])):
+            if s["adequate"][i]:
+                out.append("全部達標")
+                continue
+            j = s["worst"][i]
+            cov = s["coverage"][i, j]
+            worst = f"，最缺{aafco.PROFILE[self.keys[j]][0]} {cov * 100:.0f}%" if np.isfinite(cov) and cov < 1 else ""
+            out.append(f"{s['shortfalls'][i]} 項未達標{worst}")
+        return out
+
+
+if __name__ == "__main__":
+    import fda_matrix
+
+    m = fda_matrix.open_matrix()
+    checker = Checker(m, names=["帶骨去皮對切胸(肉雞)", "雞蛋平均值", "雞肝(肉雞)"])
+    result = checker.evaluate(checker.mix_matrix([
+        (["帶骨去皮對切胸(肉雞)", "雞蛋平均值"], [120, 40]),
+        (["帶骨去皮對切胸(肉雞)", "雞蛋平均值", "雞肝(肉雞)"], [100, 40, 15]),
+    ]))
+    print(checker.summary(result))
+    print(checker.report(result, 0).to_string(index=False))
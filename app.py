@@ -1,137 +1,78 @@
 # --- 0. 套件與資料 ---
 import streamlit as st
 import pandas as pd
-import math
-import re
 
-st.set_page_config(page_title="貓咪營養素計算機", layout="wide")
-
-# --- 讀入乾糧與鮮食資料 + 單位清洗 ---
-ATWATER = {"protein": 3.5, "fat": 8.5, "carb": 3.5}  # kcal/g
-
-def _num(s: str) -> float:
-    """從字串抓第一個數字（小數也可）；抓不到回 NaN"""
-    if pd.isna(s):
-        return float("nan")
-    m = re.search(r"[-+]?\d*\.?\d+", str(s))
-    return float(m.group()) if m else float("nan")
-
-def clean_dry(df_raw: pd.DataFrame) -> pd.DataFrame:
-    """乾糧資料清洗：如 4025cal/1kg → kcal/g = 4.025"""
-    df = df_raw.copy()
-
-    # 先把營養素欄位轉成數字（8.1 或 8.1% 都可）
-    for c in ["水分", "蛋白質", "脂肪", "碳水"]:
-        df[c] = df[c].apply(_num)
-
-    kcal_per_g = []
-    for s in df.get("熱量", []):
-        val = _num(s)  # 例如 3179
-        if pd.isna(val):
-            kcal_per_g.append(float("nan"))
-            continue
-
-        # 正規化字串：轉小寫、全形→半形、去空白
-        txt = str(s).lower()
-        txt = txt.replace("／", "/")  # 全形斜線 → 半形
-        txt = txt.replace("（", "(").replace("）", ")")
-        txt_nospace = re.sub(r"\s+", "", txt)  # 移除所有空白
-
-        # 更寬鬆的判斷：只要看到 "kg" 就視為每公斤；看到 "100g" 視為每 100g
-        if "kg" in txt_nospace:
-            denom = 1000.0
-        elif "100g" in txt_nospace or "每100g" in txt_nospace or "100公克" in txt_nospace:
-            denom = 100.0
-        else:
-            # 後備判斷：若數值很大（>50），多半是每公斤；否則視為每 100g
-            denom = 1000.0 if val > 50 else 100.0
-
-        kcal_per_g.append(val / denom)
+import adequacy
+import aafco
+import diet_lp
+import engine
+import fda_matrix
+import food_index
+import food_watch
+import plan_cache
+import profiling
+import recipe_search
+import rotation
+import solver
+import sweep
+import trajectory
 
-    df["kcal_per_g"] = kcal_per_g
-
-    # 若缺熱量，用宏量估算
-    mask = df["kcal_per_g"].isna()
-    if mask.any():
-        kcal_100g = (
-            df.loc[mask, "蛋白質"] * ATWATER["protein"]
-            + df.loc[mask, "脂肪"] * ATWATER["fat"]
-            + df.loc[mask, "碳水"] * ATWATER["carb"]
-        )
-        df.loc[mask, "kcal_per_g"] = kcal_100g / 100.0
-
-    df["類型"] = df["類型"].fillna("乾糧")
-    return df[["食物名稱", "類型", "水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]]
-
-def clean_fresh(df_raw: pd.DataFrame) -> pd.DataFrame:
-    """鮮食資料清洗：如 104cal/100g → kcal/g = 1.04"""
-    df = df_raw.copy()
-    for c in ["水分", "蛋白質", "脂肪", "碳水"]:
-        df[c] = df[c].apply(_num)
-
-    kcal_per_g = []
-    for s in df.get("熱量", []):
-        val = _num(s)
-        if pd.isna(val):
-            kcal_per_g.append(float("nan"))
-        else:
-            txt = str(s).lower()
-            if "/100g" in txt:
-                kcal_per_g.append(val / 100.0)
-            elif "/kg" in txt:
-                kcal_per_g.append(val / 1000.0)
-            else:
-                kcal_per_g.append(val / 100.0)
-    df["kcal_per_g"] = kcal_per_g
-
-    # 若缺熱量，用 Atwater 估算
-    mask = df["kcal_per_g"].isna()
-    if mask.any():
-        kcal_100g = (
-            df.loc[mask, "蛋白質"] * ATWATER["protein"]
-            + df.loc[mask, "脂肪"] * ATWATER["fat"]
-            + df.loc[mask, "碳水"] * ATWATER["carb"]
-        )
-        df.loc[mask, "kcal_per_g"] = kcal_100g / 100.0
+st.set_page_config(page_title="貓咪營養素計算機", layout="wide")
 
-    df["類型"] = df["類型"].fillna("生食")
-    return df[["食物名稱", "類型", "水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]]
+# 效能剖析（CAT_PROFILE=1 或 ?profile=1 開啟，見 profiling.py）：每個 session 一個，每次整頁 rerun 換一個 run
+prof = st.session_state.setdefault("profiler", profiling.Profiler())
+prof.new_run(profiling.enabled(st.query_params))
 
 # --- 匯入兩份資料 ---
 dry_path   = "data/food_data_dry_1115.csv"
 fresh_path = "data/food_data_fresh_1115.csv"
 
-df_dry   = clean_dry(pd.read_csv(dry_path)).dropna(subset=["食物名稱"])
-df_fresh = clean_fresh(pd.read_csv(fresh_path)).dropna(subset=["食物名稱"])
+# 所有 session 共用同一份唯讀食物庫（見 food_store.py）；來源檔有更新時由背景輪詢換上新版本（見 food_watch.py），
+# foods.version 放進下面各個快取鍵，舊資料算出的結果就不會再被沿用
+with prof.span("data_load"):
+    foods = food_watch.shared(dry_path, fresh_path).store
+
+
+# --- 區塊重算：每個區塊是一個 st.fragment ---
+# 只動到某區塊自己的輸入（例如備餐天數、某個固定克數）時，只重跑那個區塊，
+# 不重新計算 RER/MER、乾糧表與其他區塊的求解。區塊之間的依賴一律以參數傳入；
+# 上游結果（乾糧扣除）在 fragment 內改變時，才整頁重跑讓下游拿到新的參數。
+def memo(name: str, key, compute):
+    """session_state 內的單格快取：key（這一步的所有輸入）沒變就沿用上次的結果"""
+    slots = st.session_state.setdefault("_memo", {})
+    hit = slots.get(name)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    value = compute()
+    slots[name] = (key, value)
+    return value
+
+def publish(name: str, key) -> None:
+    """上游區塊的結果改變了（key 不同）→ 整頁重跑，下游區塊才會拿到新的參數"""
+    seen = st.session_state.get(f"_published_{name}")
+    st.session_state[f"_published_{name}"] = key
+    if seen is not None and seen != key:
+        st.rerun()
 
-df = pd.concat([df_dry, df_fresh], ignore_index=True)
-df["水分"] = df["水分"].clip(lower=0.0, upper=99.9)
 
 # --- 主頁 ---
 st.title("🐱 貓咪每日熱量 & 鮮食克數計算")
 
     # ➤ 基本輸入
-weight = st.number_input("體重 (kg)", min_value=0.1, step=0.1, value=4.0)
-age_group = st.selectbox("年齡層", ["幼貓 0-4月", "幼貓 4-6月", "結紮成貓", "未結紮成貓", "老貓", "減重"])
-activity = st.selectbox("活動量", ["低", "中", "高"])
-
-phys_factor_map = {
-    "幼貓 0-4月": 3.0,
-    "幼貓 4-6月": 2.5,
-    "未結紮成貓": 1.5,
-    "結紮成貓": 1.3,
-    "老貓": 1.0,
-    "減重": 0.8,
-}
-activity_factor_map = {"低": 1.0, "中": 1.2, "高": 1.4}
-
-rer = 70 * (weight ** 0.75)
-mer = rer * phys_factor_map[age_group] * activity_factor_map[activity]
-
-min_protein_g = mer / 1000 * 65
-min_fat_g = mer / 1000 * 22.5
-recommend_protein_g = min_protein_g * 1.15
-recommend_fat_g = min_fat_g * 1.15
+# 配方快取以 0.1 kg 為單位（plan_cache.WEIGHT_STEP）；輸入時就取到同樣的單位，頁首 MER 與各區段的配方用同一個體重
+weight = plan_cache.round_weight(st.number_input("體重 (kg)", min_value=0.1, step=plan_cache.WEIGHT_STEP, value=4.0,
+                                                 format="%.1f"))
+age_group = st.selectbox("年齡層", engine.AGE_GROUPS)
+activity = st.selectbox("活動量", engine.ACTIVITY_LEVELS)
+
+with prof.span("rer_mer"):
+    req = memo("req", (weight, age_group, activity), lambda: engine.energy_requirements(weight, age_group, activity))
+rer = float(req["rer"])
+mer = float(req["mer"])
+min_protein_g = float(req["min_protein_g"])
+min_fat_g = float(req["min_fat_g"])
+recommend_protein_g = float(req["recommend_protein_g"])
+recommend_fat_g = float(req["recommend_fat_g"])
 
 st.subheader("📊 計算結果")
 col1, col2, col3 = st.columns(3)
@@ -140,216 +81,322 @@ with col1:
     st.metric("MER (建議攝取)", f"{mer:.0f} kcal / 天")
 with col2:
     st.write("最低營養素")
-    st.write(f"蛋白質 ≥ **{min_protein_g:.1f} g / 天**") 
+    st.write(f"蛋白質 ≥ **{min_protein_g:.1f} g / 天**")
     st.write(f"脂肪 ≥ **{min_fat_g:.1f} g / 天**")
 with col3:
     st.write("建議營養素")
     st.write(f"蛋白質 **{recommend_protein_g:.1f} g / 天**")
     st.write(f"脂肪 **{recommend_fat_g:.1f} g / 天**")
 
-# --- 乾糧區 ---
-st.markdown("---")
-st.subheader("🥣 乾糧熱量扣除")
+dry_candidates = foods.dry_names
+fresh_candidates = foods.fresh_names
 
-dry_candidates = df[df["類型"].str.contains("乾", na=False)]
-selected_dry = st.multiselect("選擇乾糧（可複選）", dry_candidates["食物名稱"].tolist())
 
-dry_total_kcal = 0.0
-dry_rows = []  # 顯示每項 gram / kcal 與宏量(g)
+# --- 乾糧區 ---
+@st.fragment
+def dry_section(mer: float) -> dict:
+    st.markdown("---")
+    st.subheader("🥣 乾糧熱量扣除")
+
+    selected_dry = st.multiselect("選擇乾糧（可複選）", dry_candidates)
 
-if selected_dry:
+    dry_grams = {}
     for name in selected_dry:
-        row = dry_candidates[dry_candidates["食物名稱"] == name].iloc[0]
-        grams = st.number_input(
+        dry_grams[name] = st.number_input(
             f"{name} 每日餵食克數",
             min_value=0.0,
             step=1.0,
             value=0.0,
             key=f"dry_{name}"
         )
-        kcal_g = float(row["kcal_per_g"])
-        kcal   = grams * kcal_g
-
-        # 以標示百分比換算成「克」：g = % × 克數 / 100
-        prot_g = grams * float(row["蛋白質"]) / 100.0
-        fat_g  = grams * float(row["脂肪"])   / 100.0
-        carb_g = grams * float(row["碳水"])   / 100.0
-
-        dry_total_kcal += kcal
-        dry_rows.append({
-            "食物名稱": name,
-            "kcal/g": round(kcal_g, 3),
-            "每日克數(g)": round(grams, 1),
-            "提供熱量(kcal)": round(kcal, 1),
-            "蛋白(g)": round(prot_g, 1),
-            "脂肪(g)": round(fat_g, 1),
-            "碳水(g)": round(carb_g, 1),
-        })
-
-# 若有選擇，顯示每項與總計
-if dry_rows:
-    dry_df = pd.DataFrame(dry_rows)
-    st.dataframe(dry_df, use_container_width=True)
-
-    # 總計列
-    total_row = pd.DataFrame([{
-        "食物名稱": "➡️ 合計",
-        "kcal/g": "",
-        "每日克數(g)": dry_df["每日克數(g)"].sum(),
-        "提供熱量(kcal)": dry_df["提供熱量(kcal)"].sum().round(1),
-        "蛋白(g)": dry_df["蛋白(g)"].sum().round(1),
-        "脂肪(g)": dry_df["脂肪(g)"].sum().round(1),
-        "碳水(g)": dry_df["碳水(g)"].sum().round(1),
-    }])
-
-    st.dataframe(total_row, use_container_width=True)
-
-remain_kcal = max(mer - dry_total_kcal, 0.0)
-
-# 兩個重點指標：總克數 & 鮮食提供熱量
-col_g, col_kcal = st.columns(2)
-with col_g:
-    st.metric("🔥乾糧提供熱量", f"{dry_total_kcal:.0f} kcal / 天")
-with col_kcal:
-    # total_kcal 已在上面彙總；若你想保險，也可用 df_serve["熱量(kcal)"].sum()
-    st.metric("⚖️鮮食需補熱量", f"{remain_kcal:.0f} kcal / 天")
 
-# --- 食材選擇與自動配比（依 65:22.5:12.5 熱量比例）---
-st.markdown("---")
-
-# 乾糧貢獻（如果有選乾糧才會有 dry_df）
-if "dry_df" in locals() and not dry_df.empty:
-    dry_protein_total = float(dry_df["蛋白(g)"].sum())
-    dry_fat_total     = float(dry_df["脂肪(g)"].sum())
-    dry_carb_total    = float(dry_df["碳水(g)"].sum())
-    dry_kcal_total    = float(dry_df["提供熱量(kcal)"].sum())
-else:
-    dry_protein_total = dry_fat_total = dry_carb_total = dry_kcal_total = 0.0
+    dry_key = (foods.version, tuple(dry_grams.items()))
+    with prof.span("dry_deduction"):
+        dry = memo("dry", dry_key, lambda: engine.dry_deduction(foods, dry_grams))
+
+    # 若有選擇，顯示每項與總計
+    if dry["rows"]:
+        def dry_tables():
+            dry_df = pd.DataFrame(dry["rows"])
+            total_row = pd.DataFrame([{
+                "食物名稱": "➡️ 合計",
+                "kcal/g": "",
+                "每日克數(g)": dry_df["每日克數(g)"].sum(),
+                "提供熱量(kcal)": dry_df["提供熱量(kcal)"].sum().round(1),
+                "蛋白(g)": dry_df["蛋白(g)"].sum().round(1),
+                "脂肪(g)": dry_df["脂肪(g)"].sum().round(1),
+                "碳水(g)": dry_df["碳水(g)"].sum().round(1),
+            }])
+            return dry_df, total_row
+
+        with prof.span("dry_render"):
+            dry_df, total_row = memo("dry_df", dry_key, dry_tables)
+            st.dataframe(dry_df, use_container_width=True)
+
+            # 總計列
+            st.dataframe(total_row, use_container_width=True)
+
+    remain_kcal = max(mer - dry["kcal"], 0.0)
+
+    # 兩個重點指標：總克數 & 鮮食提供熱量
+    col_g, col_kcal = st.columns(2)
+    with col_g:
+        st.metric("🔥乾糧提供熱量", f"{dry['kcal']:.0f} kcal / 天")
+    with col_kcal:
+        st.metric("⚖️鮮食需補熱量", f"{remain_kcal:.0f} kcal / 天")
+
+    # 鮮食與固定克數區都依賴乾糧的扣除量
+    publish("dry", (dry["kcal"], dry["protein_g"], dry["fat_g"], dry["carb_g"]))
+    return dry
+
+dry = dry_section(mer)
+
+# 乾糧貢獻（沒選乾糧時皆為 0）
+dry_total_kcal    = dry["kcal"]
+dry_protein_total = dry["protein_g"]
+dry_fat_total     = dry["fat_g"]
+dry_carb_total    = dry["carb_g"]
 
 # 目標：整天（乾糧＋所有鮮食）要達到的營養量
-target_total_kcal = float(mer)
-target_protein_g  = float(recommend_protein_g)   # 之前算好的建議蛋白質（含 1.15 安全係數）
-target_fat_g      = float(recommend_fat_g)       # 之前算好的建議脂肪
-target_carb_g     = target_total_kcal * 0.125 / 4.0  # 12.5% 熱量來自碳水
-
-fresh_candidates = df[df["類型"].str.contains("生", na=False)]
-selected_fresh = st.multiselect("選擇鮮食食材（可複選）", fresh_candidates["食物名稱"].tolist())
-
-ratio_map = {}
-if selected_fresh:
-    st.caption("系統已依 65% 蛋白、22.5% 脂肪、12.5% 碳水 的熱量比例，自動推薦每日鮮食份量。")
-
-    # --- 鮮食需要補的營養缺口（扣掉乾糧） ---
-    remain_protein_g = max(target_protein_g - dry_protein_total, 0)
-    remain_fat_g     = max(target_fat_g     - dry_fat_total, 0)
-    remain_carb_g    = max(target_carb_g    - dry_carb_total, 0)
-
-    # 將「剩餘營養克數」換算成「每 kcal 所需的營養密度（g / kcal）」
-    # 用於後續權重計算，讓鮮食配比依據「實際尚未補足的營養缺口」
-    if remain_kcal > 0:
-        t_prot_per_kcal = remain_protein_g / remain_kcal
-        t_fat_per_kcal  = remain_fat_g     / remain_kcal
-        t_carb_per_kcal = remain_carb_g    / remain_kcal
-    else:
-        # 避免除以 0，若無剩餘熱量則設為 0
-        t_prot_per_kcal = t_fat_per_kcal = t_carb_per_kcal = 0.0
-
-    # 距離越接近目標宏量比例 → 權重越高
-    weights = []
-    for name in selected_fresh:
-        row = fresh_candidates[fresh_candidates["食物名稱"] == name].iloc[0]
-        kcal_g = float(row["kcal_per_g"]) if not pd.isna(row["kcal_per_g"]) else 0.0
-        if kcal_g <= 0:
-            w = 1e-6
-        else:
-            ppk = (float(row["蛋白質"]) / 100.0) / kcal_g
-            fpk = (float(row["脂肪"]) / 100.0) / kcal_g
-            cpk = (float(row["碳水"]) / 100.0) / kcal_g
-            d = math.sqrt(
-                (ppk - t_prot_per_kcal)**2 +
-                (fpk - t_fat_per_kcal)**2 +
-                (cpk - t_carb_per_kcal)**2
-            )
-            w = 1.0 / (d + 1e-6)
-        weights.append((name, w))
-
-    # 轉成比例 map
-    sumw = sum(w for _, w in weights)
-    ratio_map = {name: (w if sumw > 0 else 1.0) for name, w in weights}
-    sum_ratio = sum(ratio_map.values())
-
-    # 🧮 根據熱量缺口計算建議總克數與每項食材克數
-    if "remain_kcal" in locals():
-        mix_kcal_per_g = 0.0
-        for name, r in ratio_map.items():
-            frac = r / sum_ratio
-            row = fresh_candidates[fresh_candidates["食物名稱"] == name].iloc[0]
-            mix_kcal_per_g += frac * float(row["kcal_per_g"])
-
-        total_fresh_g = remain_kcal / mix_kcal_per_g if mix_kcal_per_g > 0 else 0
-
-        serve_rows = []
-        total_prot = total_fat = total_carb = total_kcal = 0.0
-
-        for name, r in ratio_map.items():
-            frac = r / sum_ratio
-            grams = total_fresh_g * frac
-            row = fresh_candidates[fresh_candidates["食物名稱"] == name].iloc[0]
-
-            prot_g = grams * float(row["蛋白質"]) / 100.0
-            fat_g  = grams * float(row["脂肪"])   / 100.0
-            carb_g = grams * float(row["碳水"])   / 100.0
-            kcal   = grams * float(row["kcal_per_g"])
-
-            total_prot += prot_g
-            total_fat += fat_g
-            total_carb += carb_g
-            total_kcal += kcal
-
-            serve_rows.append({
-                "食材": name,
-                "建議克數(g)": round(grams, 1),
-                "蛋白(g)": round(prot_g, 1),
-                "脂肪(g)": round(fat_g, 1),
-                "碳水(g)": round(carb_g, 1),
-                "熱量(kcal)": round(kcal, 1),
-            })
-
-        df_serve = pd.DataFrame(serve_rows)
+target_protein_g  = recommend_protein_g   # 之前算好的建議蛋白質（含 1.15 安全係數）
+target_fat_g      = recommend_fat_g       # 之前算好的建議脂肪
+target_carb_g     = float(req["target_carb_g"])  # 12.5% 熱量來自碳水
+
+# --- 鮮食需要補的營養缺口（扣掉乾糧）：[kcal, 蛋白, 脂肪, 碳水] ---
+fresh_target = solver.remaining_target(
+    [mer, target_protein_g, target_fat_g, target_carb_g],
+    [dry_total_kcal, dry_protein_total, dry_fat_total, dry_carb_total],
+)
+
+
+# --- 食材選擇與自動配比（依 65:22.5:12.5 熱量比例）---
+@st.fragment
+def fresh_section(plan_inputs: tuple) -> None:
+    st.markdown("---")
+    selected_fresh = st.multiselect("選擇鮮食食材（可複選）", fresh_candidates)
+    if not selected_fresh:
+        return
+
+    st.caption("系統以 NNLS（非負最小平方法）求出最接近 65% 蛋白、22.5% 脂肪、12.5% 碳水 缺口、且剛好補滿熱量的每日鮮食份量。")
+
+    # 🧮 求解每項食材克數（相同輸入的配方由所有 session 共用，見 plan_cache.py）
+    with prof.span("auto_ratio"):
+        # 快取沒命中（例如只改了體重）時，以這個 session 上一份配方的克數熱啟動
+        plan = plan_cache.get_plan(foods, *plan_inputs, fresh=selected_fresh, warm=st.session_state.get("fresh_warm"))
+        fresh_plan = plan["fresh"]
+        st.session_state["fresh_warm"] = fresh_plan["grams"]
+        grams = [fresh_plan["grams"][name] for name in selected_fresh]
+        df_serve = memo("fresh", (plan["key"], tuple(selected_fresh)), lambda: pd.DataFrame(
+            engine.serving_rows(selected_fresh, foods.matrix(selected_fresh), grams)))
+    total_fresh_g = sum(grams)
+    total_kcal, total_prot, total_fat, total_carb = fresh_plan["achieved"]
+
+    with prof.span("fresh_render"):
         st.dataframe(df_serve, use_container_width=True)
 
-        # 🔹 顯示整份鮮食的營養比例
-        if total_kcal > 0:
-            prot_pct = (total_prot * 4 / total_kcal) * 100
-            fat_pct  = (total_fat * 9 / total_kcal) * 100
-            carb_pct = (total_carb * 4 / total_kcal) * 100
-            st.caption(
-                f"整體鮮食營養比例：蛋白質 {prot_pct:.1f}%、脂肪 {fat_pct:.1f}%、碳水 {carb_pct:.1f}%"
-            )
-
-        # 兩個重點指標：總克數 & 鮮食提供熱量
-        col_g, col_kcal = st.columns(2)
-        with col_g:
-            st.metric("🍽️ 鮮食總克數（達成熱量與營養）", f"{total_fresh_g:.0f} g / 天")
-        with col_kcal:
-            # total_kcal 已在上面彙總；若你想保險，也可用 df_serve["熱量(kcal)"].sum()
-            st.metric("🔥 鮮食提供熱量", f"{total_kcal:.0f} kcal / 天")
+    # 🔹 顯示整份鮮食的營養比例
+    if total_kcal > 0:
+        prot_pct, fat_pct, carb_pct = engine.macro_percentages(total_kcal, total_prot, total_fat, total_carb)
+        st.caption(
+            f"整體鮮食營養比例：蛋白質 {prot_pct:.1f}%、脂肪 {fat_pct:.1f}%、碳水 {carb_pct:.1f}%"
+        )
+    res_p, res_f, res_c = fresh_plan["residual"][1:]
+    st.caption(
+        f"與目標差距：蛋白 {res_p:+.1f} g、脂肪 {res_f:+.1f} g、碳水 {res_c:+.1f} g"
+        f"（求解 {fresh_plan['seconds'] * 1000:.2f} ms）"
+    )
+
+    # 兩個重點指標：總克數 & 鮮食提供熱量
+    col_g, col_kcal = st.columns(2)
+    with col_g:
+        st.metric("🍽️ 鮮食總克數（達成熱量與營養）", f"{total_fresh_g:.0f} g / 天")
+    with col_kcal:
+        st.metric("🔥 鮮食提供熱量", f"{total_kcal:.0f} kcal / 天")
+
+# 配方的輸入（體重、年齡層、活動量、乾糧克數）；鮮食與固定克數區各自再加上自己的食材選擇
+plan_inputs = (weight, age_group, activity, dry["grams"])
+fresh_section(plan_inputs)
+
+nutrient_db = fda_matrix.open_matrix()
+all_categories = memo("fda_categories", id(nutrient_db), lambda: sorted(set(nutrient_db.foods["category"])))
+food_search = food_index.search_for(nutrient_db)
+# 乾糧是完整均衡的商業飼料、本身已符合 AAFCO；鮮食這一份另外以自己的熱量換算每 1000 kcal 標準
+AAFCO_BASIS = "乾糧視為本身已符合 AAFCO 的完整飼料，每 1000 kcal 標準只套用在鮮食這一份（以鮮食補的熱量換算）。"
+SEARCH_LIMIT = 50
+
+def food_picker(label: str, key: str) -> list:
+    """衛福部資料庫的食材選單：搜尋框（名稱與俗名；前綴 → 子字串 → 模糊）先縮小選項，已選的食材一直保留"""
+    q = st.text_input(f"搜尋{label}（名稱或俗名，例如 小薏仁）", key=f"{key}_q").strip()
+    hits = food_search.search_names(q, limit=SEARCH_LIMIT) if q else nutrient_db.foods["name"]
+    return st.multiselect(label, list(dict.fromkeys([*st.session_state.get(key, []), *hits])), key=key)
+
+
+# --- 自動推薦食譜（從衛福部營養資料庫挑 k 種食材） ---
+@st.fragment
+def recipe_search_section(fresh_target, stage: str) -> None:
+    st.markdown("---")
+    st.subheader("🔎 自動推薦食譜：不用先選食材")
+    st.caption("在允許的分類中搜尋最多 k 種食材的組合，找出最佳克數最接近 蛋白 / 脂肪 / 碳水 缺口的前幾名；"
+               "超過時間上限會回傳目前找到最好的組合。" + AAFCO_BASIS)
+
+    rs_categories = st.multiselect("允許的分類", all_categories, default=recipe_search.DEFAULT_CATEGORIES, key="rs_cat")
+    rs_col1, rs_col2 = st.columns(2)
+    with rs_col1:
+        rs_k = st.number_input("最多幾種食材", min_value=1, max_value=5, step=1, value=3, key="rs_k")
+    with rs_col2:
+        rs_budget = st.number_input("時間上限（秒）", min_value=1.0, max_value=60.0, step=1.0, value=5.0, key="rs_budget")
+
+    if rs_categories and st.button("開始搜尋", key="rs_go"):
+        with prof.span("recipe_search"):
+            rs_names, rs_matrix = recipe_search.candidates(nutrient_db, rs_categories)
+            # 每次更新前幾名時，一次檢查所有組合的胺基酸、脂肪酸與鈣磷比（見 adequacy.py）
+            rs_checker = memo("rs_checker", (id(nutrient_db), tuple(rs_categories)),
+                              lambda: adequacy.Checker(nutrient_db, names=rs_names))
+            rs_status = st.empty()
+            rs_table = st.empty()
+            for snap in recipe_search.search(rs_names, rs_matrix, fresh_target, k=int(rs_k), time_budget=rs_budget):
+                rs_check = rs_checker.evaluate(rs_checker.mix_matrix([(p["names"], p["grams"]) for p in snap["plans"]]),
+                                               energy=fresh_target[0])
+                rs_table.dataframe(pd.DataFrame([{
+                    "食材組合": "、".join(f"{n} {g:.0f}g" for n, g in zip(p["names"], p["grams"])),
+                    "熱量差(kcal)": round(p["residual"][0], 1),
+                    "蛋白差(g)": round(p["residual"][1], 1),
+                    "脂肪差(g)": round(p["residual"][2], 1),
+                    "碳水差(g)": round(p["residual"][3], 1),
+                    "AAFCO 胺基酸 / 脂肪酸 / 鈣磷": note,
+                } for p, note in zip(snap["plans"], rs_checker.summary(rs_check, stage))]), use_container_width=True)
+                rs_status.caption(
+                    f"{len(rs_names)} 種候選食材；已搜尋 {snap['nodes']:,} 個組合（剪掉 {snap['pruned']:,} 個子樹），"
+                    f"{snap['seconds']:.1f} 秒" + ("，已達時間上限" if snap["timed_out"] else "，搜尋完成" if snap["done"] else "…")
+                )
 
-# --- 固定克數模式（使用者輸入多種食材克數 → 補足某一食材） ---
-st.markdown("---")
-st.subheader("🥚 固定克數模式：輸入已有食材克數，系統幫你算補足量")
+recipe_search_section(fresh_target, aafco.stage_for(age_group))
 
-st.caption("選擇任意多種鮮食食材，輸入你手邊的克數，並選擇要用哪個補足剩餘營養與熱量。")
 
-fixed_candidates = df[df["類型"].str.contains("生", na=False)]
-selected_fixed = st.multiselect(
-    "選擇已有克數的食材（可複選）",
-    fixed_candidates["食物名稱"].tolist(),
-    key="fixed_sel"
-)
+# --- 微量營養素模式（AAFCO 每 1000 kcal 標準，衛福部營養資料庫） ---
+@st.fragment
+def micronutrient_section(fresh_target, stage: str) -> None:
+    st.markdown("---")
+    st.subheader("🧪 微量營養素模式：同時滿足礦物質、維生素與鈣磷比")
+    st.caption("從衛福部食品營養成分資料庫挑選候選食材，以線性規劃求出補滿熱量、接近蛋白 / 脂肪 / 碳水目標，"
+               "且符合 AAFCO 每 1000 kcal 最低量與上限的每日克數。資料庫未檢測的營養素視為 0。" + AAFCO_BASIS)
 
-fixed_input = {}
-if selected_fixed:
+    lp_categories = st.multiselect("候選食材分類", all_categories, key="lp_cat")
+    lp_foods = food_picker("或指定食材（優先）", "lp_foods")
+    lp_max_g = st.number_input("每種食材每日上限 (g)", min_value=1.0, step=10.0, value=150.0, key="lp_max_g")
+    if not (lp_foods or lp_categories):
+        return
+
+    def solve_lp():
+        lp_names, lp_macro, lp_micro = diet_lp.candidates(
+            nutrient_db, names=lp_foods or None, categories=None if lp_foods else lp_categories
+        )
+        lp_res = diet_lp.solve(lp_macro, lp_micro, fresh_target, stage=stage, energy=fresh_target[0],
+                               max_grams=lp_max_g)
+        return lp_names, lp_macro, lp_res
+
+    lp_key = (tuple(lp_foods), tuple(lp_categories), lp_max_g, tuple(fresh_target), stage)
+    with prof.span("diet_lp"):
+        lp_names, lp_macro, lp_res = memo("diet_lp", lp_key, solve_lp)
+    st.caption(f"標準：{'生長 / 繁殖期' if stage == 'growth' else '成貓維持期'}，"
+               f"{len(lp_names)} 種候選食材（求解 {lp_res['seconds'] * 1000:.1f} ms）")
+
+    if lp_res["status"] == "optimal":
+        lp_used = lp_res["grams"] > 0.05
+        lp_names_used = [n for n, u in zip(lp_names, lp_used) if u]
+        st.dataframe(pd.DataFrame(engine.serving_rows(lp_names_used, lp_macro[lp_used], lp_res["grams"][lp_used])),
+                     use_container_width=True)
+        res_p, res_f, res_c = lp_res["residual"][1:]
+        st.caption(f"與目標差距：蛋白 {res_p:+.1f} g、脂肪 {res_f:+.1f} g、碳水 {res_c:+.1f} g；"
+                   f"鈣磷比 {lp_res['ca_p']:.2f}")
+        with st.expander("各營養素每 1000 kcal 含量"):
+            st.dataframe(lp_res["nutrients"].drop(columns="key"), use_container_width=True)
+    elif lp_res["status"] == "infeasible":
+        st.error("這些候選食材無法同時滿足所有限制，以下是互相衝突的限制（差距為每日總量的短缺 / 超出量）：")
+        st.dataframe(pd.DataFrame(lp_res["conflicts"]), use_container_width=True)
+    else:
+        st.error(f"求解失敗：{lp_res['message']}")
+
+micronutrient_section(fresh_target, aafco.stage_for(age_group))
+
+
+# --- 輪替菜單（多天排程；微量營養素以整個週期平均，只重解改到的那幾天） ---
+@st.fragment
+def rotation_section(fresh_target, stage: str) -> None:
+    st.markdown("---")
+    st.subheader("🔄 輪替菜單：一週換著吃，整週平均達到 AAFCO")
+    st.caption("從食材池定義幾份菜單，再用字母排出每天吃哪一份（例如 ABACABC）。每天補滿熱量、接近蛋白 / 脂肪 / 碳水目標；"
+               "微量營養素與鈣磷比以整個週期的總量計。改一天或換掉某份菜單的一種食材時，只重算受影響的那幾天。" + AAFCO_BASIS)
+
+    rot_pool = food_picker("食材池（衛福部營養資料庫）", "rot_pool")
+    if not rot_pool:
+        return
+    rot_count = st.number_input("菜單份數", min_value=1, max_value=len(rotation.LETTERS), step=1, value=2,
+                                key="rot_count")
+    letters = rotation.LETTERS[:int(rot_count)]
+    rot_cols = st.columns(len(letters))
+    menus = {}
+    for col, letter in zip(rot_cols, letters):
+        with col:
+            menus[letter] = st.multiselect(f"菜單 {letter}", rot_pool, key=f"rot_menu_{letter}")
+    rot_pattern = st.text_input("排程（一個字母一天）", value=rotation.default_schedule(len(letters)), key="rot_pattern")
+    rot_max_g = st.number_input("每種食材每日上限 (g)", min_value=1.0, step=10.0, value=150.0, key="rot_max_g")
+    try:
+        schedule = rotation.parse_schedule(rot_pattern, menus)
+    except KeyError as e:
+        st.warning(e.args[0])
+        return
+    if not schedule or not all(menus[c] for c in schedule):
+        st.info("每份排進去的菜單都至少要選一種食材")
+        return
+
+    # 食材池、目標或標準變了才換新的 Planner；同一個 Planner 記得上一次各天的解，只重解菜單有變的天
+    planner = memo("rotation", (id(nutrient_db), tuple(rot_pool), tuple(fresh_target), stage, rot_max_g),
+                   lambda: rotation.Planner(nutrient_db, rot_pool, fresh_target, fresh_target[0], stage,
+                                            max_grams=rot_max_g))
+    with prof.span("rotation"):
+        rot = planner.update([menus[c] for c in schedule])
+    mode = {"cached": "沿用上次的解", "incremental": f"只重算第 {'、'.join(str(d + 1) for d in rot['resolved'])} 天",
+            "full": "整個週期重算", "macro_only": "整個週期無法同時滿足微量營養素，改為逐天只補宏量"}[rot["mode"]]
+    st.caption(f"{len(schedule)} 天，{mode}（{rot['seconds'] * 1000:.1f} ms）；"
+               f"週期鈣磷比 {rot['ca_p']:.2f}，{'微量營養素全部達標' if rot['adequate'] else '有微量營養素未達標'}")
+
+    st.dataframe(pd.DataFrame([{
+        "天": d + 1,
+        "菜單": letter,
+        "食材": "、".join(f"{n} {g:.0f}g" for n, g in day["grams"].items()),
+        "熱量差(kcal)": round(day["residual"][0], 1),
+        "蛋白差(g)": round(day["residual"][1], 1),
+        "脂肪差(g)": round(day["residual"][2], 1),
+        "碳水差(g)": round(day["residual"][3], 1),
+    } for d, (letter, day) in enumerate(zip(schedule, rot["days"]))]), use_container_width=True)
+    with st.expander("整個週期的微量營養素（每 1000 kcal）"):
+        st.dataframe(rot["nutrients"].drop(columns="key"), use_container_width=True)
+
+    st.markdown("### 🧾 整個週期的備餐清單")
+    st.dataframe(pd.DataFrame([[name, round(g, 1), used] for name, g, used in rot["prep"]],
+                              columns=["食材", "總克數(g)", "使用天數"]), use_container_width=True)
+
+rotation_section(fresh_target, aafco.stage_for(age_group))
+
+
+# --- 固定克數模式（使用者輸入多種食材克數 → 補足某一食材） ---
+@st.fragment
+def fixed_section(plan_inputs: tuple) -> None:
+    st.markdown("---")
+    st.subheader("🥚 固定克數模式：輸入已有食材克數，系統幫你算補足量")
+
+    st.caption("選擇任意多種鮮食食材，輸入你手邊的克數，並選擇要用哪個補足剩餘營養與熱量。")
+
+    selected_fixed = st.multiselect(
+        "選擇已有克數的食材（可複選）",
+        fresh_candidates,
+        key="fixed_sel"
+    )
+    if not selected_fixed:
+        return
+
+    fixed_input = {}
     st.write("### 🥩 輸入手邊食材克數")
     for name in selected_fixed:
         grams = st.number_input(
@@ -361,29 +408,17 @@ if selected_fixed:
         )
         fixed_input[name] = grams
 
-    # 👉 計算固定食材提供的營養與熱量
-    fixed_total_prot = fixed_total_fat = fixed_total_carb = fixed_total_kcal = 0.0
-
-    for name, grams in fixed_input.items():
-        row = fixed_candidates[fixed_candidates["食物名稱"] == name].iloc[0]
-
-        prot_g = grams * float(row["蛋白質"]) / 100.0
-        fat_g  = grams * float(row["脂肪"])   / 100.0
-        carb_g = grams * float(row["碳水"])   / 100.0
-        kcal   = grams * float(row["kcal_per_g"])
-
-        fixed_total_prot += prot_g
-        fixed_total_fat  += fat_g
-        fixed_total_carb += carb_g
-        fixed_total_kcal += kcal
+    # 👉 扣除乾糧與固定食材後的缺口、補足量與最終營養（整份配方查共用快取，見 plan_cache.py）
+    with prof.span("fixed_allocation"):
+        plan = plan_cache.get_plan(foods, *plan_inputs, fixed=fixed_input, warm=st.session_state.get("fixed_warm"))
+    fixed_plan = plan["fixed"]
+    st.session_state["fixed_warm"] = fixed_plan["auto"]
+    fixed_total_kcal, fixed_total_prot, fixed_total_fat, fixed_total_carb = fixed_plan["totals"]
 
     st.write("### 📘 固定食材提供的營養：",f"蛋白質**{fixed_total_prot:.1f} g**",f"、脂肪**{fixed_total_fat:.1f} g**",f"、碳水**{fixed_total_carb:.1f} g**",f"、熱量**{fixed_total_kcal:.1f} kcal**")
 
-    # 👉 計算剩餘需求（扣除乾糧 + 固定食材）
-    remain_kcal = max(mer - dry_total_kcal - fixed_total_kcal, 0)
-    remain_prot = max(recommend_protein_g - dry_protein_total - fixed_total_prot, 0)
-    remain_fat  = max(recommend_fat_g     - dry_fat_total     - fixed_total_fat , 0)
-    remain_carb  = max(target_carb_g     - dry_carb_total     - fixed_total_carb , 0)
+    # 👉 剩餘需求（扣除乾糧 + 固定食材）
+    remain_kcal, remain_prot, remain_fat, remain_carb = fixed_plan["remain"]
 
     st.write("### ⚖️ 仍需補足的每日營養")
     colR1, colR2, colR3, colR4 = st.columns(4)
@@ -395,129 +430,190 @@ if selected_fixed:
         st.metric("需補脂肪", f"{remain_fat:.1f} g/天")
     with colR4:
         st.metric("需補碳水", f"{remain_carb:.1f} g/天")
-    
-    # --- 找出需要自動計算的食材（使用者未輸入克數者） ---
-    auto_items = [name for name, g in fixed_input.items() if g == 0]
-
-    if auto_items and remain_kcal > 0:
-
-        st.write("### 🧮 自動計算補足食材（依 65/22.5/12.5 營養比例）")
-
-        #目標能量比例下的 g/kcal（缺口專用）
-        t_prot_per_kcal = remain_prot / remain_kcal if remain_kcal > 0 else 0
-        t_fat_per_kcal  = remain_fat  / remain_kcal if remain_kcal > 0 else 0
-        t_carb_per_kcal = remain_carb  / remain_kcal if remain_kcal > 0 else 0
-
-        # --- 計算每個食材與缺口營養差距 → 權重 ---
-        weights = []
-        for name in auto_items:
-            row = fixed_candidates[fixed_candidates["食物名稱"] == name].iloc[0]
-            kcal_g = float(row["kcal_per_g"])
-
-            if kcal_g <= 0:
-                w = 1e-6
-            else:
-                ppk = (float(row["蛋白質"]) / 100) / kcal_g
-                fpk = (float(row["脂肪"]) / 100)   / kcal_g
-                cpk = (float(row["碳水"]) / 100)   / kcal_g
-
-                d = math.sqrt(
-                    (ppk - t_prot_per_kcal)**2 +
-                    (fpk - t_fat_per_kcal)**2 +
-                    (cpk - t_carb_per_kcal)**2
-                )
-                w = 1 / (d + 1e-6)
-            weights.append((name, w))
-
-        sum_w = sum(w for _, w in weights) or 1
-
-        # --- 分配剩餘熱量給 auto items ---
-        auto_rows = []
-        total_auto_prot = total_auto_fat = total_auto_carb = total_auto_kcal = 0.0
-
-        for name, w in weights:
-            share = w / sum_w
-            kcal_i = remain_kcal * share
 
-            row = fixed_candidates[fixed_candidates["食物名稱"] == name].iloc[0]
-            kcal_g = float(row["kcal_per_g"])
+    # --- 需要自動計算的食材（使用者未輸入克數者）；沒有或熱量已補滿時配方裡沒有補足量 ---
+    auto = fixed_plan["auto"]
+    if not auto:
+        return
+    auto_items = [name for name in selected_fixed if name in auto]
 
-            grams_i = kcal_i / kcal_g if kcal_g > 0 else 0
-
-            prot_i = grams_i * float(row["蛋白質"]) / 100
-            fat_i  = grams_i * float(row["脂肪"])   / 100
-            carb_i  = grams_i * float(row["碳水"])   / 100
-            kcal_i = grams_i * kcal_g
-
-            total_auto_prot += prot_i
-            total_auto_fat  += fat_i
-            total_auto_carb += carb_i
-            total_auto_kcal += kcal_i
-
-            auto_rows.append({
-                "食材": name,
-                "建議補足克數(g)": round(grams_i, 1),
-                "蛋白(g)": round(prot_i, 1),
-                "脂肪(g)": round(fat_i, 1),
-                "碳水(g)": round(carb_i, 1),
-                "熱量(kcal)": round(kcal_i, 1),
-            })
+    st.write("### 🧮 自動計算補足食材（NNLS，依 65/22.5/12.5 營養比例）")
 
+    with prof.span("fixed_render"):
+        auto_rows = memo("auto_rows", (plan["key"], tuple(auto_items)), lambda: engine.serving_rows(
+            auto_items, foods.matrix(auto_items), [auto[name] for name in auto_items], gram_label="建議補足克數(g)"))
         st.dataframe(pd.DataFrame(auto_rows), use_container_width=True)
 
-        # --- 最終整體營養 ---
-        final_prot = fixed_total_prot + total_auto_prot + dry_protein_total
-        final_fat  = fixed_total_fat + total_auto_fat + dry_fat_total
-        final_carb  = fixed_total_carb + total_auto_carb + dry_carb_total
-        final_kcal = fixed_total_kcal + total_auto_kcal + dry_total_kcal
-
-        # --- 🔢 最終營養比例（含乾糧 + 所有鮮食） ---
-        total_kcal_all = final_kcal
-
-        if total_kcal_all > 0:
-            prot_pct = (final_prot * 4 / total_kcal_all) * 100
-            fat_pct  = (final_fat  * 9 / total_kcal_all) * 100
-            carb_pct = (final_carb * 4 / total_kcal_all) * 100
-        else:
-            prot_pct = fat_pct = carb_pct = 0
-
-        st.write("### 最終每日營養：",f"蛋白質**{final_prot:.1f} g**",f"、脂肪**{final_fat:.1f} g**",f"、碳水**{final_carb:.1f} g**",f"、熱量**{final_kcal:.1f} kcal**")
-        st.write(
-            f"##### (最終營養比例"
-            f"：蛋白質 **{prot_pct:.1f}%**、脂肪 **{fat_pct:.1f}%**、碳水 **{carb_pct:.1f}%**)"
-        )
+    # --- 最終整體營養（含乾糧 + 所有鮮食）與營養比例 ---
+    final_kcal, final_prot, final_fat, final_carb = fixed_plan["final"]
+    prot_pct, fat_pct, carb_pct = fixed_plan["percentages"]
 
-        # --- 多天備餐模式 ---
-        st.markdown("---")
-        auto_df = pd.DataFrame(auto_rows)
+    st.write("### 最終每日營養：",f"蛋白質**{final_prot:.1f} g**",f"、脂肪**{final_fat:.1f} g**",f"、碳水**{final_carb:.1f} g**",f"、熱量**{final_kcal:.1f} kcal**")
+    st.write(
+        f"##### (最終營養比例"
+        f"：蛋白質 **{prot_pct:.1f}%**、脂肪 **{fat_pct:.1f}%**、碳水 **{carb_pct:.1f}%**)"
+    )
 
-        # 使用者輸入要準備幾天的鮮食 → 計算總備餐克數
-        st.markdown("### 📦 備餐模式：一次準備多天（依自動計算補足表）")
+    prep_section(plan["key"], plan["prep"])
 
-        prep_days = st.number_input(
-            "你要準備幾天的鮮食？",
-            min_value=1,
-            step=1,
-            value=1,
-            key="prep_days"
-        )
 
-        # 固定食材 + 自動補足食材 合併成「總備餐清單」
-        fixed_list = []
-        for name, grams in fixed_input.items():
-            if grams > 0:
-                fixed_list.append({"食材": name, "每日克數(g)": float(grams)})
+# --- 多天備餐模式（只依賴固定克數與自動補足的結果） ---
+@st.fragment
+def prep_section(plan_key: str, daily: list) -> None:
+    st.markdown("---")
 
-        fixed_df = pd.DataFrame(fixed_list) if fixed_list else pd.DataFrame(columns=["食材", "每日克數(g)"])
-        auto_daily_df = auto_df.rename(columns={"建議補足克數(g)": "每日克數(g)"})[["食材", "每日克數(g)"]]
+    # 使用者輸入要準備幾天的鮮食 → 計算總備餐克數
+    st.markdown("### 📦 備餐模式：一次準備多天（依自動計算補足表）")
 
-        all_daily_df = pd.concat([fixed_df, auto_daily_df], ignore_index=True)
+    prep_days = st.number_input(
+        "你要準備幾天的鮮食？",
+        min_value=1,
+        step=1,
+        value=1,
+        key="prep_days"
+    )
 
-        # 同名食材合併（以防同一食材同時在固定與補足裡）
-        all_daily_df = all_daily_df.groupby("食材", as_index=False)["每日克數(g)"].sum()
+    # 固定食材 + 自動補足食材 合併成「總備餐清單」（每日份量來自配方，已同名合併）
+    with prof.span("meal_prep"):
+        all_daily_df = memo("prep_daily", plan_key, lambda: pd.DataFrame(daily, columns=["食材", "每日克數(g)"]))
 
         all_prep_df = all_daily_df.copy()
         all_prep_df["總克數(g)"] = (all_prep_df["每日克數(g)"] * prep_days).round(1)
 
-        st.markdown("### 🧾 全部食材總備餐清單（固定 + 補足）")
-        st.dataframe(all_prep_df, use_container_width=True)
\ No newline at end of file
+    st.markdown("### 🧾 全部食材總備餐清單（固定 + 補足）")
+    with prof.span("prep_render"):
+        st.dataframe(all_prep_df, use_container_width=True)
+
+fixed_section(plan_inputs)
+
+
+# --- 情境掃描（體重 × 年齡層 × 活動量，一次算完整張表） ---
+@st.fragment
+def sweep_section(dry_items: tuple) -> None:
+    st.markdown("---")
+    st.subheader("📈 情境掃描：各體重、年齡層、活動量一次算完")
+    st.caption("乾糧沿用上方輸入的每日克數；選了鮮食食材時，每個組合都以 NNLS 求出鮮食克數。")
+
+    sw_col1, sw_col2, sw_col3 = st.columns(3)
+    with sw_col1:
+        sw_lo = st.number_input("體重起 (kg)", min_value=0.1, step=0.5, value=sweep.WEIGHT_RANGE[0], key="sw_lo")
+    with sw_col2:
+        sw_hi = st.number_input("體重迄 (kg)", min_value=0.1, step=0.5, value=sweep.WEIGHT_RANGE[1], key="sw_hi")
+    with sw_col3:
+        sw_step = st.number_input("間隔 (kg)", min_value=0.01, step=0.1, value=sweep.WEIGHT_RANGE[2], key="sw_step")
+    sw_ages = st.multiselect("年齡層", engine.AGE_GROUPS, default=engine.AGE_GROUPS, key="sw_age")
+    sw_acts = st.multiselect("活動量", engine.ACTIVITY_LEVELS, default=engine.ACTIVITY_LEVELS, key="sw_act")
+    sw_fresh = st.multiselect("鮮食食材（可不選）", fresh_candidates, key="sw_fresh")
+    if sw_hi < sw_lo:
+        st.warning("體重迄需大於等於體重起")
+        return
+    if not (sw_ages and sw_acts):
+        return
+
+    def run_sweep():
+        result = sweep.run(sweep.weight_range(sw_lo, sw_hi, sw_step), sw_ages, sw_acts, foods=foods,
+                           dry_grams=dict(dry_items), fresh_names=sw_fresh)
+        return result, sweep.labeled(result["table"]), sweep.to_csv(result["table"])
+
+    sw_key = (foods.version, sw_lo, sw_hi, sw_step, tuple(sw_ages), tuple(sw_acts), tuple(sw_fresh), dry_items)
+    with prof.span("sweep"):
+        sw_result, sw_table, sw_csv = memo("sweep", sw_key, run_sweep)
+    st.caption(f"{sw_result['points']:,} 個組合（計算 {sw_result['seconds'] * 1000:.1f} ms）")
+    st.dataframe(sw_table, use_container_width=True)
+    st.download_button("⬇️ 下載 CSV", sw_csv, file_name="cat_sweep.csv", mime="text/csv", key="sw_dl")
+
+sweep_section(tuple(dry["grams"].items()))
+
+
+# --- 成長 / 減重預測（逐週推算體重、MER 與鮮食克數） ---
+@st.fragment
+def trajectory_section(weight: float, age_group: str, activity: str, dry_items: tuple) -> None:
+    st.markdown("---")
+    st.subheader("📅 成長 / 減重預測：未來幾週的體重、熱量與克數")
+    if age_group not in trajectory.DEFAULT_AGE_MONTHS and age_group != "減重":
+        st.caption("選擇幼貓或減重的年齡層時，會逐週推算體重與 MER 的變化。")
+        return
+    st.caption("幼貓依成長曲線、減重依每週減重比例推算體重；年齡層到了就換（幼貓滿 4 / 6 個月、減重達到目標體重），"
+               "每一週都重新計算熱量與鮮食克數。整條時間軸一次算好，拖動週數只是查表。")
+
+    tj_col1, tj_col2, tj_col3 = st.columns(3)
+    with tj_col1:
+        tj_weeks = st.number_input("預測週數", min_value=1, max_value=104, step=1, value=26, key="tj_weeks")
+    with tj_col2:
+        if age_group == "減重":
+            tj_target = st.number_input("目標體重 (kg)", min_value=0.1, step=0.1,
+                                        value=round(weight * trajectory.DEFAULT_TARGET_FRACTION, 1), key="tj_target")
+        else:
+            tj_age = st.number_input("目前月齡", min_value=0.0, max_value=12.0, step=0.5,
+                                     value=trajectory.DEFAULT_AGE_MONTHS[age_group], key="tj_age")
+    with tj_col3:
+        if age_group == "減重":
+            tj_rate = st.number_input("每週減重 (%)", min_value=0.1, max_value=5.0, step=0.1,
+                                      value=trajectory.WEIGHT_LOSS_RATE * 100, key="tj_rate")
+        else:
+            tj_adult_w = st.number_input("預估成貓體重 (kg)", min_value=0.5, step=0.1,
+                                         value=trajectory.DEFAULT_ADULT_WEIGHT, key="tj_adult_w")
+    adult_groups = [g for g in engine.AGE_GROUPS if g not in trajectory.DEFAULT_AGE_MONTHS and g != "減重"]
+    tj_adult_group = st.selectbox("之後改用的年齡層", adult_groups, key="tj_adult_group")
+    tj_fresh = st.multiselect("鮮食食材（可不選）", fresh_candidates, key="tj_fresh")
+
+    if age_group == "減重":
+        kwargs = {"target_weights": tj_target, "loss_rate": tj_rate / 100}
+    else:
+        kwargs = {"age_months": tj_age, "adult_weights": tj_adult_w}
+
+    def run_projection():
+        projection = trajectory.project(weight, age_group, activity, weeks=int(tj_weeks),
+                                        adult_group=tj_adult_group, **kwargs)
+        result = trajectory.plans(projection, foods, dry_grams=dict(dry_items), fresh_names=tj_fresh)
+        return projection, result, trajectory.labeled(result["table"]).to_csv(index=False).encode("utf-8-sig")
+
+    tj_key = (foods.version, weight, age_group, activity, dry_items, int(tj_weeks), tj_adult_group,
+              tuple(sorted(kwargs.items())), tuple(tj_fresh))
+    with prof.span("trajectory"):
+        tj_projection, tj_plans, tj_csv = memo("trajectory", tj_key, run_projection)
+    table = tj_plans["table"]
+    if tj_projection["off_curve"][0]:
+        expected = weight / tj_projection["curve_ratio"][0]
+        st.warning(f"目前體重 {weight:.1f} kg 與 {tj_age:g} 月齡、成貓 {tj_adult_w:.1f} kg 的成長曲線不太一致"
+                   f"（曲線預期約 {expected:.1f} kg），請確認月齡與預估成貓體重；預測體重以 "
+                   f"{max(weight, tj_adult_w):.1f} kg 為上限、只增不減。")
+    st.caption(f"{len(table)} 週（{tj_plans['unique']} 組不重複的體重 / 年齡層，"
+               f"計算 {(tj_projection['seconds'] + tj_plans['seconds']) * 1000:.1f} ms）")
+
+    st.line_chart(table.set_index("week")[["weight"]].rename(columns={"weight": "體重(kg)"}))
+    st.line_chart(table.set_index("week")[["mer"]].rename(columns={"mer": "MER(kcal)"}))
+    changes = tj_projection["changes"]
+    if len(changes):
+        st.dataframe(pd.DataFrame({
+            "週": changes["week"],
+            "體重(kg)": changes["weight"],
+            "年齡層": [f"{a} → {b}" for a, b in zip(changes["from"], changes["to"])],
+            "MER(kcal)": [f"{a:.0f} → {b:.0f}" for a, b in zip(changes["mer_before"], changes["mer_after"])],
+        }), use_container_width=True)
+
+    tj_week = st.slider("第幾週", min_value=0, max_value=int(tj_weeks), value=0, key="tj_week")
+    row = table.iloc[tj_week]
+    tj_c1, tj_c2, tj_c3 = st.columns(3)
+    with tj_c1:
+        st.metric("體重", f"{row['weight']:.1f} kg")
+    with tj_c2:
+        st.metric("年齡層", row["age_group"])
+    with tj_c3:
+        st.metric("MER", f"{row['mer']:.0f} kcal / 天")
+    if tj_fresh:
+        st.write("、".join(f"{name} **{row[f'{name}(g)']:.1f} g**" for name in tj_fresh)
+                 + f"（鮮食共 {row['fresh_total_g']:.0f} g / 天）")
+    st.download_button("⬇️ 下載 CSV", tj_csv, file_name="cat_trajectory.csv", mime="text/csv", key="tj_dl")
+
+trajectory_section(weight, age_group, activity, tuple(dry["grams"].items()))
+
+
+# --- 計時面板（只在開啟剖析時顯示；fragment 單獨重跑的區段也會寫進追蹤檔） ---
+if prof.enabled:
+    prof.finish_run()
+    with st.expander("⏱️ 本次 rerun 各區段耗時"):
+        st.dataframe(prof.table(), use_container_width=True)
+        warm = solver.warm_stats()
+        st.caption(f"追蹤檔：{prof.path}（python profiling.py 彙整各區段 p50 / p95）；"
+                   f"求解熱啟動命中 {warm['hits']} / {warm['hits'] + warm['misses']} 次")
@@ -0,0 +1,55 @@
+# --- 營養充足度批次檢查：配方數 vs 時間（逐組 vs 一次矩陣乘法，dense vs sparse） ---
+# 執行：python -m benchmarks.bench_adequacy [--rations 1 100 1000 10000] [--k 3]
+# 候選食材同自動推薦食譜（recipe_search.candidates 的預設分類），每組配方隨機挑 k 種、各 20–120 g。
+#   loop：每組配方各呼叫一次 evaluate（逐組檢查的寫法）
+#   dense：(配方數, 食物數) numpy 陣列，一次 evaluate
+#   sparse：同一批配方用 scipy.sparse.csr_matrix（每列只有 k 個非零）
+# 建 Checker（讀營養矩陣、換算單位）只做一次，另外列出。
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import adequacy
+import fda_matrix
+import recipe_search
+from benchmarks.suite import measure
+
+
+def rations(n_foods: int, count: int, k: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    G = np.zeros((count, n_foods))
+    for i in range(count):
+        G[i, rng.choice(n_foods, k, replace=False)] = rng.uniform(20, 120, k)
+    return G
+
+def run(counts, k: int = 3) -> list:
+    from scipy import sparse
+
+    m = fda_matrix.open_matrix()
+    names, _ = recipe_search.candidates(m)
+    build = measure(lambda: adequacy.Checker(m, names=names))
+    checker = adequacy.Checker(m, names=names)
+    rows = [{"case": "build Checker", "rations": 0, "foods": len(names), "ms": build["seconds"] * 1e3}]
+    for count in counts:
+        G = rations(len(names), count, k)
+        S = sparse.csr_matrix(G)
+        cases = [("dense", lambda: checker.evaluate(G)), ("sparse", lambda: checker.evaluate(S))]
+        if count <= 1000:  # 逐組太慢，大的配方數不跑
+            cases.insert(0, ("loop", lambda: [checker.evaluate(g) for g in G]))
+        adequate = int(checker.evaluate(G)["stages"]["adult"]["adequate"].sum())
+        for name, fn in cases:
+            ms = measure(fn)["seconds"] * 1e3
+            rows.append({"case": name, "rations": count, "foods": len(names), "ms": ms,
+                         "us_per_ration": ms * 1e3 / count, "adequate_adult": adequate})
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rations", type=int, nargs="+", default=[1, 100, 1_000, 10_000])
+    ap.add_argument("--k", type=int, default=3)
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.rations, args.k)).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# --- 微量營養素線性規劃：候選食材數 vs 求解時間 ---
+# 執行：python -m benchmarks.bench_diet_lp [--sizes 16 64 256 1024 2180]
+# 限制矩陣以 scipy.sparse 建構；資料庫很多欄位是缺值（視為 0），食材越多越稀疏。
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import aafco
+import diet_lp
+import fda_matrix
+
+TARGETS = {"adult": [250.0, 20.0, 8.0, 4.0], "growth": [450.0, 40.0, 14.0, 6.0]}
+
+
+def run(sizes, repeats: int = 3, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    m = fda_matrix.open_matrix()
+    all_names, all_macro, all_micro = diet_lp.candidates(m)
+    rows = []
+    for n in sizes:
+        pick = rng.choice(len(all_names), min(n, len(all_names)), replace=False)
+        macro, micro = all_macro[pick], all_micro[pick]
+        for stage, target in TARGETS.items():
+            times, res = [], None
+            for _ in range(repeats):
+                t = time.perf_counter()
+                res = diet_lp.solve(macro, micro, target, stage=stage, max_grams=150)
+                times.append(time.perf_counter() - t)
+            _, lo, hi = aafco.limits(stage)
+            rows.append({
+                "foods": len(pick),
+                "stage": stage,
+                "constraints": int((~np.isnan(lo)).sum() + (~np.isnan(hi)).sum() + 2),
+                "nonzero_frac": np.count_nonzero(micro) / micro.size,
+                "status": res["status"],
+                "conflicts": len(res["conflicts"]),
+                "foods_used": int((res["grams"] > 0.05).sum()),
+                "ms": np.median(times) * 1e3,
+            })
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256, 1024, 2180])
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.sizes)).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# --- 多隻貓備餐匯出：名冊長度 vs 時間與峰值記憶體 ---
+# 執行：python -m benchmarks.bench_export [--cats 50 500 5000] [--workers 1 2] [--format csv xlsx]
+# 每種組合在新的子行程裡跑 roster_export.export，回報總時間、每隻貓毫秒數與子行程峰值 RSS；
+# 串流寫出時峰值 RSS 應該幾乎不隨名冊長度增加。名冊為隨機體重 / 年齡層 / 活動量與常見食材組合；
+# 每次都用空的配方快取（暫存資料夾），不受前一次執行影響。
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DRY = ["希爾思 成貓 雞肉:20", "歐睿健 鮮雞愛貓無榖貓:15", ""]
+FRESH = ["雞胸:50;雞蛋:30;雞心;山藥", "雞胸;雞蛋;黃肉地瓜", "雞腿;雞肝:5;雞蛋", "雞里肌肉;雞蛋:25;紅肉地瓜"]
+
+CHILD = """
+import json, resource, sys
+import roster_export
+r = roster_export.export(sys.argv[1], sys.argv[2], workers=int(sys.argv[3]), cache_path=sys.argv[4])
+r["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+r["children_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+print(json.dumps(r, ensure_ascii=False))
+"""
+
+
+def synthetic_roster(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "貓名": [f"貓{i:05d}" for i in range(n)],
+        "體重(kg)": rng.uniform(2.0, 7.0, n).round(1),
+        "年齡層": rng.choice(engine.AGE_GROUPS, n),
+        "活動量": rng.choice(engine.ACTIVITY_LEVELS, n),
+        "備餐天數": rng.integers(7, 31, n),
+        "乾糧": rng.choice(DRY, n),
+        "鮮食": rng.choice(FRESH, n),
+    })
+
+def run(cats, workers, formats) -> list:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in cats:
+            roster = os.path.join(tmp, f"roster_{n}.csv")
+            synthetic_roster(n).to_csv(roster, index=False)
+            for w in workers:
+                for fmt in formats:
+                    out = os.path.join(tmp, f"out_{n}_{w}.{fmt}")
+                    cache = os.path.join(tmp, f"plans_{n}_{w}_{fmt}.sqlite")
+                    proc = subprocess.run([sys.executable, "-c", CHILD, roster, out, str(w), cache], cwd=ROOT,
+                                          capture_output=True, text=True, check=True)
+                    r = json.loads(proc.stdout.strip().splitlines()[-1])
+                    rows.append({
+                        "cats": n,
+                        "workers": w,
+                        "format": fmt,
+                        "rows": r["rows"],
+                        "seconds": r["seconds"],
+                        "ms_per_cat": r["seconds"] / n * 1e3,
+                        "peak_rss_mb": r["peak_rss_mb"],
+                        "worker_rss_mb": r["children_rss_mb"] if w > 1 else None,
+                    })
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--cats", type=int, nargs="+", default=[50, 500, 5_000])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    ap.add_argument("--format", nargs="+", default=["csv", "xlsx"], choices=["csv", "xlsx"])
+    args = ap.parse_args()
+    rows = run(args.cats, sorted(set(args.workers)), args.format)
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# --- 食物查表：布林遮罩掃描 vs FoodIndex；以及 FoodSearch 搜尋 ---
+# 執行：python -m benchmarks.bench_index [--sizes 20 2500 25000 100000]
+# 遮罩掃描的成本隨資料量線性成長，FoodIndex 查表應該維持平的。
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import fda_matrix
+import food_index
+
+QUERIES = ["雞", "雞胸", "鮭魚", "地瓜", "牛腩", "薏仁", "鯛魚片"]
+
+
+def synthetic_foods(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "食物名稱": [f"食物{i:06d}" for i in range(n)],
+        "類型": rng.choice(["乾糧", "生食"], n),
+        "水分": rng.uniform(5, 90, n),
+        "蛋白質": rng.uniform(0, 40, n),
+        "脂肪": rng.uniform(0, 30, n),
+        "碳水": rng.uniform(0, 50, n),
+        "kcal_per_g": rng.uniform(0.5, 4.5, n),
+    })
+
+def per_call(fn, calls: int) -> float:
+    t = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t) / calls
+
+def bench_lookup(sizes, picks: int = 5) -> list:
+    rows = []
+    for n in sizes:
+        foods = synthetic_foods(n)
+        names = foods["食物名稱"].sample(picks, random_state=1).tolist()
+        calls = max(3, min(200, 200_000 // n))
+
+        def scan():
+            # 原本 app.py 的寫法：每個食物掃一次整張表
+            return [foods[foods["食物名稱"] == name].iloc[0] for name in names]
+
+        t_build = per_call(lambda: food_index.FoodIndex(foods), 1)
+        idx = food_index.FoodIndex(foods)
+        rows.append({
+            "rows": n,
+            "mask_scan_us": per_call(scan, calls) / picks * 1e6,
+            "index_row_us": per_call(lambda: [idx.row(name) for name in names], calls) / picks * 1e6,
+            "index_matrix_us": per_call(lambda: idx.matrix(names), 1000) / picks * 1e6,
+            "index_build_ms": t_build * 1e3,
+        })
+    return rows
+
+def bench_search() -> list:
+    m = fda_matrix.open_matrix()
+    t = time.perf_counter()
+    search = food_index.FoodSearch.from_matrix(m)
+    build = time.perf_counter() - t
+    rows = []
+    for q in QUERIES:
+        rows.append({
+            "query": q,
+            "foods": len(search.names),
+            "build_ms": build * 1e3,
+            "prefix_us": per_call(lambda: search.prefix(q), 200) * 1e6,
+            "substring_us": per_call(lambda: search.substring(q), 200) * 1e6,
+            "fuzzy_us": per_call(lambda: search.fuzzy(q), 200) * 1e6,
+            "top3": "、".join(search.search_names(q, 3)),
+        })
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20, 2500, 25000, 100000])
+    args = ap.parse_args()
+    fmt = lambda v: f"{v:.2f}"
+    print(pd.DataFrame(bench_lookup(args.sizes)).to_string(index=False, float_format=fmt))
+    print()
+    print(pd.DataFrame(bench_search()).to_string(index=False, float_format=fmt))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# --- 記憶體：每個 session 多佔多少、共用食物庫本身多大 ---
+# 執行：python -m benchmarks.bench_memory [--sizes 30 2500 25000]
+# 每個 session 握的狀態依三種寫法計算「新配置、沒有與其他 session 共用」的位元組：
+#   per_session_frames：原本 app.py 每次 rerun 重建食物表與乾糧 / 鮮食候選表（+ 名稱清單）
+#   shared_frame_lists：共用 DataFrame（food_db），但每個 session 各自 tolist() 一份候選名稱
+#   food_store：共用 FoodStore，session 只握它的 tuple 參照
+# 另列出共用的那一份本身：DataFrame（deep）與 FoodStore。FoodStore 的名稱是 Python str
+# （Streamlit 選單本來就需要），比 Arrow 字串欄大，但整個行程只有一份。
+import argparse
+import sys
+
+import pandas as pd
+
+import engine
+import food_db
+import food_store
+from benchmarks.bench_index import synthetic_foods
+
+
+def _new_bytes(obj, shared: set) -> int:
+    """obj 中不在 shared（以 id 表示）裡的物件大小；DataFrame 以 deep memory_usage 計"""
+    if id(obj) in shared:
+        return 0
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(_new_bytes(x, shared) for x in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_new_bytes(v, shared) for v in obj.values())
+    return sys.getsizeof(obj)
+
+def session_states(foods: pd.DataFrame, store: food_store.FoodStore) -> dict:
+    """三種寫法下，一個 session 在一次 rerun 後握著的東西"""
+    def per_session_frames():
+        df = foods.copy(deep=True)
+        dry, fresh = engine.dry_candidates(df), engine.fresh_candidates(df)
+        return {"df": df, "dry": dry, "fresh": fresh,
+                "dry_names": dry["食物名稱"].tolist(), "fresh_names": fresh["食物名稱"].tolist()}
+
+    def shared_frame_lists():
+        return {"dry_names": engine.dry_candidates(foods)["食物名稱"].tolist(),
+                "fresh_names": engine.fresh_candidates(foods)["食物名稱"].tolist()}
+
+    def shared_store():
+        return {"foods": store, "dry_names": store.dry_names, "fresh_names": store.fresh_names}
+
+    return {"per_session_frames": per_session_frames, "shared_frame_lists": shared_frame_lists,
+            "food_store": shared_store}
+
+def run(sizes) -> list:
+    rows = []
+    for n in sizes:
+        foods = food_db.load_food_db(food_db.DRY_PATH, food_db.FRESH_PATH) if n <= 30 else synthetic_foods(n)
+        store = food_store.FoodStore(foods)
+        shared = {id(store), id(store.dry_names), id(store.fresh_names)}
+        for name, make in session_states(foods, store).items():
+            a, b = make(), make()
+            rows.append({
+                "foods": len(foods),
+                "layout": name,
+                "per_session_kb": _new_bytes(a, shared) / 1024,
+                "shares_names": all(x is y for x, y in zip(a["dry_names"], b["dry_names"])),
+            })
+        rows.append({"foods": len(foods), "layout": "shared: DataFrame (deep)",
+                     "per_session_kb": foods.memory_usage(deep=True).sum() / 1024, "shares_names": None})
+        rows.append({"foods": len(foods), "layout": "shared: FoodStore",
+                     "per_session_kb": store.nbytes() / 1024, "shares_names": None})
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[30, 2_500, 25_000])
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.sizes)).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# --- 配方快取：求解 vs 行程內命中 vs SQLite 命中，以及模擬流量下的命中率 ---
+# 執行：python -m benchmarks.bench_plan_cache [--requests 5000] [--distinct 500]
+# 流量：從 distinct 組不同的輸入（體重 × 年齡層 × 活動量 × 鮮食組合）依 Zipf 分布抽 requests 筆，
+# 模擬多數飼主送出熱門組合；SQLite 放在暫存資料夾，不動到 .cache/plans。
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import food_db
+import food_store
+import plan_cache
+from benchmarks.suite import measure
+
+FRESH_SETS = [["雞胸", "雞蛋", "雞肝", "黃肉地瓜"], ["雞胸", "雞蛋"], ["雞腿", "雞心", "山藥"]]
+
+
+def workload(n: int, distinct: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    pool = []
+    for i in range(distinct):
+        pool.append({
+            "weight": round(2.0 + 0.1 * (i % 61), 1),
+            "age_group": engine.AGE_GROUPS[(i // 61) % len(engine.AGE_GROUPS)],
+            "activity": engine.ACTIVITY_LEVELS[i % len(engine.ACTIVITY_LEVELS)],
+            "fresh": FRESH_SETS[i % len(FRESH_SETS)],
+        })
+    ranks = np.minimum(rng.zipf(1.3, size=n), distinct) - 1
+    return [pool[r] for r in ranks]
+
+def run(requests: int, distinct: int) -> list:
+    foods = food_store.load(food_db.DRY_PATH, food_db.FRESH_PATH)
+    r = workload(1, distinct)[0]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plans.sqlite")
+        request = plan_cache.canonical_request(r["weight"], r["age_group"], r["activity"], fresh=r["fresh"],
+                                               data=foods.digest)
+        key = plan_cache.plan_key(request)
+        plan = plan_cache.build_plan(foods, request)
+
+        cache = plan_cache.PlanCache(path)
+        cache.put(key, plan)
+        disk = plan_cache.PlanCache(path)  # 同一個 SQLite、行程內那一層是空的（= 另一個 worker）
+
+        def disk_hit():
+            disk.clear()
+            disk.get(key)
+
+        for name, fn in [("solve (no cache)", lambda: plan_cache.build_plan(foods, request)),
+                         ("memory hit", lambda: cache.get(key)),
+                         ("sqlite hit", disk_hit),
+                         ("key only", lambda: plan_cache.plan_key(plan_cache.canonical_request(
+                             r["weight"], r["age_group"], r["activity"], fresh=r["fresh"], data=foods.digest)))]:
+            rows.append({"case": name, "ms_per_request": measure(fn)["seconds"] * 1e3})
+
+        traffic = workload(requests, distinct)
+        for name, c in [("traffic: no cache", None),
+                        ("traffic: memory + sqlite", plan_cache.PlanCache(os.path.join(tmp, "traffic.sqlite")))]:
+            t0 = time.perf_counter()
+            if c is None:
+                for r in traffic:
+                    plan_cache.build_plan(foods, plan_cache.canonical_request(
+                        r["weight"], r["age_group"], r["activity"], fresh=r["fresh"], data=foods.digest))
+            else:
+                for r in traffic:
+                    plan_cache.get_plan(foods, r["weight"], r["age_group"], r["activity"], fresh=r["fresh"], cache=c)
+            seconds = time.perf_counter() - t0
+            rows.append({"case": name, "ms_per_request": seconds / requests * 1e3,
+                         "hit_rate": c.stats()["hit_rate"] if c is not None else None})
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--requests", type=int, default=5_000)
+    ap.add_argument("--distinct", type=int, default=500)
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.requests, args.distinct)).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# --- 自動推薦食譜：分支定界搜尋了多少組合、多久出第一個結果 ---
+# 執行：python -m benchmarks.bench_recipe_search [--k 1 2 3] [--budget 30] [--workers 1 4]
+# brute_force 為 C(n, 1) + ... + C(n, k)；nodes 越少代表剪枝越有效。
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+import fda_matrix
+import recipe_search
+
+TARGET = [250.0, 20.0, 8.0, 4.0]  # 約 4 kg 成貓、沒有乾糧時的 [kcal, 蛋白, 脂肪, 碳水]
+
+
+def run(ks, budget: float, workers_list, categories=recipe_search.DEFAULT_CATEGORIES) -> list:
+    names, matrix = recipe_search.candidates(fda_matrix.open_matrix(), categories)
+    n = len(names)
+    rows = []
+    for workers in workers_list:
+        for k in ks:
+            t0 = time.perf_counter()
+            first = None
+            snaps = 0
+            for snap in recipe_search.search(names, matrix, TARGET, k=k, time_budget=budget, workers=workers):
+                snaps += 1
+                if first is None and snap["plans"]:
+                    first = time.perf_counter() - t0
+            rows.append({
+                "foods": n,
+                "k": k,
+                "workers": workers,
+                "brute_force": sum(math.comb(n, i) for i in range(1, k + 1)),
+                "nodes": snap["nodes"],
+                "pruned_subtrees": snap["pruned"],
+                "snapshots": snaps,
+                "first_result_s": first,
+                "total_s": time.perf_counter() - t0,
+                "done": snap["done"],
+                "best_rnorm": snap["plans"][0]["rnorm"] if snap["plans"] else np.nan,
+            })
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 2, 3])
+    ap.add_argument("--budget", type=float, default=30.0)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1])
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.k, args.budget, args.workers)).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+if __name__ == "__main__":
+    main()
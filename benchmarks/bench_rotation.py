@@ -0,0 +1,59 @@
+# --- 輪替菜單：整個週期重解 vs 只重解改到的那幾天 ---
+# 執行：python -m benchmarks.bench_rotation [--days 7 14 28]
+# 食材池與目標是一組可行的成貓配方（4 kg 結紮成貓、不吃乾糧），兩份菜單交替排程。
+#   full：新的 Planner 從頭解整個週期
+#   edit one day：把最後一天換成另一份菜單，只有那一天是變數
+#   swap ingredient：換掉菜單 B 的一種食材，排到 B 的天都要重解
+#   unchanged：輸入沒變，直接沿用
+# 時間只算 update() 本身（不含建 Planner 與前一次的求解），取 REPEAT 次的中位數；
+# mode 為實際走的路徑（incremental 解不出來時會退回 full）。
+import argparse
+import statistics
+
+import pandas as pd
+
+import fda_matrix
+import rotation
+
+BASE = ["豬小里肌", "去骨鴨掌", "山豬肉片", "白對蝦平均值", "白對蝦(小)(2022年取樣)", "正櫻蝦乾", "環文蛤", "雪螺"]
+MENUS = {"A": BASE + ["雞肝(肉雞)"], "B": BASE + ["雞蛋平均值"], "C": BASE + ["雞肝(肉雞)", "雞蛋平均值"]}
+SWAPPED_B = [n for n in MENUS["B"] if n != "去骨鴨掌"] + ["紅肉鮭魚切片"]
+REPEAT = 5
+TARGET = [257.4, 19.2, 6.7, 8.0]  # 4 kg 結紮成貓、低活動量的 [kcal, 蛋白, 脂肪, 碳水]
+
+
+def run(day_counts) -> list:
+    m = fda_matrix.open_matrix()
+    pool = sorted({n for menu in MENUS.values() for n in menu} | set(SWAPPED_B))
+    rows = []
+    for days in day_counts:
+        pattern = rotation.default_schedule(2, days)
+        base = [MENUS[c] for c in pattern]
+        edited = base[:-1] + [MENUS["C"]]
+        swapped = [SWAPPED_B if c == "B" else MENUS[c] for c in pattern]
+
+        def planner():
+            p = rotation.Planner(m, pool, TARGET, TARGET[0], max_grams=150)
+            p.update(base)
+            return p
+
+        cases = [("full", None, base), ("edit one day", base, edited), ("swap ingredient", base, swapped),
+                 ("unchanged", base, base)]
+        for name, before, after in cases:
+            times = []
+            for _ in range(REPEAT):
+                p = rotation.Planner(m, pool, TARGET, TARGET[0], max_grams=150) if before is None else planner()
+                r = p.update(after)
+                times.append(r["seconds"])
+            rows.append({"days": days, "case": name, "mode": r["mode"], "resolved_days": len(r["resolved"]),
+                         "adequate": r["adequate"], "ms": statistics.median(times) * 1e3})
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--days", type=int, nargs="+", default=[7, 14, 28])
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.days)).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
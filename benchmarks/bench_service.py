@@ -0,0 +1,134 @@
+# --- HTTP 計算服務的負載測試：吞吐量與尾端延遲 ---
+# 執行：python -m benchmarks.bench_service [--requests 2000] [--concurrency 32] [--distinct 300] [--url http://host:port]
+# 沒給 --url 時在空閒連接埠啟動 service.py（配方快取放暫存資料夾，從冷快取開始），跑兩輪：
+#   cold：第一次遇到的輸入要求解，熱門輸入同時到達時會被合併（coalesced）
+#   warm：同一批流量再跑一次，幾乎都是快取命中
+# 每個並行客戶端一條 keep-alive 連線，送 POST /plan；流量與 bench_plan_cache 相同（Zipf 分布）。
+# cache_hits / coalesced / solved 取自服務的 /stats，是從服務啟動起的累計值。
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_plan_cache import workload
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _get(url: str) -> dict:
+    with urllib.request.urlopen(url, timeout=5) as r:
+        return json.loads(r.read())
+
+def start_service(cache_path: str, workers: int = None) -> tuple:
+    """啟動 service.py，等到 /health 回應；回傳 (行程, 網址)"""
+    port = _free_port()
+    cmd = [sys.executable, os.path.join(ROOT, "service.py"), "--port", str(port), "--cache", cache_path]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            _get(url + "/health")
+            return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("service.py 沒有在 60 秒內啟動")
+
+async def _client(host: str, port: int, queue: asyncio.Queue, latencies: list, errors: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            writer.write((f"POST /plan HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def load(url: str, bodies: list, concurrency: int) -> dict:
+    host, port = url.split("//", 1)[1].rsplit(":", 1)
+    queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+    latencies, errors = [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(host, int(port), queue, latencies, errors) for _ in range(concurrency)))
+    seconds = time.perf_counter() - t0
+    ms = np.array(latencies) * 1e3
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": seconds,
+        "req_per_s": len(latencies) / seconds,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "mean_ms": statistics.fmean(ms),
+    }
+
+def run(requests: int, concurrency: int, distinct: int, url: str = None, workers: int = None) -> list:
+    bodies = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in workload(requests, distinct)]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = None
+        if url is None:
+            proc, url = start_service(os.path.join(tmp, "plans.sqlite"), workers)
+        try:
+            for phase in ("cold", "warm"):
+                row = {"phase": phase, "concurrency": concurrency}
+                row.update(asyncio.run(load(url, bodies, concurrency)))
+                row.update({k: v for k, v in _get(url + "/stats")["service"].items()
+                            if k in ("cache_hits", "coalesced", "solved")})
+                rows.append(row)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--requests", type=int, default=2_000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--distinct", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--url", default=None, help="改測已在執行的服務（例如 http://127.0.0.1:8765）")
+    args = ap.parse_args()
+    rows = run(args.requests, args.concurrency, args.distinct, args.url, args.workers)
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# --- 多人同時使用：真的 streamlit run 伺服器 + 同時連線的 websocket client ---
+# 執行：python -m benchmarks.bench_sessions [--clients 1 2 4 8] [--sessions 2] [--think-ms 0] [--budget-p95-ms 1500]
+# 每個等級啟動一個新的 `streamlit run app.py`（無頭、暫存的配方快取，每個等級從冷快取開始），
+# 以 clients 個 websocket client 同時連上 /_stcore/stream，照瀏覽器的方式送 BackMsg：
+#   每一步帶上目前所有元件的值（WidgetStates），改的元件在 fragment 內時只重跑那個 fragment（同前端）；
+#   一直收 ForwardMsg 到 script_finished（st.rerun 造成的提早結束不算，等整頁重跑完）才算這一步完成。
+# 操作流程同真實使用：選乾糧 → 輸入克數 → 選鮮食 → 固定克數 → 備餐天數；每個 session 的體重 / 食材 / 克數由種子決定。
+# 每個 client 連續跑 sessions 個 session（每個 session 一條新連線）；量測前先跑一個暖身 session。
+# 回報：每步延遲（送出到 script_finished）的 p50 / p95 / p99、相對單一 client 的倍數（> 1 代表 rerun 開始排隊）、
+# 每秒 rerun 數、伺服器行程的 CPU（user + sys ÷ 牆鐘時間，單位：核）與峰值 RSS（讀 /proc，只支援 Linux）。
+# 延遲含 client 端解析 protobuf 的時間（client 與伺服器在同一台機器上，也會搶 CPU）。
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import pandas as pd
+
+import engine
+import food_db
+import plan_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_P95_MS = 1500.0
+STARTUP_TIMEOUT = 120.0
+STEP_TIMEOUT = 300.0
+FRESH = ["雞胸", "雞蛋", "雞肝", "雞心", "雞腿", "黃肉地瓜", "山藥"]
+
+
+# --- 伺服器 ---
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(cache_path: str) -> tuple:
+    """啟動 streamlit run app.py → (Popen, port)；health 回 200 才回傳"""
+    port = _free_port()
+    env = dict(os.environ, **{plan_cache.ENV_VAR: cache_path})
+    proc = subprocess.Popen([sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+                             "--server.port", str(port), "--server.address", "127.0.0.1",
+                             "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"streamlit run 結束了（結束碼 {proc.returncode}）")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit run 啟動逾時")
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime + stime
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+# --- websocket client（模擬瀏覽器分頁） ---
+class Client:
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = {}  # key（沒有 key 時為標籤）-> (元件種類, 元件 id, fragment id, 是否整數)
+        self.states = {}   # 元件 id -> WidgetState
+
+    async def rerun(self, fragment_id: str = "") -> list:
+        """送出一次 rerun，收到整頁（或 fragment）跑完為止；回傳頁面上的例外訊息"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        await self.ws.send(msg.SerializeToString())
+        errors = []
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await asyncio.wait_for(self.ws.recv(), STEP_TIMEOUT))
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                name = element.WhichOneof("type")
+                if name == "exception":
+                    errors.append(element.exception.message)
+                    continue
+                widget = getattr(element, name)
+                wid = getattr(widget, "id", "")
+                if wid.startswith("$$ID-"):
+                    key = wid.rsplit("-", 1)[1]
+                    is_int = name == "number_input" and widget.data_type == widget.INT
+                    self.widgets[getattr(widget, "label", key) if key == "None" else key] = (
+                        name, wid, fwd.delta.fragment_id, is_int)
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return errors
+
+    async def set(self, key: str, value) -> list:
+        """改一個元件的值（key 或標籤）後 rerun"""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        name, wid, fragment_id, is_int = self.widgets[key]
+        state = WidgetState(id=wid)
+        if name == "multiselect":
+            state.string_array_value.data.extend(value)
+        elif is_int:
+            state.int_value = int(value)
+        else:
+            state.double_value = float(value)
+        self.states[wid] = state
+        return await self.rerun(fragment_id)
+
+
+def steps(seed: int, dry_names: list) -> list:
+    rng = random.Random(seed)
+    dry = rng.sample(dry_names, 2)
+    fresh = rng.sample(FRESH, 4)
+    fixed = rng.sample(FRESH, 4)
+    return [
+        ("first_run", lambda c: c.rerun()),
+        ("weight", lambda c: c.set("體重 (kg)", round(rng.uniform(2.5, 6.5), 1))),
+        ("dry_select", lambda c: c.set("選擇乾糧（可複選）", dry)),
+        ("dry_grams", lambda c: c.set(f"dry_{dry[0]}", rng.randint(5, 30))),
+        ("fresh_select", lambda c: c.set("選擇鮮食食材（可複選）", fresh)),
+        ("fixed_select", lambda c: c.set("fixed_sel", fixed)),
+        ("fixed_grams", lambda c: c.set(f"fixed_{fixed[0]}", rng.randint(20, 60))),
+        ("prep_days", lambda c: c.set("prep_days", rng.randint(2, 14))),
+    ]
+
+async def session(port: int, seed: int, dry_names: list, think: float, out: list, errors: list) -> None:
+    import websockets
+
+    rng = random.Random(seed)
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                                  max_size=None) as ws:
+        client = Client(ws)
+        for name, action in steps(seed, dry_names):
+            if think and name != "first_run":
+                await asyncio.sleep(rng.expovariate(1 / think))
+            t = time.perf_counter()
+            try:
+                page_errors = await action(client)
+            except (KeyError, asyncio.TimeoutError) as e:  # 找不到元件、逾時
+                errors.append(f"{name}: {type(e).__name__}: {e}")
+                return
+            out.append((name, time.perf_counter() - t))
+            if page_errors:
+                errors.append(f"{name}: {page_errors[0]}")
+                return
+
+async def _clients(pid: int, port: int, clients: int, sessions: int, think: float, dry_names: list) -> dict:
+    async def worker(first: int, out: list, errors: list) -> None:
+        for s in range(sessions):
+            await session(port, first + s, dry_names, think, out, errors)
+
+    await session(port, -1, dry_names, 0.0, [], [])  # 暖身（匯入與載入食物表不算在內）
+    out, errors = [], []
+    cpu0, t0 = cpu_seconds(pid), time.perf_counter()
+    await asyncio.gather(*(worker(i * sessions, out, errors) for i in range(clients)))
+    wall = time.perf_counter() - t0
+    return {"latencies": out, "errors": errors, "seconds": wall, "cpu": (cpu_seconds(pid) - cpu0) / wall,
+            "peak_rss_mb": peak_rss_mb(pid)}
+
+
+def level(clients: int, sessions: int, think_ms: float = 0.0) -> dict:
+    """新的伺服器上跑一個等級，回傳延遲、錯誤與伺服器的 CPU / RSS"""
+    dry_names = engine.dry_candidates(engine.load_foods(food_db.DRY_PATH, food_db.FRESH_PATH))["食物名稱"].tolist()
+    with tempfile.TemporaryDirectory() as tmp:
+        proc, port = start_server(os.path.join(tmp, "plans.sqlite"))
+        try:
+            return asyncio.run(_clients(proc.pid, port, clients, sessions, think_ms / 1e3, dry_names))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+def run(client_levels, sessions: int = 2, think_ms: float = 0.0) -> tuple:
+    """回傳 (每個等級一列的總表, 每個等級 × 步驟的延遲表)"""
+    rows, steps_ = [], []
+    for c in client_levels:
+        r = level(c, sessions, think_ms)
+        if r["errors"]:
+            raise RuntimeError(f"clients={c} 時 app.py 出錯：{r['errors'][0]}")
+        df = pd.DataFrame(r["latencies"], columns=["step", "seconds"])
+        ms = df["seconds"] * 1e3
+        rows.append({
+            "clients": c,
+            "sessions": c * sessions,
+            "reruns": len(ms),
+            "reruns_per_s": len(ms) / r["seconds"],
+            "p50_ms": ms.quantile(0.50),
+            "p95_ms": ms.quantile(0.95),
+            "p99_ms": ms.quantile(0.99),
+            "max_ms": ms.max(),
+            "cpu_cores": r["cpu"],
+            "peak_rss_mb": r["peak_rss_mb"],
+        })
+        for step, ts in df.groupby("step", sort=False)["seconds"]:
+            steps_.append({"clients": c, "step": step, "p50_ms": ts.quantile(0.50) * 1e3,
+                           "p95_ms": ts.quantile(0.95) * 1e3})
+    base = rows[0]["p50_ms"] if rows and rows[0]["clients"] == 1 else None
+    for row in rows:
+        row["slowdown"] = row["p50_ms"] / base if base else float("nan")  # 相對單一 client 的 p50
+    return rows, steps_
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8], help="同時連線的 client 數")
+    ap.add_argument("--sessions", type=int, default=2, help="每個 client 連續跑幾個 session")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="每步之間的平均思考時間（指數分布；0 = 壓力測試）")
+    ap.add_argument("--budget-p95-ms", type=float, default=BUDGET_P95_MS, help="rerun 延遲 p95 的上限")
+    ap.add_argument("--fail-over-budget", action="store_true", help="任一等級超過上限時以結束碼 1 離開")
+    args = ap.parse_args()
+
+    rows, steps_ = run(args.clients, args.sessions, args.think_ms)
+    fmt = lambda v: f"{v:.1f}"
+    print(pd.DataFrame(rows).to_string(index=False, float_format=fmt))
+    print()
+    print(pd.DataFrame(steps_).pivot(index="step", columns="clients", values="p95_ms")
+          .reindex(list(dict.fromkeys(s["step"] for s in steps_)))
+          .to_string(float_format=fmt))
+    within = [r["clients"] for r in rows if r["p95_ms"] <= args.budget_p95_ms]
+    print(f"\np95 ≤ {args.budget_p95_ms:.0f} ms 的最大同時 client 數：{max(within) if within else '無'}")
+    if args.fail_over_budget and len(within) < len(rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
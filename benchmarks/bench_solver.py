@@ -0,0 +1,96 @@
+# --- 反距離權重 vs NNLS：實際食材上的殘差與求解時間 ---
+# 執行：python -m benchmarks.bench_solver [--cats 2000]
+# 以 data/ 下的乾糧 / 鮮食表隨機組出貓咪與食材組合，比較各方法離 蛋白 / 脂肪 / 碳水 目標多遠。
+# nnls_warm：目標改 2% 後以原本的解熱啟動，warm_hits 為沿用 passive set 就通過 KKT 的比例。
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import fda_matrix
+import food_db
+import food_index
+import solver
+
+DRY_PATH = "data/food_data_dry_1115.csv"
+FRESH_PATH = "data/food_data_fresh_1115.csv"
+
+
+def random_cats(k: int, foods, rng) -> np.ndarray:
+    """隨機的貓咪 + 乾糧 → (k, 4) 鮮食需補的 [kcal, 蛋白, 脂肪, 碳水]"""
+    dry_names = engine.dry_candidates(foods.foods)["食物名稱"].tolist()
+    grams = pd.DataFrame(rng.uniform(0, 25, (k, 2)), columns=rng.choice(dry_names, 2, replace=False))
+    out = engine.batch_requirements(rng.uniform(2, 8, k), rng.choice(engine.AGE_GROUPS, k),
+                                    rng.choice(engine.ACTIVITY_LEVELS, k), grams, foods)
+    return out[["remain_kcal", "remain_protein_g", "remain_fat_g", "remain_carb_g"]].to_numpy()
+
+def summarize(name: str, n_foods: int, matrix, grams, targets, seconds) -> dict:
+    resid = grams @ np.nan_to_num(matrix) - targets
+    return {
+        "method": name,
+        "foods": n_foods,
+        # NNLS 的目標函數：加權的相對誤差（kcal 列權重最大）
+        "weighted_rnorm": np.linalg.norm(resid * solver.row_scale(targets), axis=1).mean(),
+        "kcal_abs": np.abs(resid[:, 0]).mean(),
+        "protein_abs": np.abs(resid[:, 1]).mean(),
+        "fat_abs": np.abs(resid[:, 2]).mean(),
+        "carb_abs": np.abs(resid[:, 3]).mean(),
+        "us_per_cat": seconds / len(targets) * 1e6,
+    }
+
+def fda_macros() -> tuple:
+    """衛福部資料庫的肉 / 魚 / 蛋類 → (名稱, 每 1g 的 kcal / 蛋白 / 脂肪 / 碳水)"""
+    m = fda_matrix.open_matrix()
+    keep = np.isin(m.foods["category"], ["肉類", "魚貝類", "蛋類"])
+    macros = np.nan_to_num(np.asarray(m.columns(["熱量(kcal)", "粗蛋白(g)", "粗脂肪(g)", "總碳水化合物(g)"]))) / 100.0
+    return np.array(m.foods["name"])[keep].tolist(), macros[keep].astype(float)
+
+def run(cats: int, food_counts=(2, 4, 8, 64, 256), seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    foods = food_index.index_for(food_db.load_food_db(DRY_PATH, FRESH_PATH))
+    fresh_names = engine.fresh_candidates(foods.foods)["食物名稱"].tolist()
+    fda_names, fda_m = fda_macros()
+    targets = random_cats(cats, foods, rng)
+    rows = []
+    for n in food_counts:
+        if n <= len(fresh_names):
+            names = list(rng.choice(fresh_names, n, replace=False))
+            m = foods.matrix(names)
+        else:
+            # 自製鮮食表只有 20 種，更大的候選集改用衛福部資料庫
+            pick = rng.choice(len(fda_names), n, replace=False)
+            names, m = [fda_names[i] for i in pick], fda_m[pick]
+
+        t = time.perf_counter()
+        heur = engine.allocate_auto_ratio(m, *targets.T)
+        rows.append(summarize("inverse_distance", len(names), m, heur, targets, time.perf_counter() - t))
+
+        t = time.perf_counter()
+        single = np.array([solver.solve(m, tgt)["grams"] for tgt in targets])
+        rows.append(summarize("nnls", len(names), m, single, targets, time.perf_counter() - t))
+
+        # 熱啟動：同一隻貓體重改一點（目標 ×1.02），以改之前的解為初值
+        before = solver.warm_stats()
+        t = time.perf_counter()
+        warm = np.array([solver.solve(m, tgt * 1.02, x0=x0)["grams"] for tgt, x0 in zip(targets, single)])
+        row = summarize("nnls_warm", len(names), m, warm, targets * 1.02, time.perf_counter() - t)
+        after = solver.warm_stats()
+        row["warm_hits"] = (after["hits"] - before["hits"]) / max(after["hits"] + after["misses"]
+                                                                 - before["hits"] - before["misses"], 1)
+        rows.append(row)
+
+        t = time.perf_counter()
+        batch = solver.solve_batch(m, targets)["grams"]
+        rows.append(summarize("nnls_batch", len(names), m, batch, targets, time.perf_counter() - t))
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--cats", type=int, default=500)
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.cats)).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
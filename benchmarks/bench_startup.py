@@ -0,0 +1,87 @@
+# --- 冷啟動：匯入時間與第一次繪製 ---
+# 執行：python -m benchmarks.bench_startup [--repeat 5] [--budget-ms 2500] [--fail-over-budget]
+# 每次量測都開新的 Python 行程（模組快取是空的，跟自動擴展新開的容器 / worker 一樣）：
+#   import/<模組>：python -X importtime 的累計時間（這個模組連同它拉進來的所有模組）
+#   startup/framework：匯入 streamlit 與 AppTest
+#   startup/first_render：AppTest 第一次執行 app.py（app 的匯入、載入食物表、繪製）
+#   startup/process_to_first_render：從行程啟動到第一次繪製完成，與 --budget-ms 比較
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["numpy", "pandas", "streamlit", "scipy.optimize",
+           "engine", "food_db", "food_index", "solver", "aafco", "diet_lp", "recipe_search", "fda_matrix", "profiling"]
+BUDGET_MS = 2500.0
+
+_FIRST_RENDER = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120).run()
+t2 = time.perf_counter()
+import food_db
+print(json.dumps({"framework": t1 - t0, "first_render": t2 - t1, "error": bool(at.exception),
+                  "scipy_loaded": "scipy" in sys.modules, "food_db": food_db.cache_stats()}))
+"""
+
+
+def import_ms(module: str) -> float:
+    """新行程內 import module 的累計毫秒數（-X importtime 的 cumulative 欄）"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    for line in reversed(proc.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e3
+    raise RuntimeError(f"importtime 輸出中找不到 {module}")
+
+def first_render() -> dict:
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _FIRST_RENDER], cwd=ROOT, capture_output=True, text=True, check=True)
+    total = time.perf_counter() - t0
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    if out["error"]:
+        raise RuntimeError("app.py 第一次執行就出錯")
+    return {**out, "process_to_first_render": total}
+
+def run(repeat: int = 5, modules=MODULES) -> tuple:
+    """回傳 (與 benchmarks.suite 相同格式的結果 dict, 最後一次首頁繪製的細節)"""
+    results = {}
+    for module in modules:
+        ts = [import_ms(module) / 1e3 for _ in range(repeat)]
+        results[f"import/{module}"] = {"seconds": statistics.median(ts), "min": min(ts), "repeat": repeat}
+    renders = [first_render() for _ in range(repeat)]
+    for name in ["framework", "first_render", "process_to_first_render"]:
+        ts = [r[name] for r in renders]
+        results[f"startup/{name}"] = {"seconds": statistics.median(ts), "min": min(ts), "repeat": repeat}
+    return results, renders[-1]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="行程啟動到第一次繪製完成的上限")
+    ap.add_argument("--fail-over-budget", action="store_true", help="超過上限時以結束碼 1 離開")
+    args = ap.parse_args()
+
+    results, last = run(args.repeat)
+    table = pd.DataFrame([{"benchmark": k, "median_ms": v["seconds"] * 1e3, "min_ms": v["min"] * 1e3}
+                          for k, v in results.items()])
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    print(f"\n第一次繪製時已載入 scipy：{last['scipy_loaded']}；食物表快取：{last['food_db']}")
+
+    total_ms = results["startup/process_to_first_render"]["seconds"] * 1e3
+    over = total_ms > args.budget_ms
+    print(f"冷啟動 {total_ms:.0f} ms / 上限 {args.budget_ms:.0f} ms：{'超過' if over else '符合'}")
+    if over and args.fail_over_budget:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
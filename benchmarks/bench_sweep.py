@@ -0,0 +1,56 @@
+# --- 情境掃描：格網大小 vs 計算時間 ---
+# 執行：python -m benchmarks.bench_sweep [--points 1000 10000 100000]
+# 每個格點 = 體重 × 6 個年齡層 × 3 個活動量；loop 為逐點呼叫 energy_requirements + solver.solve 的對照（只量到 1 萬點）。
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import engine
+import food_db
+import food_index
+import solver
+import sweep
+from benchmarks.suite import measure
+
+FRESH = ["雞胸", "雞蛋", "雞肝", "黃肉地瓜"]
+LOOP_MAX_POINTS = 10_000
+
+
+def loop(g: pd.DataFrame, foods, dry_grams: dict, fresh_names) -> list:
+    dry = engine.dry_deduction(foods, dry_grams)
+    matrix = foods.matrix(fresh_names)
+    out = []
+    for w, a, c in g.itertuples(index=False):
+        req = engine.energy_requirements(w, a, c)
+        target = solver.remaining_target(
+            [req["mer"], req["recommend_protein_g"], req["recommend_fat_g"], req["target_carb_g"]],
+            [dry["kcal"], dry["protein_g"], dry["fat_g"], dry["carb_g"]],
+        )
+        out.append(solver.solve(matrix, target)["grams"])
+    return out
+
+def run(points_list) -> list:
+    foods = food_index.index_for(food_db.load_food_db(food_db.DRY_PATH, food_db.FRESH_PATH))
+    dry_grams = {engine.dry_candidates(foods.foods)["食物名稱"].iloc[0]: 20.0}
+    combos = len(engine.AGE_GROUPS) * len(engine.ACTIVITY_LEVELS)
+    rows = []
+    for points in points_list:
+        weights = np.linspace(2.0, 8.0, max(points // combos, 1))
+        g = sweep.grid(weights)
+        for fresh in [[], FRESH]:
+            t = measure(lambda: sweep.run(weights, foods=foods, dry_grams=dry_grams, fresh_names=fresh))
+            row = {"points": len(g), "fresh_foods": len(fresh), "sweep_ms": t["seconds"] * 1e3, "loop_ms": np.nan}
+            if fresh and len(g) <= LOOP_MAX_POINTS:
+                row["loop_ms"] = measure(lambda: loop(g, foods, dry_grams, fresh), min_repeat=1)["seconds"] * 1e3
+            rows.append(row)
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--points", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.points)).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# --- 成長 / 減重預測：整批向量化 vs 逐隻逐週計算 ---
+# 執行：python -m benchmarks.bench_trajectory [--cats 1 100 1000 10000] [--weeks 52]
+# 名冊為隨機的幼貓（月齡、預估成貓體重）與減重貓（目標體重），鮮食同 bench_plan_cache 的第一組。
+#   vectorized：trajectory.project + trajectory.plans（不重複的體重 / 年齡層只用 solve_batch 解一次）
+#   loop：每隻貓每一週各算一次 MER 並以 solver.solve 求克數（逐步模擬的寫法），只跑到 LOOP_MAX_CATS 隻
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import food_db
+import food_store
+import solver
+import trajectory
+from benchmarks.bench_plan_cache import FRESH_SETS
+from benchmarks.suite import measure
+
+LOOP_MAX_CATS = 100
+
+
+def roster(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    kitten = rng.random(n) < 0.5
+    age = rng.uniform(1.0, 5.5, n)
+    adult = rng.uniform(3.5, 6.0, n)
+    weights = np.where(kitten, np.round(adult * np.interp(age, *trajectory.GROWTH_CURVE), 1),
+                       rng.uniform(5.0, 8.0, n).round(1))
+    return {
+        "weights": weights,
+        "age_groups": np.where(kitten, np.where(age < 4, "幼貓 0-4月", "幼貓 4-6月"), "減重").astype(object),
+        "activities": rng.choice(engine.ACTIVITY_LEVELS, n).astype(object),
+        "age_months": np.where(kitten, age, np.nan),
+        "adult_weights": adult,
+        "target_weights": np.where(kitten, np.nan, (weights * rng.uniform(0.8, 0.9, n)).round(1)),
+    }
+
+def loop(foods, cats: dict, projection: dict, fresh: list) -> None:
+    matrix = engine.food_matrix(foods, fresh)
+    w, groups = projection["weights"], projection["age_groups"]
+    for i in range(w.shape[0]):
+        for t in range(w.shape[1]):
+            req = engine.energy_requirements(w[i, t], groups[i, t], cats["activities"][i])
+            target = [float(req["mer"]), float(req["recommend_protein_g"]), float(req["recommend_fat_g"]),
+                      float(req["target_carb_g"])]
+            solver.solve(matrix, target)
+
+def run(cat_counts, weeks: int) -> list:
+    foods = food_store.load(food_db.DRY_PATH, food_db.FRESH_PATH)
+    fresh = FRESH_SETS[0]
+    rows = []
+    for n in cat_counts:
+        cats = roster(n)
+        args = {k: v for k, v in cats.items() if k not in ("weights", "age_groups", "activities")}
+
+        def vectorized():
+            p = trajectory.project(cats["weights"], cats["age_groups"], cats["activities"], weeks=weeks, **args)
+            return p, trajectory.plans(p, foods, fresh_names=fresh)
+
+        projection, result = vectorized()
+        steps = n * (weeks + 1)
+        ms = measure(vectorized, min_time=0.5, max_repeat=10)["seconds"] * 1e3
+        rows.append({"cats": n, "case": "vectorized", "steps": steps, "unique_plans": result["unique"],
+                     "ms": ms, "us_per_step": ms * 1e3 / steps})
+        if n <= LOOP_MAX_CATS:
+            t0 = time.perf_counter()
+            loop(foods, cats, projection, fresh)
+            ms = (time.perf_counter() - t0) * 1e3
+            rows.append({"cats": n, "case": "loop", "steps": steps, "unique_plans": steps,
+                         "ms": ms, "us_per_step": ms * 1e3 / steps})
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--cats", type=int, nargs="+", default=[1, 100, 1_000, 10_000])
+    ap.add_argument("--weeks", type=int, default=52)
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.cats, args.weeks)).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# --- units.py vs 舊版逐格解析：結果比對 + 速度 ---
+# 執行：python -m benchmarks.bench_units [--sizes 20 2500 25000]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import units
+from benchmarks import legacy
+
+DRY_SAMPLES = {
+    "水分": ["8.10%", "13.1%", "10%", "5.6 %", None],
+    "蛋白質": ["34.40%", "38%", "42.0%", "３３．５％"],
+    "脂肪": ["21.40%", "9.1%", "20%", "16.9%"],
+    "碳水": ["36.10%", "39.7%", "30%", "", "-"],
+    "熱量": ["4025cal/1kg", "3179cal/1kg", "3599 kcal / kg", "380kcal/100g",
+             "360kcal/100公克", "4070", "35", "４０７０cal／1kg", None],
+}
+FRESH_SAMPLES = {
+    "水分": ["77g/100g", "75.9g/100g", "74.8", 70],
+    "蛋白質": ["22.4g/100g", "12.7g/100g", "9.5", 21.4],
+    "脂肪": ["1.2g/100g", "12g/100g", "0.3", 0.5, "-"],
+    "碳水": ["0g/100g", "1.6g/100g", "0", None],
+    "熱量": ["104cal/100g", "135cal/100g", "158g/100g", "109", 96, None],
+}
+
+
+def synthetic(samples: dict, n: int, seed: int = 0) -> pd.DataFrame:
+    """由樣本字串隨機組出 n 列的原始資料表"""
+    rng = np.random.default_rng(seed)
+    cols = {c: pd.Series(np.array(v, dtype=object)[rng.integers(0, len(v), n)], dtype=object)
+            for c, v in samples.items()}
+    df = pd.DataFrame({"食物名稱": [f"食物{i}" for i in range(n)], "類型": None, **cols})
+    return df
+
+def timed(fn, *args, repeat: int = 3) -> tuple:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+def _comparable(df: pd.DataFrame) -> pd.DataFrame:
+    # 舊版不認得全形句點（３３．５％ → 33），新版會正規化成 33.5；比對時先排除這類樣本
+    return df.astype({c: float for c in ["水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]})
+
+def run(sizes) -> list:
+    results = []
+    for kind, samples, old, new in [
+        ("dry", DRY_SAMPLES, legacy.clean_dry, engine.clean_dry),
+        ("fresh", FRESH_SAMPLES, legacy.clean_fresh, engine.clean_fresh),
+    ]:
+        for n in sizes:
+            raw = synthetic(samples, n)
+            t_old, df_old = timed(old, raw)
+            t_new, df_new = timed(new, raw)
+            full_width = raw.apply(lambda c: c.astype(str).str.contains("．|／|[０-９]", regex=True)).any(axis=1)
+            pd.testing.assert_frame_equal(_comparable(df_old[~full_width]), _comparable(df_new[~full_width]),
+                                          check_dtype=False)
+            results.append({"kind": kind, "rows": n, "legacy_s": t_old, "vectorized_s": t_new,
+                            "speedup": t_old / t_new if t_new else float("inf")})
+    return results
+
+def run_fda(path: str = "data/food_data_from_internet.csv") -> dict:
+    """整份衛福部營養資料庫的數值欄：逐格 _num vs units.parse_frame"""
+    raw = pd.read_csv(path, skiprows=1, dtype=str)
+    cols = list(raw.columns[5:])
+    t_old, old = timed(lambda: raw[cols].apply(lambda c: c.apply(legacy._num)), repeat=1)
+    t_new, (new, failures) = timed(units.parse_frame, raw, cols, repeat=1)
+    np.testing.assert_allclose(old.to_numpy(dtype=float), new.to_numpy(dtype=float), equal_nan=True)
+    return {"kind": "fda", "rows": len(raw), "columns": len(cols), "legacy_s": t_old,
+            "vectorized_s": t_new, "speedup": t_old / t_new, "parse_failures": len(failures)}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20, 2500, 25000])
+    args = ap.parse_args()
+    rows = run(args.sizes) + [run_fda()]
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# --- 熱更新：逐列套用差異 vs 整份重建 FoodStore ---
+# 執行：python -m benchmarks.bench_watch [--sizes 2500 25000 100000]
+# 模擬鮮食檔改了 10 列數值（changed）、或多 10 列少 10 列（added_removed）；diff 為 food_watch.diff_rows 的時間。
+import argparse
+
+import pandas as pd
+
+import food_store
+import food_watch
+from benchmarks.bench_index import synthetic_foods
+from benchmarks.suite import measure
+
+EDITS = 10
+
+
+def run(sizes) -> list:
+    rows = []
+    for n in sizes:
+        foods = synthetic_foods(n)
+        dry, fresh = foods.iloc[: n // 2].reset_index(drop=True), foods.iloc[n // 2:].reset_index(drop=True)
+        store = food_store.FoodStore.from_parts({"dry": dry, "fresh": fresh})
+
+        changed = fresh.copy()
+        changed.loc[changed.index[:EDITS], "蛋白質"] += 1.0
+        added_removed = pd.concat([fresh.iloc[EDITS:], synthetic_foods(EDITS, seed=1).assign(
+            食物名稱=lambda d: "新" + d["食物名稱"])], ignore_index=True)
+
+        full = measure(lambda: food_store.FoodStore.from_parts({"dry": dry, "fresh": fresh}))
+        for name, part in [("changed", changed), ("added_removed", added_removed)]:
+            diff = food_watch.diff_rows(fresh, part)
+            t_diff = measure(lambda: food_watch.diff_rows(fresh, part))
+            t_apply = measure(lambda: store.apply("fresh", part, diff))
+            rows.append({
+                "foods": n,
+                "edit": name,
+                "diff_ms": t_diff["seconds"] * 1e3,
+                "apply_ms": t_apply["seconds"] * 1e3,
+                "full_rebuild_ms": full["seconds"] * 1e3,
+            })
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[2_500, 25_000, 100_000])
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.sizes)).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# --- Excel 版食物資料：每次解析 xlsx vs 讀欄式快照 ---
+# 執行：python -m benchmarks.bench_xlsx_snapshot [--sources data/food_data_0350.xlsx data/food_data_0930.xlsx]
+# 每個版本量測：
+#   pandas read_excel：一般寫法，整本活頁簿載入（非 read_only）後兩張工作表轉成 DataFrame
+#   stream convert：xlsx_snapshot.convert(force=True)，read_only 逐列讀入、正規化、寫出 Parquet 與 manifest
+#   stale check：來源雜湊比對 manifest（快照有效時每次載入前的成本）
+#   snapshot load：清掉行程內快取後讀清洗後的鮮食表 + 營養素表（Parquet）
+# 快照寫在暫存資料夾，不影響 .cache/xlsx_snapshot。
+import argparse
+import tempfile
+
+import pandas as pd
+
+import xlsx_snapshot
+from benchmarks.suite import measure
+
+
+def run(sources) -> list:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in sources:
+            rev = xlsx_snapshot.revision(path)
+
+            def load():
+                xlsx_snapshot.clear_cache()
+                xlsx_snapshot.load(rev, "fresh", out_dir=tmp)
+                xlsx_snapshot.load(rev, "fresh", nutrients=True, out_dir=tmp)
+
+            cases = [
+                ("pandas read_excel", lambda: pd.read_excel(path, sheet_name=None), 1),
+                ("stream convert", lambda: xlsx_snapshot.convert(path, tmp, force=True), 1),
+                ("stale check", lambda: xlsx_snapshot.is_stale(path, tmp), 3),
+                ("snapshot load", load, 3),
+            ]
+            for name, fn, min_repeat in cases:
+                r = measure(fn, min_time=0.5, max_repeat=20, min_repeat=min_repeat)
+                rows.append({"revision": rev, "case": name, "ms": r["seconds"] * 1e3, "repeat": r["repeat"]})
+    base = {r["revision"]: r["ms"] for r in rows if r["case"] == "pandas read_excel"}
+    for r in rows:
+        r["speedup"] = base[r["revision"]] / r["ms"]
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sources", nargs="+", default=xlsx_snapshot.SOURCES)
+    args = ap.parse_args()
+    print(pd.DataFrame(run(args.sources)).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
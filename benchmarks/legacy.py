@@ -0,0 +1,95 @@
+# --- 舊版（逐格 / 逐列）清洗函式 ---
+# 原封不動保留改寫成 units.py 之前的實作，只給 benchmark 做結果比對與速度對照用。
+import re
+
+import pandas as pd
+
+ATWATER = {"protein": 3.5, "fat": 8.5, "carb": 3.5}  # kcal/g
+
+def _num(s: str) -> float:
+    """從字串抓第一個數字（小數也可）；抓不到回 NaN"""
+    if pd.isna(s):
+        return float("nan")
+    m = re.search(r"[-+]?\d*\.?\d+", str(s))
+    return float(m.group()) if m else float("nan")
+
+def clean_dry(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """乾糧資料清洗：如 4025cal/1kg → kcal/g = 4.025"""
+    df = df_raw.copy()
+
+    # 先把營養素欄位轉成數字（8.1 或 8.1% 都可）
+    for c in ["水分", "蛋白質", "脂肪", "碳水"]:
+        df[c] = df[c].apply(_num)
+
+    kcal_per_g = []
+    for s in df.get("熱量", []):
+        val = _num(s)  # 例如 3179
+        if pd.isna(val):
+            kcal_per_g.append(float("nan"))
+            continue
+
+        # 正規化字串：轉小寫、全形→半形、去空白
+        txt = str(s).lower()
+        txt = txt.replace("／", "/")  # 全形斜線 → 半形
+        txt = txt.replace("（", "(").replace("）", ")")
+        txt_nospace = re.sub(r"\s+", "", txt)  # 移除所有空白
+
+        # 更寬鬆的判斷：只要看到 "kg" 就視為每公斤；看到 "100g" 視為每 100g
+        if "kg" in txt_nospace:
+            denom = 1000.0
+        elif "100g" in txt_nospace or "每100g" in txt_nospace or "100公克" in txt_nospace:
+            denom = 100.0
+        else:
+            # 後備判斷：若數值很大（>50），多半是每公斤；否則視為每 100g
+            denom = 1000.0 if val > 50 else 100.0
+
+        kcal_per_g.append(val / denom)
+
+    df["kcal_per_g"] = kcal_per_g
+
+    # 若缺熱量，用宏量估算
+    mask = df["kcal_per_g"].isna()
+    if mask.any():
+        kcal_100g = (
+            df.loc[mask, "蛋白質"] * ATWATER["protein"]
+            + df.loc[mask, "脂肪"] * ATWATER["fat"]
+            + df.loc[mask, "碳水"] * ATWATER["carb"]
+        )
+        df.loc[mask, "kcal_per_g"] = kcal_100g / 100.0
+
+    df["類型"] = df["類型"].fillna("乾糧")
+    return df[["食物名稱", "類型", "水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]]
+
+def clean_fresh(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """鮮食資料清洗：如 104cal/100g → kcal/g = 1.04"""
+    df = df_raw.copy()
+    for c in ["水分", "蛋白質", "脂肪", "碳水"]:
+        df[c] = df[c].apply(_num)
+
+    kcal_per_g = []
+    for s in df.get("熱量", []):
+        val = _num(s)
+        if pd.isna(val):
+            kcal_per_g.append(float("nan"))
+        else:
+            txt = str(s).lower()
+            if "/100g" in txt:
+                kcal_per_g.append(val / 100.0)
+            elif "/kg" in txt:
+                kcal_per_g.append(val / 1000.0)
+            else:
+                kcal_per_g.append(val / 100.0)
+    df["kcal_per_g"] = kcal_per_g
+
+    # 若缺熱量，用 Atwater 估算
+    mask = df["kcal_per_g"].isna()
+    if mask.any():
+        kcal_100g = (
+            df.loc[mask, "蛋白質"] * ATWATER["protein"]
+            + df.loc[mask, "脂肪"] * ATWATER["fat"]
+            + df.loc[mask, "碳水"] * ATWATER["carb"]
+        )
+        df.loc[mask, "kcal_per_g"] = kcal_100g / 100.0
+
+    df["類型"] = df["類型"].fillna("生食")
+    return df[["食物名稱", "類型", "水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]]
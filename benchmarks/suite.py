@@ -0,0 +1,210 @@
+# --- 效能基準套件：資料清洗、鮮食求解、整頁 rerun、冷啟動 ---
+# 執行：python -m benchmarks.suite [--quick] [--baseline PATH] [--save-baseline] [--fail-on-regression]
+# 結果寫成 JSON（.cache/benchmarks/<時間>.json 與 latest.json），並與基準檔逐項比較：
+# 中位數變慢超過 --threshold 倍（且差距大於 --min-delta-ms）即列為退步，部署前就能看到 rerun 延遲變差。
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import fda_matrix
+import solver
+import units
+from benchmarks import bench_startup, legacy
+from benchmarks.bench_units import DRY_SAMPLES, FRESH_SAMPLES, synthetic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUT_DIR = os.path.join(ROOT, ".cache", "benchmarks")
+BASELINE_PATH = os.path.join(OUT_DIR, "baseline.json")
+
+INGEST_ROWS = [20, 1_000, 10_000, 100_000]
+INGEST_ROWS_QUICK = [20, 2_500]
+LEGACY_MAX_ROWS = 25_000  # 舊版逐格解析在 10 萬列要跑好幾秒，只量到這裡當對照
+ALLOCATOR_FOODS = [2, 5, 10, 20, 50, 100, 200]
+ALLOCATOR_FOODS_QUICK = [2, 20, 200]
+STARTUP_MODULES_QUICK = ["streamlit", "engine", "solver", "diet_lp", "recipe_search"]
+TARGET = [250.0, 20.0, 8.0, 4.0]  # 約 4 kg 成貓、沒有乾糧時的 [kcal, 蛋白, 脂肪, 碳水]
+
+
+def measure(fn, min_time: float = 0.2, max_repeat: int = 50, min_repeat: int = 3) -> dict:
+    """重複執行到累計 min_time 秒（至少 min_repeat 次），回傳中位數 / 最小值"""
+    times = []
+    while len(times) < min_repeat or (sum(times) < min_time and len(times) < max_repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return {"seconds": statistics.median(times), "min": min(times), "repeat": len(times)}
+
+
+# --- 各組量測 ---
+def bench_ingest(rows) -> dict:
+    out = {}
+    for kind, samples, clean, old in [("dry", DRY_SAMPLES, engine.clean_dry, legacy.clean_dry),
+                                      ("fresh", FRESH_SAMPLES, engine.clean_fresh, legacy.clean_fresh)]:
+        for n in rows:
+            raw = synthetic(samples, n)
+            out[f"ingest/clean_{kind}/rows={n}"] = measure(lambda: clean(raw))
+            if n <= LEGACY_MAX_ROWS:
+                out[f"ingest/legacy_clean_{kind}/rows={n}"] = measure(lambda: old(raw), min_repeat=1)
+            if kind == "dry":
+                col = raw["蛋白質"]
+                out[f"ingest/parse_number/rows={n}"] = measure(lambda: units.parse_number(col))
+                if n <= LEGACY_MAX_ROWS:
+                    out[f"ingest/legacy_num/rows={n}"] = measure(lambda: col.apply(legacy._num), min_repeat=1)
+    return out
+
+def bench_allocators(food_counts, seed: int = 0) -> dict:
+    """衛福部肉 / 魚 / 蛋類中隨機挑 n 種食材，量一次配比的時間"""
+    m = fda_matrix.open_matrix()
+    keep = np.isin(m.foods["category"], ["肉類", "魚貝類", "蛋類"])
+    macros = np.nan_to_num(np.asarray(m.columns(["熱量(kcal)", "粗蛋白(g)", "粗脂肪(g)", "總碳水化合物(g)"]),
+                                      dtype=float))[keep] / 100.0
+    rng = np.random.default_rng(seed)
+    target = np.array(TARGET)
+    targets = target * rng.uniform(0.8, 1.2, (100, 4))
+    out = {}
+    for n in food_counts:
+        mat = macros[rng.choice(len(macros), n, replace=False)]
+        out[f"allocate/inverse_distance/foods={n}"] = measure(lambda: engine.allocate_auto_ratio(mat, *target))
+        out[f"allocate/fill/foods={n}"] = measure(lambda: engine.allocate_fill(mat, *target))
+        out[f"allocate/nnls/foods={n}"] = measure(lambda: solver.solve(mat, target))
+        # 100 隻貓一次求解，換算成每隻
+        batch = measure(lambda: solver.solve_batch(mat, targets))
+        out[f"allocate/nnls_batch_per_cat/foods={n}"] = {**batch, "seconds": batch["seconds"] / len(targets),
+                                                         "min": batch["min"] / len(targets)}
+    return out
+
+def bench_app_rerun(repeat: int = 5) -> dict:
+    """以 Streamlit 的 AppTest（無頭模式）腳本操作 app.py，量各步 rerun 的時間"""
+    from streamlit.testing.v1 import AppTest
+
+    dry_names = engine.dry_candidates(engine.load_foods("data/food_data_dry_1115.csv",
+                                                        "data/food_data_fresh_1115.csv"))["食物名稱"].tolist()[:2]
+    steps = [
+        ("first_run", lambda at: at),
+        ("weight", lambda at: at.number_input[0].set_value(4.3)),
+        ("dry_select", lambda at: at.multiselect[0].set_value(dry_names)),
+        ("dry_grams", lambda at: at.number_input(key=f"dry_{dry_names[0]}").set_value(20)),
+        ("fresh_select", lambda at: at.multiselect[1].set_value(["雞胸", "雞蛋", "雞肝", "黃肉地瓜"])),
+        ("fixed_select", lambda at: at.multiselect(key="fixed_sel").set_value(["雞胸", "雞蛋", "雞心", "山藥"])),
+        ("fixed_grams", lambda at: at.number_input(key="fixed_雞胸").set_value(50)),
+        ("prep_days", lambda at: at.number_input(key="prep_days").set_value(5)),
+    ]
+    times = {name: [] for name, _ in steps}
+    for _ in range(repeat):
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        for name, action in steps:
+            t = time.perf_counter()
+            at = action(at).run()
+            times[name].append(time.perf_counter() - t)
+            if at.exception:
+                raise RuntimeError(f"app.py 在 {name} 步驟出錯：{at.exception[0].value}")
+    return {f"app/rerun/{name}": {"seconds": statistics.median(ts), "min": min(ts), "repeat": len(ts)}
+            for name, ts in times.items()}
+
+
+# --- 結果與基準比較 ---
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def environment() -> dict:
+    import streamlit
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> pd.DataFrame:
+    rows = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = cur["seconds"] / base["seconds"] if base["seconds"] > 0 else np.inf
+        delta_ms = (cur["seconds"] - base["seconds"]) * 1e3
+        rows.append({
+            "benchmark": name,
+            "baseline_ms": base["seconds"] * 1e3,
+            "current_ms": cur["seconds"] * 1e3,
+            "ratio": ratio,
+            "regression": bool(ratio > threshold and delta_ms > min_delta_ms),
+        })
+    return pd.DataFrame(rows, columns=["benchmark", "baseline_ms", "current_ms", "ratio", "regression"])
+
+def run(quick: bool = False, groups=("ingest", "allocate", "app", "startup")) -> dict:
+    results = {}
+    if "ingest" in groups:
+        results.update(bench_ingest(INGEST_ROWS_QUICK if quick else INGEST_ROWS))
+    if "allocate" in groups:
+        results.update(bench_allocators(ALLOCATOR_FOODS_QUICK if quick else ALLOCATOR_FOODS))
+    if "app" in groups:
+        results.update(bench_app_rerun(repeat=2 if quick else 5))
+    if "startup" in groups:
+        modules = STARTUP_MODULES_QUICK if quick else bench_startup.MODULES
+        results.update(bench_startup.run(repeat=1 if quick else 5, modules=modules)[0])
+    return {"format_version": 1, "environment": environment(), "quick": quick, "results": results}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--quick", action="store_true", help="較小的資料量，適合每次提交前跑")
+    ap.add_argument("--groups", nargs="+", default=["ingest", "allocate", "app", "startup"],
+                    choices=["ingest", "allocate", "app", "startup"])
+    ap.add_argument("--out", default=None, help="結果 JSON 路徑（預設 .cache/benchmarks/<時間>.json）")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true", help="把這次的結果存成新的基準")
+    ap.add_argument("--threshold", type=float, default=1.25, help="中位數變慢超過幾倍算退步")
+    ap.add_argument("--min-delta-ms", type=float, default=1.0, help="差距小於此毫秒數不算退步（避免雜訊）")
+    ap.add_argument("--fail-on-regression", action="store_true", help="有退步時以結束碼 1 離開")
+    args = ap.parse_args()
+
+    os.chdir(ROOT)  # app.py 與資料路徑都是相對於專案根目錄
+    report = run(args.quick, args.groups)
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    out = args.out or os.path.join(OUT_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    shutil.copyfile(out, os.path.join(OUT_DIR, "latest.json"))
+    print(f"結果：{out}")
+
+    table = pd.DataFrame([{"benchmark": k, "median_ms": v["seconds"] * 1e3, "repeat": v["repeat"]}
+                          for k, v in report["results"].items()])
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    regressions = 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        diff = compare(report["results"], baseline["results"], args.threshold, args.min_delta_ms)
+        regressions = int(diff["regression"].sum())
+        print(f"\n與基準比較（{baseline['environment'].get('commit', '')} @ {baseline['environment']['timestamp']}）：")
+        print(diff.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        print(f"退步 {regressions} 項（門檻 {args.threshold:g} 倍、{args.min_delta_ms:g} ms）")
+    if args.save_baseline:
+        shutil.copyfile(out, args.baseline)
+        print(f"已存成基準：{args.baseline}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
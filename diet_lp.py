@@ -0,0 +1,195 @@
+# --- 微量營養素限制下的鮮食配方（線性規劃，稀疏矩陣） ---
+# solver.py 只看 kcal / 蛋白 / 脂肪 / 碳水；這裡同時要求礦物質、維生素、胺基酸等
+# 達到 AAFCO 每 1000 kcal 的最低量、不超過上限，鈣磷比落在範圍內。
+#
+# 變數：每種食材的克數 x ≥ 0（可設上限），以及 蛋白 / 脂肪 / 碳水 的正負偏差 s⁺, s⁻ ≥ 0
+# 目標：min Σ w_r (s⁺_r + s⁻_r) / 目標量_r        （L1 相對誤差，權重同 solver.DEFAULT_WEIGHTS）
+# 限制：kcal 列為等式（剛好補滿熱量）
+#       Σ n_ij x_j + 已提供_i ≥ 最低_i × E / 1000   （E = 全天熱量，含乾糧）
+#       Σ n_ij x_j + 已提供_i ≤ 上限_i × E / 1000
+#       鈣 − r_min × 磷 ≥ 0、r_max × 磷 − 鈣 ≥ 0
+# 營養素 × 食材的係數矩陣多數是 0（資料庫未檢測的欄位），以 scipy.sparse 建構後交給 HiGHS。
+# scipy 在函式內才匯入：只開頁面、沒用到這個模式的 session 不必付匯入成本。
+#
+# 無解時改解「彈性」版本：每條限制都加一個可違反的鬆弛變數，最小化相對違反量；
+# 被違反的限制與對偶值不為 0 的限制（卡住它們的那一方）就是互相衝突的一組。
+import time
+
+import numpy as np
+import pandas as pd
+
+import aafco
+import solver
+
+MACRO_COLUMNS = ["熱量(kcal)", "粗蛋白(g)", "粗脂肪(g)", "總碳水化合物(g)"]
+FEASIBILITY_TOL = 1e-7
+DUAL_TOL = 1e-9
+
+
+def candidates(m, keys=None, categories=None, names=None) -> tuple:
+    """由 fda_matrix.NutrientMatrix 挑出候選食材 → (名稱, (n, 4) 每 1g 宏量, (n, k) 每 1g 微量)
+
+    categories：只取這些食品分類（例如 ["肉類", "魚貝類"]）；names：指定食物名稱（依給定順序）
+    """
+    all_names = m.foods["name"]
+    if names is not None:
+        pos = {}
+        for i, name in enumerate(all_names):
+            pos.setdefault(name, i)
+        rows = np.array([pos[n] for n in names], dtype=np.intp)
+    elif categories is not None:
+        rows = np.flatnonzero(np.isin(m.foods["category"], list(categories)))
+    else:
+        rows = np.arange(len(all_names))
+    macro = np.nan_to_num(np.asarray(m.columns(MACRO_COLUMNS), dtype=float)[rows]) / 100.0
+    micro = aafco.per_gram(m, keys, rows)
+    return [all_names[i] for i in rows], macro, micro
+
+
+def micro_constraints(micro, keys, lo, hi, energy, fixed, ca_p) -> tuple:
+    """微量營養素的 A_ub x ≤ b_ub（稀疏）與每一列的說明"""
+    from scipy import sparse
+
+    coef = sparse.csr_matrix(micro.T)  # (k, n)
+    need_lo = lo * energy / 1000.0 - fixed
+    need_hi = hi * energy / 1000.0 - fixed
+    has_lo = ~np.isnan(lo)
+    has_hi = ~np.isnan(hi)
+
+    blocks = [-coef[has_lo], coef[has_hi]]
+    rhs = [-need_lo[has_lo], need_hi[has_hi]]
+    labels = [{"key": keys[i], "kind": "min", "bound": lo[i]} for i in np.flatnonzero(has_lo)]
+    labels += [{"key": keys[i], "kind": "max", "bound": hi[i]} for i in np.flatnonzero(has_hi)]
+
+    if ca_p is not None and "calcium" in keys and "phosphorus" in keys:
+        ca, p = keys.index("calcium"), keys.index("phosphorus")
+        r_min, r_max = ca_p
+        blocks += [r_min * coef[p] - coef[ca], coef[ca] - r_max * coef[p]]
+        rhs += [[fixed[ca] - r_min * fixed[p]], [r_max * fixed[p] - fixed[ca]]]
+        labels += [{"key": "ca_p", "kind": "min", "bound": r_min}, {"key": "ca_p", "kind": "max", "bound": r_max}]
+
+    A = sparse.vstack(blocks, format="csr")
+    b = np.concatenate([np.asarray(r, dtype=float) for r in rhs])
+    # 每列除以需求量（或最大係數）：g、mg、IU 的數量級差很多，縮放後鬆弛變數代表相對違反量
+    scale = 1.0 / np.maximum(np.maximum(np.abs(b), abs(A).max(axis=1).toarray().ravel()), 1e-12)
+    return sparse.diags(scale) @ A, b * scale, scale, labels
+
+def _label(row: dict) -> str:
+    if row["key"] == "ca_p":
+        return f"鈣磷比 {'≥' if row['kind'] == 'min' else '≤'} {row['bound']:g}"
+    if row["key"] in aafco.PROFILE:
+        name, unit = aafco.PROFILE[row["key"]][:2]
+        sign = "≥" if row["kind"] == "min" else "≤"
+        return f"{name} {sign} {row['bound']:g} {unit}/1000kcal"
+    return row["key"]
+
+
+def solve(macro: np.ndarray, micro: np.ndarray, target, keys=None, stage: str = "adult",
+          energy: float = None, fixed=None, max_grams=None, weights: dict = None,
+          ca_p: tuple = aafco.CA_P_RATIO) -> dict:
+    """macro 為 (n, 4) 每 1g 的 kcal / 蛋白 / 脂肪 / 碳水，micro 為 (n, k) 每 1g 的 keys 營養素
+
+    target：鮮食要補的 [kcal, 蛋白, 脂肪, 碳水]（已扣掉乾糧，見 solver.remaining_target）
+    energy：換算每 1000 kcal 標準用的熱量，預設為 target 的 kcal（只看鮮食這一份）；
+            要鮮食單獨撐起全天的標準時傳全天 MER
+    fixed：乾糧 / 固定食材已提供的 keys 營養素量（與標準表同單位）
+    max_grams：每種食材每日克數上限（純量或長度 n）
+    """
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    t0 = time.perf_counter()
+    keys, lo, hi = aafco.limits(stage, keys)
+    macro = np.nan_to_num(np.asarray(macro, dtype=float))
+    micro = np.nan_to_num(np.asarray(micro, dtype=float))
+    target = np.asarray(target, dtype=float)
+    n = len(macro)
+    energy = float(target[0] if energy is None else energy)
+    fixed = np.zeros(len(keys)) if fixed is None else np.asarray(fixed, dtype=float)
+
+    # 等式：kcal 列 + 三條宏量列（帶正負偏差）
+    eq_scale = 1.0 / np.maximum(target, solver.MIN_SCALE_TARGET)
+    dev = sparse.vstack([sparse.csr_matrix((1, 6)), sparse.hstack([-sparse.eye(3), sparse.eye(3)])])
+    A_eq = sparse.hstack([sparse.csr_matrix(macro.T * eq_scale[:, None]), sparse.diags(eq_scale) @ dev], format="csr")
+    b_eq = target * eq_scale
+
+    A_micro, b_ub, ub_scale, labels = micro_constraints(micro, keys, lo, hi, energy, fixed, ca_p)
+    A_ub = sparse.hstack([A_micro, sparse.csr_matrix((A_micro.shape[0], 6))], format="csr")
+
+    w = dict(solver.DEFAULT_WEIGHTS, **(weights or {}))
+    wvec = np.array([w["protein"], w["fat"], w["carb"]])
+    c = np.concatenate([np.zeros(n), wvec, wvec])
+    upper = np.broadcast_to(np.inf if max_grams is None else np.asarray(max_grams, dtype=float), (n,))
+    bounds = np.column_stack([np.zeros(n + 6), np.concatenate([upper, np.full(6, np.inf)])])
+
+    res = linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method="highs")
+
+    out = {"status": {0: "optimal", 2: "infeasible"}.get(res.status, "error"), "message": res.message,
+           "keys": keys, "conflicts": []}
+    grams = np.maximum(res.x[:n], 0.0) if res.status == 0 else np.zeros(n)
+    if res.status == 2:
+        out["conflicts"] = _conflicts(A_eq, b_eq, eq_scale, A_ub, b_ub, ub_scale, labels, bounds, n)
+    out.update(report(macro, micro, grams, target, keys, lo, hi, energy, fixed))
+    out["seconds"] = time.perf_counter() - t0
+    return out
+
+def _conflicts(A_eq, b_eq, eq_scale, A_ub, b_ub, ub_scale, labels, bounds, n) -> list:
+    """彈性版本：kcal 等式與每條 A_ub 列各加鬆弛變數，回傳互相衝突的限制"""
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    m_ub = A_ub.shape[0]
+    # kcal 列可以多或少（2 個變數），每條不等式可以違反（1 個變數）；宏量偏差不計成本。
+    # kcal 的權重同 solver.KCAL_WEIGHT：先假設熱量要補滿，再看哪些營養素做不到
+    kcal_dev = sparse.csr_matrix(([-1.0, 1.0], ([0, 0], [0, 1])), shape=(A_eq.shape[0], 2))
+    A_eq_e = sparse.hstack([A_eq, kcal_dev, sparse.csr_matrix((A_eq.shape[0], m_ub))], format="csr")
+    A_ub_e = sparse.hstack([A_ub, sparse.csr_matrix((m_ub, 2)), -sparse.eye(m_ub)], format="csr")
+    c = np.concatenate([np.zeros(A_eq.shape[1]), np.full(2, solver.KCAL_WEIGHT), np.ones(m_ub)])
+    bounds_e = np.vstack([bounds, np.column_stack([np.zeros(2 + m_ub), np.full(2 + m_ub, np.inf)])])
+    res = linprog(c, A_ub=A_ub_e, b_ub=b_ub, A_eq=A_eq_e, b_eq=b_eq, bounds=bounds_e, method="highs")
+    if res.status != 0:
+        return [{"限制": "無法判斷", "狀態": res.message, "差距": np.nan}]
+
+    # 差距：違反量換回原單位（營養素每日總量的 g / mg / IU；鈣磷比列為鈣的 g）
+    slack = res.x[A_eq.shape[1]:]
+    rows = []
+    kcal_gap = (slack[0] - slack[1]) / eq_scale[0]  # 實際 - 目標
+    if abs(kcal_gap) > FEASIBILITY_TOL / eq_scale[0]:
+        rows.append({"限制": "熱量剛好補滿", "狀態": "違反", "差距": kcal_gap})
+    elif abs(res.eqlin.marginals[0]) > DUAL_TOL:
+        rows.append({"限制": "熱量剛好補滿", "狀態": "卡住", "差距": 0.0})
+    for i, label in enumerate(labels):
+        gap = slack[2 + i] / ub_scale[i]
+        if slack[2 + i] > FEASIBILITY_TOL:
+            rows.append({"限制": _label(label), "狀態": "違反", "差距": gap})
+        elif abs(res.ineqlin.marginals[i]) > DUAL_TOL:
+            rows.append({"限制": _label(label), "狀態": "卡住", "差距": 0.0})
+    if np.isfinite(bounds[:n, 1]).any() and (np.abs(res.upper.marginals[:n]) > DUAL_TOL).any():
+        rows.append({"限制": "食材克數上限", "狀態": "卡住", "差距": 0.0})
+    return rows
+
+def report(macro, micro, grams, target, keys, lo, hi, energy, fixed) -> dict:
+    achieved = grams @ macro
+    amount = grams @ micro + fixed
+    per_1000 = amount / max(energy, 1e-9) * 1000.0
+    nutrients = pd.DataFrame({
+        "key": keys,
+        "營養素": [aafco.PROFILE[k][0] for k in keys],
+        "單位": [aafco.PROFILE[k][1] for k in keys],
+        "每日總量": amount,
+        "每1000kcal": per_1000,
+        "最低": lo,
+        "上限": hi,
+    })
+    nutrients["達標"] = ~(per_1000 < lo * (1 - 1e-6)) & ~(per_1000 > hi * (1 + 1e-6))
+    ca_p = np.nan
+    if "calcium" in keys and "phosphorus" in keys:
+        p = amount[keys.index("phosphorus")]
+        ca_p = amount[keys.index("calcium")] / p if p > 0 else np.nan
+    return {
+        "grams": grams,
+        "achieved": achieved,            # [kcal, 蛋白, 脂肪, 碳水]
+        "residual": achieved - target,
+        "nutrients": nutrients,
+        "ca_p": ca_p,
+    }
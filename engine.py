@@ -0,0 +1,244 @@
+# --- 貓咪營養計算引擎（不依賴 Streamlit） ---
+# app.py 只負責 UI；RER/MER、乾糧扣除與鮮食配比都在這裡，
+# 也可以直接 import 給批次作業（夜間處理診所問卷）使用。
+import numpy as np
+import pandas as pd
+
+import units
+
+ATWATER = {"protein": 3.5, "fat": 8.5, "carb": 3.5}  # kcal/g
+
+AGE_GROUPS = ["幼貓 0-4月", "幼貓 4-6月", "結紮成貓", "未結紮成貓", "老貓", "減重"]
+ACTIVITY_LEVELS = ["低", "中", "高"]
+
+PHYS_FACTOR_MAP = {
+    "幼貓 0-4月": 3.0,
+    "幼貓 4-6月": 2.5,
+    "未結紮成貓": 1.5,
+    "結紮成貓": 1.3,
+    "老貓": 1.0,
+    "減重": 0.8,
+}
+ACTIVITY_FACTOR_MAP = {"低": 1.0, "中": 1.2, "高": 1.4}
+
+# 每 1000 kcal 的最低蛋白質 / 脂肪（g），建議量再乘上安全係數
+MIN_PROTEIN_PER_1000KCAL = 65
+MIN_FAT_PER_1000KCAL = 22.5
+SAFETY_FACTOR = 1.15
+CARB_KCAL_FRACTION = 0.125  # 12.5% 熱量來自碳水
+
+# food_matrix() 回傳的欄位順序：每 1g 食材的 kcal / 蛋白 / 脂肪 / 碳水
+MACRO_FIELDS = ("kcal", "protein", "fat", "carb")
+FOOD_COLUMNS = ["食物名稱", "類型", "水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]
+
+
+# --- 單位清洗（向量化解析見 units.py） ---
+NUTRIENT_TEXT_COLUMNS = ["水分", "蛋白質", "脂肪", "碳水"]
+
+def _fill_kcal_by_atwater(df: pd.DataFrame) -> None:
+    """若缺熱量，用 Atwater 由宏量估算（就地修改）"""
+    mask = df["kcal_per_g"].isna()
+    if mask.any():
+        kcal_100g = (
+            df.loc[mask, "蛋白質"] * ATWATER["protein"]
+            + df.loc[mask, "脂肪"] * ATWATER["fat"]
+            + df.loc[mask, "碳水"] * ATWATER["carb"]
+        )
+        df.loc[mask, "kcal_per_g"] = kcal_100g / 100.0
+
+def _clean(df_raw: pd.DataFrame, kind: str, default_type: str, failures: list = None) -> pd.DataFrame:
+    df = df_raw.copy()
+
+    # 營養素欄位轉成數字（8.1、8.1%、22.4g/100g 都可）
+    values, report = units.parse_frame(df, NUTRIENT_TEXT_COLUMNS)
+    df[NUTRIENT_TEXT_COLUMNS] = values
+
+    if "熱量" in df:
+        df["kcal_per_g"], kcal_failed = units.parse_kcal(df["熱量"], kind)
+        report = pd.concat([report, units.failures_report({"熱量": kcal_failed}, df_raw)], ignore_index=True)
+    else:
+        df["kcal_per_g"] = float("nan")
+    _fill_kcal_by_atwater(df)
+
+    if failures is not None:
+        failures.extend(report.to_dict("records"))
+
+    df["類型"] = df["類型"].fillna(default_type)
+    return df[FOOD_COLUMNS]
+
+def clean_dry(df_raw: pd.DataFrame, failures: list = None) -> pd.DataFrame:
+    """乾糧資料清洗：如 4025cal/1kg → kcal/g = 4.025
+
+    傳入 failures（list）時，無法解析的儲存格會以 {row, column, value} 附加進去
+    """
+    return _clean(df_raw, "dry", "乾糧", failures)
+
+def clean_fresh(df_raw: pd.DataFrame, failures: list = None) -> pd.DataFrame:
+    """鮮食資料清洗：如 104cal/100g → kcal/g = 1.04（failures 同 clean_dry）"""
+    return _clean(df_raw, "fresh", "生食", failures)
+
+def load_foods(dry_path: str, fresh_path: str) -> pd.DataFrame:
+    """讀入乾糧 + 鮮食兩份 CSV，清洗後合併成一張食物表"""
+    df_dry   = clean_dry(pd.read_csv(dry_path)).dropna(subset=["食物名稱"])
+    df_fresh = clean_fresh(pd.read_csv(fresh_path)).dropna(subset=["食物名稱"])
+
+    df = pd.concat([df_dry, df_fresh], ignore_index=True)
+    df["水分"] = df["水分"].clip(lower=0.0, upper=99.9)
+    return df
+
+def dry_candidates(foods: pd.DataFrame) -> pd.DataFrame:
+    return foods[foods["類型"].str.contains("乾", na=False)]
+
+def fresh_candidates(foods: pd.DataFrame) -> pd.DataFrame:
+    return foods[foods["類型"].str.contains("生", na=False)]
+
+
+# --- 熱量與營養需求（可整批向量運算） ---
+def _lookup(mapping: dict, keys) -> np.ndarray:
+    """把 key 陣列對應成係數陣列；未知的 key 直接丟 KeyError"""
+    keys = np.asarray(keys)
+    uniq, inv = np.unique(keys, return_inverse=True)
+    missing = [k for k in uniq.tolist() if k not in mapping]
+    if missing:
+        raise KeyError(f"未知的選項：{missing}")
+    vals = np.array([mapping[k] for k in uniq.tolist()], dtype=float)
+    return vals[inv].reshape(keys.shape)
+
+def energy_requirements(weight, age_group, activity) -> dict:
+    """RER / MER 與每日蛋白、脂肪、碳水目標；輸入可為單值或等長陣列"""
+    weight = np.asarray(weight, dtype=float)
+    rer = 70 * (weight ** 0.75)
+    mer = rer * _lookup(PHYS_FACTOR_MAP, age_group) * _lookup(ACTIVITY_FACTOR_MAP, activity)
+
+    min_protein_g = mer / 1000 * MIN_PROTEIN_PER_1000KCAL
+    min_fat_g = mer / 1000 * MIN_FAT_PER_1000KCAL
+    return {
+        "rer": rer,
+        "mer": mer,
+        "min_protein_g": min_protein_g,
+        "min_fat_g": min_fat_g,
+        "recommend_protein_g": min_protein_g * SAFETY_FACTOR,
+        "recommend_fat_g": min_fat_g * SAFETY_FACTOR,
+        "target_carb_g": mer * CARB_KCAL_FRACTION / 4.0,
+    }
+
+
+# --- 食材營養矩陣 ---
+def food_matrix(foods: pd.DataFrame, names) -> np.ndarray:
+    """回傳 (len(names), 4) 陣列：每 1g 的 kcal、蛋白(g)、脂肪(g)、碳水(g)
+
+    foods 也可以是 food_index.FoodIndex（O(1) 查表，不必每次重建索引）
+    """
+    if hasattr(foods, "matrix"):
+        return foods.matrix(names)
+    table = foods.drop_duplicates("食物名稱").set_index("食物名稱")
+    rows = table.loc[list(names), ["kcal_per_g", "蛋白質", "脂肪", "碳水"]].to_numpy(dtype=float, copy=True)
+    rows[:, 1:] /= 100.0
+    return rows
+
+def macro_totals(matrix: np.ndarray, grams) -> np.ndarray:
+    """克數 (..., n) × 營養矩陣 (n, 4) → (..., 4) 的 kcal / 蛋白 / 脂肪 / 碳水 總量"""
+    return np.asarray(grams, dtype=float) @ np.nan_to_num(matrix)
+
+def dry_deduction(foods, dry_grams: dict) -> dict:
+    """乾糧熱量扣除：{食物名稱: 每日克數} → 總熱量 / 宏量與每項明細"""
+    names = list(dry_grams)
+    grams = np.array([float(dry_grams[n]) for n in names])
+    matrix = food_matrix(foods, names) if names else np.zeros((0, 4))
+    parts = grams[:, None] * matrix
+    rows = [{
+        "食物名稱": name,
+        "kcal/g": round(matrix[i, 0], 3),
+        "每日克數(g)": round(grams[i], 1),
+        "提供熱量(kcal)": round(parts[i, 0], 1),
+        "蛋白(g)": round(parts[i, 1], 1),
+        "脂肪(g)": round(parts[i, 2], 1),
+        "碳水(g)": round(parts[i, 3], 1),
+    } for i, name in enumerate(names)]
+    kcal, prot, fat, carb = parts.sum(axis=0) if names else (0.0, 0.0, 0.0, 0.0)
+    return {"kcal": float(kcal), "protein_g": float(prot), "fat_g": float(fat),
+            "carb_g": float(carb), "rows": rows, "grams": dict(zip(names, grams.tolist()))}
+
+
+# --- 鮮食配比（反距離權重） ---
+def macro_weights(matrix: np.ndarray, remain_kcal, remain_protein_g, remain_fat_g, remain_carb_g) -> np.ndarray:
+    """食材每 kcal 的宏量密度越接近「缺口」的密度 → 權重越高
+
+    缺口可以是單值或 (k,) 陣列，回傳 (..., n) 權重
+    """
+    matrix = np.nan_to_num(matrix)
+    remain_kcal = np.asarray(remain_kcal, dtype=float)
+    safe_kcal = np.where(remain_kcal > 0, remain_kcal, 1.0)
+    # 將「剩餘營養克數」換算成「每 kcal 所需的營養密度（g / kcal）」；無剩餘熱量則設為 0
+    target = np.stack([
+        np.where(remain_kcal > 0, np.asarray(g, dtype=float) / safe_kcal, 0.0)
+        for g in (remain_protein_g, remain_fat_g, remain_carb_g)
+    ], axis=-1)
+
+    kcal_g = matrix[:, 0]
+    ok = kcal_g > 0
+    density = np.divide(matrix[:, 1:], kcal_g[:, None], out=np.zeros_like(matrix[:, 1:]), where=ok[:, None])
+    d = np.sqrt(((density - target[..., None, :]) ** 2).sum(axis=-1))
+    return np.where(ok, 1.0 / (d + 1e-6), 1e-6)
+
+def allocate_auto_ratio(matrix: np.ndarray, remain_kcal, remain_protein_g, remain_fat_g, remain_carb_g) -> np.ndarray:
+    """自動配比：依權重決定克數比例，再把總克數放大到剛好補滿剩餘熱量"""
+    w = macro_weights(matrix, remain_kcal, remain_protein_g, remain_fat_g, remain_carb_g)
+    frac = w / w.sum(axis=-1, keepdims=True)
+    mix_kcal_per_g = (frac * np.nan_to_num(matrix[:, 0])).sum(axis=-1)
+    total_fresh_g = np.divide(remain_kcal, mix_kcal_per_g,
+                              out=np.zeros_like(mix_kcal_per_g), where=mix_kcal_per_g > 0)
+    return total_fresh_g[..., None] * frac
+
+def allocate_fill(matrix: np.ndarray, remain_kcal, remain_protein_g, remain_fat_g, remain_carb_g) -> np.ndarray:
+    """固定克數模式的補足：依權重分配剩餘「熱量」，再換算成各食材克數"""
+    w = macro_weights(matrix, remain_kcal, remain_protein_g, remain_fat_g, remain_carb_g)
+    share = w / w.sum(axis=-1, keepdims=True)
+    kcal_i = np.asarray(remain_kcal, dtype=float)[..., None] * share
+    kcal_g = np.nan_to_num(matrix[:, 0])
+    return np.divide(kcal_i, kcal_g, out=np.zeros_like(kcal_i), where=kcal_g > 0)
+
+def serving_rows(names, matrix: np.ndarray, grams, gram_label: str = "建議克數(g)") -> list:
+    """每項食材的克數 / 宏量 / 熱量明細（給 st.dataframe 用）"""
+    grams = np.asarray(grams, dtype=float)
+    parts = grams[:, None] * np.nan_to_num(matrix)
+    return [{
+        "食材": name,
+        gram_label: round(grams[i], 1),
+        "蛋白(g)": round(parts[i, 1], 1),
+        "脂肪(g)": round(parts[i, 2], 1),
+        "碳水(g)": round(parts[i, 3], 1),
+        "熱量(kcal)": round(parts[i, 0], 1),
+    } for i, name in enumerate(names)]
+
+def macro_percentages(kcal, protein_g, fat_g, carb_g) -> tuple:
+    """宏量佔總熱量的百分比（蛋白 4、脂肪 9、碳水 4 kcal/g）"""
+    if kcal <= 0:
+        return 0.0, 0.0, 0.0
+    return (protein_g * 4 / kcal * 100, fat_g * 9 / kcal * 100, carb_g * 4 / kcal * 100)
+
+
+# --- 整批 API ---
+def batch_requirements(weights, age_groups, activities, dry_grams: pd.DataFrame = None,
+                       foods: pd.DataFrame = None) -> pd.DataFrame:
+    """一次算很多隻貓：RER、MER、營養目標、乾糧貢獻與鮮食需補熱量
+
+    dry_grams：每列一隻貓、欄位為乾糧名稱、值為每日克數（可省略）
+    """
+    req = energy_requirements(weights, age_groups, activities)
+    n = req["mer"].shape[0]
+    if dry_grams is not None and dry_grams.shape[1] > 0:
+        dry = macro_totals(food_matrix(foods, dry_grams.columns), dry_grams.fillna(0.0).to_numpy(dtype=float))
+    else:
+        dry = np.zeros((n, 4))
+
+    out = pd.DataFrame(req)
+    out["dry_kcal"] = dry[:, 0]
+    out["dry_protein_g"] = dry[:, 1]
+    out["dry_fat_g"] = dry[:, 2]
+    out["dry_carb_g"] = dry[:, 3]
+    out["remain_kcal"] = np.maximum(out["mer"] - out["dry_kcal"], 0.0)
+    out["remain_protein_g"] = np.maximum(out["recommend_protein_g"] - out["dry_protein_g"], 0.0)
+    out["remain_fat_g"] = np.maximum(out["recommend_fat_g"] - out["dry_fat_g"], 0.0)
+    out["remain_carb_g"] = np.maximum(out["target_carb_g"] - out["dry_carb_g"], 0.0)
+    return out
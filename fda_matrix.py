@@ -0,0 +1,169 @@
+# --- 衛福部食品營養成分資料庫 → 營養素矩陣 ---
+# data/food_data_from_internet.csv 約 2,500 種食物 × 100+ 營養素（礦物質、維生素、脂肪酸、胺基酸）。
+# ingest() 把它轉成 float32 的「食物 × 營養素」矩陣存成 .npy，另存一份小小的 JSON 側檔
+# （名稱 / 分類 / 俗名 / 欄位分組）。NutrientMatrix 以 mmap 唯讀開啟：
+# 所有 Streamlit session 與 worker 行程共用同一份作業系統頁面快取，而不是各自握一個 DataFrame。
+# 矩陣以欄為主（Fortran order）存放，每個營養素欄是連續的一段，
+# 只看宏量營養素時不會讀到胺基酸那一塊。
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import food_db
+import units
+
+SOURCE_PATH = "data/food_data_from_internet.csv"
+MATRIX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "fda_matrix")
+FORMAT_VERSION = 1
+
+META_COLUMNS = {"整合編號": "id", "食品分類": "category", "樣品名稱": "name", "內容物描述": "description", "俗名": "aliases"}
+SKIP_COLUMNS = ["P/M/S"]  # 多不飽和 / 單元不飽和 / 飽和比例字串，可由各總量算回
+
+# 各營養素分組的第一欄（依原始檔欄位順序，到下一組的第一欄為止）
+BLOCK_STARTS = {
+    "macro": "廢棄率(%)",
+    "mineral": "鈉(mg)",
+    "vitamin": "維生素A總量(IU)",
+    "fatty_acid": "脂肪酸S總量(mg)",
+    "amino_acid": "水解胺基酸總量(mg)",
+    "other": "膽固醇(mg)",
+}
+
+
+def _aliases(s: str) -> list:
+    return [a.strip() for a in str(s).replace("，", ",").split(",") if a.strip()]
+
+def read_source(path: str = SOURCE_PATH) -> tuple:
+    """讀原始 CSV → (食物側檔 dict, 營養素欄名 list, float32 矩陣, 解析失敗報告)
+
+    第一列是說明文字；數值可能帶尾端空白，缺值有空白與 "-" 兩種寫法
+    """
+    raw = pd.read_csv(path, skiprows=1, dtype=str, keep_default_na=False)
+    raw.columns = [c.strip() for c in raw.columns]
+    raw = raw[raw["樣品名稱"].str.strip() != ""].reset_index(drop=True)
+
+    nutrient_cols = [c for c in raw.columns if c not in META_COLUMNS and c not in SKIP_COLUMNS]
+    cells = raw[nutrient_cols].apply(lambda c: c.str.strip()).replace({"-": "", "－": ""})
+    values, failures = units.parse_frame(cells, nutrient_cols)
+
+    foods = {key: raw[col].str.strip().tolist() for col, key in META_COLUMNS.items()}
+    foods["aliases"] = [_aliases(s) for s in foods["aliases"]]
+    matrix = np.asfortranarray(values.to_numpy(dtype=np.float32))
+    return foods, nutrient_cols, matrix, failures
+
+def _blocks(nutrient_cols: list) -> dict:
+    starts = sorted((nutrient_cols.index(c), name) for name, c in BLOCK_STARTS.items() if c in nutrient_cols)
+    bounds = [s for s, _ in starts] + [len(nutrient_cols)]
+    return {name: [bounds[i], bounds[i + 1]] for i, (_, name) in enumerate(starts)}
+
+def ingest(path: str = SOURCE_PATH, out_dir: str = MATRIX_DIR) -> dict:
+    """轉檔並寫出 nutrients.npy / foods.json / meta.json；回傳 meta"""
+    foods, nutrient_cols, matrix, failures = read_source(path)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "source": list(food_db.fingerprint(path)),
+        "shape": list(matrix.shape),
+        "dtype": "float32",
+        "nutrients": nutrient_cols,
+        "blocks": _blocks(nutrient_cols),
+        "parse_failures": failures.to_dict("records"),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    suffix = f".{os.getpid()}.tmp"
+    with open(os.path.join(out_dir, "nutrients.npy" + suffix), "wb") as f:
+        np.save(f, matrix, allow_pickle=False)
+    for name, obj in [("foods.json", foods), ("meta.json", meta)]:
+        with open(os.path.join(out_dir, name + suffix), "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+    # meta.json 最後換上：讀取端看到新 meta 時，矩陣與側檔一定已經就位
+    for name in ["nutrients.npy", "foods.json", "meta.json"]:
+        os.replace(os.path.join(out_dir, name + suffix), os.path.join(out_dir, name))
+    return meta
+
+def is_stale(path: str = SOURCE_PATH, out_dir: str = MATRIX_DIR) -> bool:
+    meta_path = os.path.join(out_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return True
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta.get("format_version") != FORMAT_VERSION or meta.get("source") != list(food_db.fingerprint(path))
+
+
+class NutrientMatrix:
+    """唯讀、mmap 的營養素矩陣；欄位在第一次被取用時才分頁載入"""
+
+    def __init__(self, out_dir: str = MATRIX_DIR):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(out_dir, "foods.json"), encoding="utf-8") as f:
+            self.foods = json.load(f)
+        self.nutrients = self.meta["nutrients"]
+        self.blocks = self.meta["blocks"]
+        self._col = {c: i for i, c in enumerate(self.nutrients)}
+        self._data = None
+
+    @property
+    def data(self) -> np.ndarray:
+        if self._data is None:
+            self._data = np.load(os.path.join(self.out_dir, "nutrients.npy"), mmap_mode="r")
+        return self._data
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(self.meta["shape"])
+
+    def column(self, name: str) -> np.ndarray:
+        return self.data[:, self._col[name]]
+
+    def columns(self, names) -> np.ndarray:
+        """(食物數, len(names)) 陣列；連續欄位回傳 mmap 上的切片，不複製"""
+        idx = [self._col[n] for n in names]
+        if idx == list(range(idx[0], idx[0] + len(idx))):
+            return self.data[:, idx[0]:idx[-1] + 1]
+        return np.column_stack([self.data[:, i] for i in idx])
+
+    def block(self, name: str) -> np.ndarray:
+        start, stop = self.blocks[name]
+        return self.data[:, start:stop]
+
+    def block_columns(self, name: str) -> list:
+        start, stop = self.blocks[name]
+        return self.nutrients[start:stop]
+
+    def frame(self, names=None, block: str = None) -> pd.DataFrame:
+        """指定欄位（或分組）的 DataFrame，附上名稱與分類"""
+        if block is not None:
+            names = self.block_columns(block)
+        names = list(names if names is not None else self.nutrients)
+        df = pd.DataFrame(np.asarray(self.columns(names)), columns=names)
+        df.insert(0, "食品分類", self.foods["category"])
+        df.insert(0, "樣品名稱", self.foods["name"])
+        return df
+
+
+_lock = threading.Lock()
+_shared = {}
+
+def open_matrix(path: str = SOURCE_PATH, out_dir: str = MATRIX_DIR) -> NutrientMatrix:
+    """行程內共用的 NutrientMatrix；來源檔改變時自動重新轉檔"""
+    with _lock:
+        m = _shared.get(out_dir)
+        if m is not None and m.meta["source"][1:3] == [os.stat(path).st_size, os.stat(path).st_mtime_ns]:
+            return m
+        if is_stale(path, out_dir):
+            ingest(path, out_dir)
+        m = _shared[out_dir] = NutrientMatrix(out_dir)
+        return m
+
+
+if __name__ == "__main__":
+    meta = ingest()
+    print(f"{meta['shape'][0]} 種食物 × {meta['shape'][1]} 種營養素 → {MATRIX_DIR}")
+    for name, (start, stop) in meta["blocks"].items():
+        print(f"  {name}: {stop - start} 欄")
+    print(f"  無法解析的儲存格：{len(meta['parse_failures'])}")
@@ -0,0 +1,182 @@
+# --- 食物資料庫載入（含快取） ---
+# Streamlit 每次互動都會重跑整個 app.py；這裡讓 CSV 只在檔案內容改變時才重新解析。
+# 快取分兩層：行程內 dict（最快）與磁碟上的 Parquet 欄式檔（跨行程 / 重啟後仍有效）。
+# 每筆快取以「路徑、大小、mtime、內容雜湊」為鍵。
+# 另有一份隨程式碼發佈的預建快照（python food_db.py 產生，data/food_db.snapshot/ 下的 Parquet + manifest.json）：
+# 新容器 / 新行程第一次載入時，來源內容雜湊相同就直接讀 Parquet（幾 ms），不必解析 CSV，也不必等磁碟快取暖起來。
+# Parquet 與 pandas 版本無關；manifest 記錄 CACHE_VERSION，清洗邏輯改了卻沒重建快照時發出警告並改走一般路徑。
+import hashlib
+import json
+import os
+import threading
+import warnings
+
+import pandas as pd
+
+import engine
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "food_db")
+CACHE_VERSION = 2  # 清洗邏輯改變時 +1，讓舊的磁碟快取與快照失效
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "food_db.snapshot")
+DRY_PATH = "data/food_data_dry_1115.csv"
+FRESH_PATH = "data/food_data_fresh_1115.csv"
+
+CLEANERS = {"dry": engine.clean_dry, "fresh": engine.clean_fresh}
+
+_lock = threading.Lock()
+_memory = {}  # (abspath, kind) -> (fingerprint, DataFrame)
+_combined = {}  # (id(乾糧表), id(鮮食表)) -> (乾糧表, 鮮食表, 合併表)
+_snapshots = {}  # 快照資料夾 -> (manifest mtime_ns, {kind: 表項})
+_stats = {"memory_hits": 0, "snapshot_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(path: str) -> tuple:
+    """(絕對路徑, 大小, mtime_ns, 內容雜湊)"""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns, _file_hash(path))
+
+def _disk_path(fp: tuple, kind: str, cache_dir: str) -> str:
+    key = hashlib.blake2b(repr((CACHE_VERSION, kind) + fp).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, f"{kind}-{key}.parquet")
+
+def _clean(path: str, kind: str) -> pd.DataFrame:
+    return CLEANERS[kind](pd.read_csv(path)).dropna(subset=["食物名稱"]).reset_index(drop=True)
+
+def _snapshot_tables(path: str) -> dict:
+    """讀快照的 manifest（每個行程只讀一次）；沒有快照或 manifest 壞掉時視為沒有快照，版本不符時另外警告"""
+    manifest = os.path.join(path, "manifest.json")
+    try:
+        mtime = os.stat(manifest).st_mtime_ns
+    except OSError:
+        return {}
+    with _lock:
+        cached = _snapshots.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(manifest, encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        payload = {}
+    tables = payload.get("tables", {}) if payload.get("version") == CACHE_VERSION else {}
+    if payload and not tables:
+        warnings.warn(f"食物表快照 {path} 的版本（{payload.get('version')}）與 CACHE_VERSION（{CACHE_VERSION}）不符，"
+                      "改為解析 CSV；請執行 python food_db.py 重建快照", stacklevel=3)
+    with _lock:
+        _snapshots[path] = (mtime, tables)
+    return tables
+
+def build_snapshot(dry_path: str = DRY_PATH, fresh_path: str = FRESH_PATH, path: str = SNAPSHOT_DIR) -> dict:
+    """把清洗後的乾糧 / 鮮食表寫成快照（各一個 Parquet + manifest.json）；回傳 manifest 中各表的來源資訊"""
+    os.makedirs(path, exist_ok=True)
+    suffix = f".{os.getpid()}.tmp"
+    tables = {}
+    for kind, src in [("dry", dry_path), ("fresh", fresh_path)]:
+        fp = fingerprint(src)
+        df = _clean(src, kind)
+        name = f"{kind}.parquet"
+        df.to_parquet(os.path.join(path, name + suffix), index=False)
+        # 比對內容而非 mtime：git checkout / 複製進容器都會改掉 mtime
+        tables[kind] = {"source": os.path.basename(src), "size": fp[1], "hash": fp[3], "rows": len(df), "file": name}
+    with open(os.path.join(path, "manifest.json" + suffix), "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "tables": tables}, f, ensure_ascii=False, indent=1)
+    # manifest 最後才換上：讀取端看到新的 manifest 時 Parquet 一定已經就位
+    for name in [t["file"] for t in tables.values()] + ["manifest.json"]:
+        os.replace(os.path.join(path, name + suffix), os.path.join(path, name))
+    return tables
+
+def load_clean(path: str, kind: str, cache_dir: str = CACHE_DIR, snapshot: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """讀入單一來源並清洗；kind 為 "dry" 或 "fresh"
+
+    回傳的 DataFrame 會被所有呼叫者共用，請勿就地修改。
+    """
+    if kind not in CLEANERS:
+        raise ValueError(f"未知的資料種類：{kind}")
+    abspath = os.path.abspath(path)
+    st = os.stat(abspath)
+
+    with _lock:
+        cached = _memory.get((abspath, kind))
+        # 大小與 mtime 都沒變 → 直接用行程內的結果，連檔案內容都不用讀
+        if cached is not None and cached[0][1:3] == (st.st_size, st.st_mtime_ns):
+            _stats["memory_hits"] += 1
+            return cached[1]
+
+    fp = fingerprint(abspath)
+    disk = _disk_path(fp, kind, cache_dir)
+    entry = _snapshot_tables(snapshot).get(kind) if snapshot else None
+    if entry is not None and (entry["size"], entry["hash"]) == (fp[1], fp[3]):
+        df = pd.read_parquet(os.path.join(snapshot, entry["file"]))
+        hit = "snapshot_hits"
+    elif os.path.exists(disk):
+        df = pd.read_parquet(disk)
+        hit = "disk_hits"
+    else:
+        df = _clean(abspath, kind)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{disk}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, disk)  # 原子寫入，避免其他行程讀到寫一半的檔
+        hit = "misses"
+
+    with _lock:
+        _stats[hit] += 1
+        _memory[(abspath, kind)] = (fp, df)
+    return df
+
+def combine(*parts: pd.DataFrame) -> pd.DataFrame:
+    """清洗後的各來源表接起來，並做合併後才做的處理（水分限制在 0–99.9）"""
+    df = pd.concat(parts, ignore_index=True)
+    df["水分"] = df["水分"].clip(lower=0.0, upper=99.9)
+    return df
+
+def load_food_db(dry_path: str, fresh_path: str, cache_dir: str = CACHE_DIR,
+                 snapshot: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """乾糧 + 鮮食合併後的食物表（與 engine.load_foods 相同結果，但有快取）"""
+    df_dry = load_clean(dry_path, "dry", cache_dir, snapshot)
+    df_fresh = load_clean(fresh_path, "fresh", cache_dir, snapshot)
+
+    key = (id(df_dry), id(df_fresh))
+    with _lock:
+        cached = _combined.get(key)
+        if cached is not None and cached[0] is df_dry and cached[1] is df_fresh:
+            return cached[2]
+
+    df = combine(df_dry, df_fresh)
+    with _lock:
+        _combined.clear()
+        _combined[key] = (df_dry, df_fresh, df)
+    return df
+
+def cache_stats() -> dict:
+    """命中 / 未命中次數，用來確認快取在負載下有發揮作用"""
+    with _lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats["hit_rate"] = (stats["memory_hits"] + stats["snapshot_hits"] + stats["disk_hits"]) / total if total else 0.0
+    return stats
+
+def clear_cache(disk: bool = False, cache_dir: str = CACHE_DIR) -> None:
+    """清空行程內快取（disk=True 時連磁碟檔一起刪）"""
+    with _lock:
+        _memory.clear()
+        _combined.clear()
+        _snapshots.clear()
+        for k in _stats:
+            _stats[k] = 0
+    if disk and os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            if name.endswith(".parquet"):
+                os.remove(os.path.join(cache_dir, name))
+
+
+if __name__ == "__main__":
+    for kind, info in build_snapshot().items():
+        print(f"{kind}: {info['source']} {info['rows']} 列 → {os.path.join(SNAPSHOT_DIR, info['file'])}")
@@ -0,0 +1,167 @@
+# --- 食物索引與搜尋 ---
+# FoodIndex：食物名稱 → 列位置的 dict，查一個食物是 O(1)，
+# 取代 candidates[candidates["食物名稱"] == name].iloc[0] 每次都掃整張表。
+# FoodSearch：名稱 + 俗名的前綴 / 子字串 / 模糊搜尋，讓 2,500+ 種食物的選單也能即時篩選。
+import bisect
+import threading
+import weakref
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+MATRIX_COLUMNS = ["kcal_per_g", "蛋白質", "脂肪", "碳水"]
+
+
+class FoodIndex:
+    """食物表的名稱索引；同名食物以第一筆為準（與 engine.food_matrix 相同）"""
+
+    def __init__(self, foods: pd.DataFrame):
+        self.foods = foods
+        names = foods["食物名稱"].tolist()
+        self.pos = {}
+        for i, name in enumerate(names):
+            self.pos.setdefault(name, i)
+        # 每 1g 的 kcal / 蛋白 / 脂肪 / 碳水，一次算好
+        m = foods[MATRIX_COLUMNS].to_numpy(dtype=float, copy=True)
+        m[:, 1:] /= 100.0
+        self._matrix = m
+
+    def __contains__(self, name) -> bool:
+        return name in self.pos
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def row(self, name: str) -> pd.Series:
+        return self.foods.iloc[self.pos[name]]
+
+    def positions(self, names) -> np.ndarray:
+        return np.fromiter((self.pos[n] for n in names), dtype=np.intp)
+
+    def matrix(self, names) -> np.ndarray:
+        """同 engine.food_matrix：(len(names), 4) 的每 1g 宏量"""
+        return self._matrix[self.positions(names)]
+
+
+_lock = threading.Lock()
+_indexes = {}  # id(DataFrame) -> (weakref, FoodIndex)；DataFrame 不能當 dict key
+_searches = {}  # id(NutrientMatrix) -> (weakref, FoodSearch)
+
+def index_for(foods: pd.DataFrame) -> FoodIndex:
+    """同一個 DataFrame 物件只建一次索引（食物表來自快取時，每次 rerun 都是同一個物件）"""
+    with _lock:
+        entry = _indexes.get(id(foods))
+        if entry is not None and entry[0]() is foods:
+            return entry[1]
+        for key in [k for k, (ref, _) in _indexes.items() if ref() is None]:
+            del _indexes[key]
+        idx = FoodIndex(foods)
+        _indexes[id(foods)] = (weakref.ref(foods), idx)
+        return idx
+
+
+# --- 搜尋 ---
+def _grams(s: str, n: int) -> set:
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+class FoodSearch:
+    """名稱與俗名的搜尋結構
+
+    prefix：排序後的 key 清單 + 二分搜尋
+    substring：字元 unigram / bigram 倒排索引取交集後再確認
+    fuzzy：與查詢字串共有 bigram 的比例（Jaccard）排序
+    """
+
+    def __init__(self, names, aliases=None, categories=None):
+        self.names = list(names)
+        self.categories = list(categories) if categories is not None else None
+        aliases = aliases if aliases is not None else [[] for _ in self.names]
+
+        self.keys = []  # (key, 食物編號)
+        for i, (name, alias) in enumerate(zip(self.names, aliases)):
+            for key in dict.fromkeys([name, *alias]):
+                if key:
+                    self.keys.append((key.lower(), i))
+        self.keys.sort()
+        self._sorted = [k for k, _ in self.keys]
+
+        self._postings = {1: defaultdict(set), 2: defaultdict(set)}
+        for k_id, (key, _) in enumerate(self.keys):
+            for n in (1, 2):
+                for g in _grams(key, n):
+                    self._postings[n][g].add(k_id)
+
+    @classmethod
+    def from_matrix(cls, m) -> "FoodSearch":
+        """由 fda_matrix.NutrientMatrix 的側檔建立（樣品名稱 + 俗名）"""
+        return cls(m.foods["name"], m.foods["aliases"], m.foods["category"])
+
+    def _filter(self, ids, category) -> list:
+        if category is None or self.categories is None:
+            return list(ids)
+        allowed = {category} if isinstance(category, str) else set(category)
+        return [i for i in ids if self.categories[i] in allowed]
+
+    def _unique(self, key_ids, limit: int, category=None) -> list:
+        seen = dict.fromkeys(self.keys[k][1] for k in key_ids)
+        return self._filter(seen, category)[:limit]
+
+    def prefix(self, q: str, limit: int = 20, category=None) -> list:
+        q = q.lower()
+        lo = bisect.bisect_left(self._sorted, q)
+        hi = bisect.bisect_left(self._sorted, q + "\U0010ffff")
+        return self._unique(range(lo, hi), limit, category)
+
+    def substring(self, q: str, limit: int = 20, category=None) -> list:
+        q = q.lower()
+        if not q:
+            return []
+        n = 1 if len(q) == 1 else 2
+        grams = _grams(q, n)
+        postings = sorted((self._postings[n].get(g, set()) for g in grams), key=len)
+        cand = set.intersection(*postings) if postings else set()
+        hits = [k for k in cand if q in self.keys[k][0]]
+        # 越早出現、名稱越短越相關
+        hits.sort(key=lambda k: (self.keys[k][0].find(q), len(self.keys[k][0]), k))
+        return self._unique(hits, limit, category)
+
+    def fuzzy(self, q: str, limit: int = 20, category=None) -> list:
+        q = q.lower()
+        grams = _grams(q, 2) or _grams(q, 1)
+        n = 2 if len(q) > 1 else 1
+        shared = Counter()
+        for g in grams:
+            shared.update(self._postings[n].get(g, ()))
+        scored = []
+        for k, c in shared.items():
+            key_grams = max(len(self.keys[k][0]) - n + 1, 1)
+            scored.append((c / (len(grams) + key_grams - c), k))
+        scored.sort(key=lambda t: (-t[0], t[1]))
+        return self._unique((k for _, k in scored), limit, category)
+
+    def search(self, q: str, limit: int = 20, category=None) -> list:
+        """前綴 → 子字串 → 模糊，依序補滿 limit 筆；回傳食物編號"""
+        out = []
+        for fn in (self.prefix, self.substring, self.fuzzy):
+            for i in fn(q, limit, category):
+                if i not in out:
+                    out.append(i)
+            if len(out) >= limit:
+                break
+        return out[:limit]
+
+    def search_names(self, q: str, limit: int = 20, category=None) -> list:
+        return [self.names[i] for i in self.search(q, limit, category)]
+
+def search_for(m) -> FoodSearch:
+    """同一個 fda_matrix.NutrientMatrix 只建一次搜尋結構，所有 session 共用（open_matrix 每個行程同一個物件）"""
+    with _lock:
+        entry = _searches.get(id(m))
+        if entry is not None and entry[0]() is m:
+            return entry[1]
+        for key in [k for k, (ref, _) in _searches.items() if ref() is None]:
+            del _searches[key]
+        search = FoodSearch.from_matrix(m)
+        _searches[id(m)] = (weakref.ref(m), search)
+        return search
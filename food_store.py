@@ -0,0 +1,207 @@
+# --- 行程共用、唯讀的食物庫 ---
+# food_db 已讓所有 session 共用同一張清洗後的 DataFrame，但每個 session 仍各自從它切出
+# 乾糧 / 鮮食候選表、用 str.contains("乾") / str.contains("生") 掃「類型」欄、tolist() 出一份新的名稱字串。
+# FoodStore 在行程內只建一次，之後每個 session 只握它的參照：
+#   名稱：sys.intern 過的 str，放在 tuple
+#   類型：類別代碼（int16）+ 類別名稱表；乾糧 / 鮮食遮罩預先算好
+#   營養素：float32 欄位（水分、蛋白質、脂肪、碳水、kcal/g）
+# 陣列都設成唯讀（writeable=False），誤改會直接丟錯，不會默默影響其他 session。
+# 介面與 food_index.FoodIndex 相容（matrix / positions / pos / in），可直接傳給 engine 與 sweep。
+# 來源檔更新時不改舊的一份：apply() 只換掉該來源那一段的列、產生 version + 1 的新版本（見 food_watch.py），
+# 還在用舊版本的 session 不受影響。
+# version 只在行程內遞增；要跨行程比對資料是否相同（例如持久化的配方快取）請用 digest（內容雜湊）。
+import hashlib
+import sys
+import threading
+import weakref
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+import food_db
+
+NUTRIENT_COLUMNS = ["水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]
+SOURCES = ("dry", "fresh")  # 來源代碼順序，也是各段在表中的順序；-1 = 不明
+DRY_MARK = "乾"   # 與 engine.dry_candidates 相同的判斷
+FRESH_MARK = "生"  # 與 engine.fresh_candidates 相同的判斷
+TYPE_CODE_DTYPE = np.int16  # int8 超過 127 種類別就會悄悄繞回負數
+
+
+def _frozen(a: np.ndarray) -> np.ndarray:
+    a = np.ascontiguousarray(a)
+    a.flags.writeable = False
+    return a
+
+
+class FoodStore:
+    """不可變的食物庫；用 store_for() / load() 取得行程共用的那一份"""
+
+    def __init__(self, foods: pd.DataFrame, sources=None, version: int = 0):
+        """sources：每列的來源代碼（SOURCES 的索引），有它才能用 apply() 逐列更新"""
+        cat = pd.Categorical(foods["類型"])
+        source = np.full(len(foods), -1, dtype=np.int8) if sources is None else np.asarray(sources, dtype=np.int8)
+        self._set(
+            names=tuple(sys.intern(str(n)) for n in foods["食物名稱"].tolist()),
+            types=tuple(sys.intern(str(t)) for t in cat.categories),
+            codes=cat.codes.astype(TYPE_CODE_DTYPE),  # -1 = 缺值
+            values=foods[NUTRIENT_COLUMNS].to_numpy(dtype=np.float32),
+            source=source,
+            version=version,
+        )
+
+    @classmethod
+    def from_parts(cls, parts: dict, version: int = 0) -> "FoodStore":
+        """{來源: 清洗後的表} → 依 SOURCES 順序接起來（同 food_db.load_food_db），並記下每列來源"""
+        kinds = [k for k in SOURCES if k in parts]
+        sources = np.repeat([SOURCES.index(k) for k in kinds], [len(parts[k]) for k in kinds])
+        return cls(food_db.combine(*(parts[k] for k in kinds)), sources, version)
+
+    def _set(self, names, types, codes, values, source, version, pos=None) -> None:
+        if len(types) > np.iinfo(TYPE_CODE_DTYPE).max:
+            raise ValueError(f"類型種類太多（{len(types)}），超出類別代碼 {np.dtype(TYPE_CODE_DTYPE).name} 的範圍")
+        self.names = names
+        self.types = types
+        self.type_codes = _frozen(codes)
+        self.values = _frozen(values)
+        self.source = _frozen(source)
+        self.version = version
+
+        # 每個類別判斷一次，再以代碼展開；最後多一格 False 給缺值（代碼 -1）
+        dry_types = np.array([DRY_MARK in t for t in self.types] + [False])
+        fresh_types = np.array([FRESH_MARK in t for t in self.types] + [False])
+        self.is_dry = _frozen(dry_types[self.type_codes])
+        self.is_fresh = _frozen(fresh_types[self.type_codes])
+        self.dry_names = tuple(np.asarray(self.names, dtype=object)[self.is_dry])
+        self.fresh_names = tuple(np.asarray(self.names, dtype=object)[self.is_fresh])
+
+        if pos is None:
+            pos = {}
+            for i, name in enumerate(self.names):
+                pos.setdefault(name, i)  # 同名以第一筆為準（與 FoodIndex 相同）
+        self.pos = pos if isinstance(pos, MappingProxyType) else MappingProxyType(pos)
+        # 每 1g 的 kcal / 蛋白 / 脂肪 / 碳水（欄位順序同 engine.MACRO_FIELDS）
+        v = self.values
+        self._per_gram = _frozen(np.column_stack([v[:, 4], v[:, 1] / 100, v[:, 2] / 100, v[:, 3] / 100]))
+        self._frame = None
+        self._digest = None
+
+    def __contains__(self, name) -> bool:
+        return name in self.pos
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def segment(self, kind: str) -> tuple:
+        """kind 來源在表中的 [起, 迄) 列位置"""
+        if (self.source < 0).any():
+            raise ValueError("這份食物庫沒有來源資訊（請用 FoodStore.from_parts 或 load() 建立）")
+        code = SOURCES.index(kind)
+        return int(np.searchsorted(self.source, code, "left")), int(np.searchsorted(self.source, code, "right"))
+
+    def apply(self, kind: str, part: pd.DataFrame, diff: dict) -> "FoodStore":
+        """kind 來源換成新內容 part（清洗後），回傳 version + 1 的新 FoodStore；自己不變
+
+        diff 為 food_watch.diff_rows 的結果；沒有任何變動時直接回傳自己。
+        只有數值改變（名稱與順序都相同）時，名稱索引整份沿用；否則只重算這一段之後的位置。
+        """
+        if not (diff["added"] or diff["removed"] or diff["changed"]):
+            return self
+        lo, hi = self.segment(kind)
+        part = food_db.combine(part)
+        seg_names = tuple(sys.intern(str(n)) for n in part["食物名稱"].tolist())  # 舊名稱 intern 後就是同一個物件
+
+        # 類別表只會往後加，舊代碼不變
+        type_list = list(self.types)
+        type_list.extend(sys.intern(str(t)) for t in pd.unique(part["類型"].dropna()) if t not in self.types)
+        seg_codes = pd.Categorical(part["類型"], categories=type_list).codes.astype(TYPE_CODE_DTYPE)
+
+        names = self.names[:lo] + seg_names + self.names[hi:]
+        if seg_names == self.names[lo:hi]:
+            pos = self.pos
+        else:
+            pos = {n: i for n, i in self.pos.items() if i < lo}
+            for i in range(lo, len(names)):
+                pos.setdefault(names[i], i)
+
+        new = FoodStore.__new__(FoodStore)
+        new._set(
+            names=names,
+            types=tuple(type_list),
+            codes=np.concatenate([self.type_codes[:lo], seg_codes, self.type_codes[hi:]]),
+            values=np.concatenate([self.values[:lo], part[NUTRIENT_COLUMNS].to_numpy(dtype=np.float32),
+                                   self.values[hi:]]),
+            source=np.concatenate([self.source[:lo], np.full(len(part), SOURCES.index(kind), dtype=np.int8),
+                                   self.source[hi:]]),
+            version=self.version + 1,
+            pos=pos,
+        )
+        return new
+
+    def positions(self, names) -> np.ndarray:
+        return np.fromiter((self.pos[n] for n in names), dtype=np.intp)
+
+    def matrix(self, names) -> np.ndarray:
+        """同 engine.food_matrix：(len(names), 4) 的每 1g 宏量（float64 副本，可自由修改）"""
+        return self._per_gram[self.positions(names)].astype(float)
+
+    @property
+    def digest(self) -> str:
+        """名稱、類型與營養素的內容雜湊：資料相同就相同，重啟行程也不變"""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update("\x1f".join(self.names).encode("utf-8"))
+            h.update("\x1f".join(self.types).encode("utf-8"))
+            for a in (self.type_codes, self.values):
+                h.update(a.tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """精簡型別的 DataFrame（類型為 category、營養素為 float32），第一次取用時才建"""
+        if self._frame is None:
+            df = pd.DataFrame(self.values, columns=NUTRIENT_COLUMNS)
+            df.insert(0, "類型", pd.Categorical.from_codes(self.type_codes, self.types))
+            df.insert(0, "食物名稱", pd.Series(self.names, dtype=object))
+            self._frame = df
+        return self._frame
+
+    def nbytes(self) -> int:
+        """陣列與名稱字串佔用的位元組（名稱字串與其他 session 共用，只算一次）"""
+        arrays = [self.type_codes, self.values, self.is_dry, self.is_fresh, self._per_gram]
+        strings = {id(s): sys.getsizeof(s) for s in self.names + self.types}
+        tuples = sum(sys.getsizeof(t) for t in (self.names, self.types, self.dry_names, self.fresh_names))
+        return sum(a.nbytes for a in arrays) + sum(strings.values()) + tuples + sys.getsizeof(dict(self.pos))
+
+
+_lock = threading.Lock()
+_stores = {}  # id(DataFrame) -> (weakref, FoodStore)
+
+_loaded = {}  # (乾糧路徑, 鮮食路徑) -> ((乾糧表, 鮮食表), FoodStore)
+
+def store_for(foods: pd.DataFrame) -> FoodStore:
+    """同一個 DataFrame 物件只建一次（food_db 的快取讓每次 rerun 拿到同一個物件）"""
+    with _lock:
+        entry = _stores.get(id(foods))
+        if entry is not None and entry[0]() is foods:
+            return entry[1]
+        for key in [k for k, (ref, _) in _stores.items() if ref() is None]:
+            del _stores[key]
+        store = FoodStore(foods)
+        _stores[id(foods)] = (weakref.ref(foods), store)
+        return store
+
+def load(dry_path: str = food_db.DRY_PATH, fresh_path: str = food_db.FRESH_PATH) -> FoodStore:
+    """載入（或沿用）食物表並回傳共用的 FoodStore（含來源資訊）；來源檔改變時會換成新的一份"""
+    parts = (food_db.load_clean(dry_path, "dry"), food_db.load_clean(fresh_path, "fresh"))
+    key = (dry_path, fresh_path)
+    with _lock:
+        cached = _loaded.get(key)
+        if cached is not None and all(a is b for a, b in zip(cached[0], parts)):
+            return cached[1]
+    version = cached[1].version + 1 if cached is not None else 0
+    store = FoodStore.from_parts(dict(zip(SOURCES, parts)), version)
+    with _lock:
+        _loaded[key] = (parts, store)
+    return store
@@ -0,0 +1,144 @@
+# --- 食物資料檔熱更新（mtime 輪詢） ---
+# 新品上架時會直接改 data/ 下的乾糧 / 鮮食 CSV。背景執行緒每 POLL_SECONDS 秒 stat 一次來源檔，
+# 大小或 mtime 變了就只重新清洗那一個檔（food_db.load_clean），以「食物名稱」比對新舊列，
+# 再用 FoodStore.apply 產生新版本整個換上（指派是原子的）：正在 rerun 的 session 繼續用手上的舊版本，不必等。
+# store.version 每次更新 +1；把它放進快取鍵，用舊資料算出的配方就會自然失效。
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import food_db
+import food_store
+
+POLL_SECONDS = 2.0
+EVENT_LOG = 50  # 保留最近幾筆更新紀錄
+TEXT_COLUMNS = ["類型"]
+NUMBER_COLUMNS = ["水分", "蛋白質", "脂肪", "碳水", "kcal_per_g"]
+
+
+def _first_positions(names: list) -> dict:
+    pos = {}
+    for i, name in enumerate(names):
+        pos.setdefault(name, i)
+    return pos
+
+def diff_rows(old: pd.DataFrame, new: pd.DataFrame) -> dict:
+    """以食物名稱比對新舊表（同名以第一筆為準）→ {"added", "removed", "changed"} 各為名稱清單
+
+    名稱對照用 dict、數值欄整欄比較（NaN 與 NaN 視為相同）；Arrow 字串欄的 isin / loc 在數萬列時慢很多
+    """
+    a_pos = _first_positions(old["食物名稱"].tolist())
+    b_pos = _first_positions(new["食物名稱"].tolist())
+    common = [n for n in b_pos if n in a_pos]
+    ia = np.fromiter((a_pos[n] for n in common), dtype=np.intp, count=len(common))
+    ib = np.fromiter((b_pos[n] for n in common), dtype=np.intp, count=len(common))
+
+    va = old[NUMBER_COLUMNS].to_numpy(dtype=float)[ia]
+    vb = new[NUMBER_COLUMNS].to_numpy(dtype=float)[ib]
+    same = ((va == vb) | (np.isnan(va) & np.isnan(vb))).all(axis=1)
+    for col in TEXT_COLUMNS:
+        ta = old[col].to_numpy(dtype=object, na_value=None)[ia]
+        same &= ta == new[col].to_numpy(dtype=object, na_value=None)[ib]
+    return {
+        "added": [n for n in b_pos if n not in a_pos],
+        "removed": [n for n in a_pos if n not in b_pos],
+        "changed": [n for n, s in zip(common, same) if not s],
+    }
+
+def _stat(path: str) -> tuple:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+class Watcher:
+    """輪詢乾糧 / 鮮食來源檔；store 永遠指向最新版本的 FoodStore"""
+
+    def __init__(self, dry_path: str = food_db.DRY_PATH, fresh_path: str = food_db.FRESH_PATH,
+                 interval: float = POLL_SECONDS):
+        self.paths = {"dry": dry_path, "fresh": fresh_path}
+        self.interval = interval
+        self._seen = {kind: _stat(path) for kind, path in self.paths.items()}
+        self.parts = {kind: food_db.load_clean(path, kind) for kind, path in self.paths.items()}
+        self.store = food_store.FoodStore.from_parts(self.parts)
+        self.versions = {kind: 0 for kind in self.paths}  # 各來源檔被套用過幾次更新
+        self.events = deque(maxlen=EVENT_LOG)
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self) -> int:
+        return self.store.version
+
+    def poll(self) -> list:
+        """檢查一次所有來源檔；回傳這次的更新事件（沒有變動時為空）"""
+        events = []
+        with self._poll_lock:
+            for kind, path in self.paths.items():
+                stat = _stat(path)
+                if stat is None or stat == self._seen[kind]:
+                    continue
+                self._seen[kind] = stat
+                t0 = time.perf_counter()
+                try:
+                    part = food_db.load_clean(path, kind)
+                except (OSError, ValueError, KeyError, pd.errors.ParserError) as e:
+                    # 多半是檔案寫到一半；寫完 mtime 會再變，下次輪詢重試，這段期間繼續用舊資料
+                    events.append({"kind": kind, "ts": time.time(), "error": f"{type(e).__name__}: {e}"})
+                    continue
+                diff = diff_rows(self.parts[kind], part)
+                store = self.store.apply(kind, part, diff)
+                self.parts[kind] = part
+                if store is not self.store:
+                    self.store = store
+                    self.versions[kind] += 1
+                events.append({
+                    "kind": kind,
+                    "ts": time.time(),
+                    "version": self.store.version,
+                    "added": diff["added"],
+                    "removed": diff["removed"],
+                    "changed": diff["changed"],
+                    "seconds": time.perf_counter() - t0,
+                })
+            self.events.extend(events)
+        return events
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:  # 背景執行緒不能因為一次失敗就停掉
+                self.events.append({"ts": time.time(), "error": f"{type(e).__name__}: {e}"})
+
+    def start(self) -> "Watcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="food-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_lock = threading.Lock()
+_watchers = {}  # (乾糧路徑, 鮮食路徑) -> Watcher
+
+def shared(dry_path: str = food_db.DRY_PATH, fresh_path: str = food_db.FRESH_PATH) -> Watcher:
+    """行程共用、已啟動的 Watcher（每組來源檔一個）"""
+    key = (os.path.abspath(dry_path), os.path.abspath(fresh_path))
+    with _lock:
+        w = _watchers.get(key)
+        if w is None:
+            w = _watchers[key] = Watcher(dry_path, fresh_path).start()
+        return w
@@ -0,0 +1,333 @@
+# --- 配方快取（跨 session / 批次 API 共用，含磁碟層） ---
+# 一份「配方」= 某組輸入算出的全部結果：RER/MER、乾糧扣除、鮮食克數、固定克數模式的補足量、
+# 最終營養比例與每日備餐清單。很多飼主（與診所的批次請求）送出的輸入其實一模一樣，
+# 這裡把輸入正規化成鍵，相同的輸入只求解一次，之後都是查表。
+#   鍵：體重（四捨五入到頁面輸入的間隔 WEIGHT_STEP）、年齡層、活動量、
+#       依名稱排序的乾糧 / 固定克數（名稱, 克數）與鮮食名稱、食物資料內容雜湊（FoodStore.digest）、PLAN_FORMAT
+#   第一層：行程內 LRU（OrderedDict，最多 MEMORY_ITEMS 筆）
+#   第二層：本機 SQLite（.cache/plans/plans.sqlite，可用環境變數 CAT_PLAN_CACHE 改路徑；總大小超過 DISK_MAX_BYTES 時刪掉最久沒用的；
+#           每 DISK_CHECK_EVERY 筆寫入檢查一次，所以可能短暫超出一點）
+# 只有第一層命中時不會回寫 SQLite 的 last_used，磁碟層的淘汰順序因此只是近似 LRU。
+# 配方是純 JSON（dict / list / float），可直接給 HTTP 服務回傳；回傳的 dict 會被所有呼叫者共用，請勿就地修改。
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import engine
+import food_store
+import solver
+
+PLAN_FORMAT = 1  # 配方內容或計算方式改變時 +1，讓舊的磁碟快取失效
+WEIGHT_STEP = 0.1  # 與頁面體重輸入的 step 相同
+MEMORY_ITEMS = 4096
+DISK_MAX_BYTES = 64 * 1024 * 1024
+DISK_EVICT_TO = 0.9  # 超過上限時刪到上限的 90%，不必每次寫入都刪
+DISK_CHECK_EVERY = 256  # 每寫入幾筆才加總一次大小（加總要掃整張表；大量匯出時每筆都掃會變成平方時間）
+ENV_VAR = "CAT_PLAN_CACHE"
+CACHE_PATH = (os.environ.get(ENV_VAR)
+              or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "plans", "plans.sqlite"))
+
+
+# --- 正規化的輸入與鍵 ---
+def round_weight(weight: float, step: float = WEIGHT_STEP) -> float:
+    return round(round(float(weight) / step) * step, 6)
+
+def canonical_request(weight, age_group: str, activity: str, dry_grams: dict = None, fresh=(),
+                      fixed: dict = None, data: str = "") -> dict:
+    """同一份配方的各種寫法（食材順序、int / float、numpy 數值）都變成同一個 dict
+
+    dry_grams：{乾糧: 每日克數}，0 g 的乾糧不影響結果，直接拿掉
+    fresh：自動配比的鮮食食材
+    fixed：{鮮食: 手邊克數}，0 g 代表由系統補足
+    data：食物資料版本（FoodStore.digest）
+    """
+    if age_group not in engine.PHYS_FACTOR_MAP or activity not in engine.ACTIVITY_FACTOR_MAP:
+        raise KeyError(f"未知的選項：{age_group} / {activity}")
+    return {
+        "format": PLAN_FORMAT,
+        "data": data,
+        "weight": round_weight(weight),
+        "age_group": age_group,
+        "activity": activity,
+        "dry": sorted([str(n), float(g)] for n, g in (dry_grams or {}).items() if g > 0),
+        "fresh": sorted({str(n) for n in fresh}),
+        "fixed": sorted([str(n), float(g)] for n, g in (fixed or {}).items()),
+    }
+
+def plan_key(request: dict) -> str:
+    text = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# --- 計算一份配方 ---
+def _floats(a) -> list:
+    return [float(x) for x in np.asarray(a, dtype=float).ravel()]
+
+def _x0(warm: dict, names) -> list:
+    """上一份配方的 {食材: 克數} → 依 names 排好的熱啟動初值；沒有共同的食材時為 None"""
+    if not warm or not any(n in warm for n in names):
+        return None
+    return [warm.get(n, 0.0) for n in names]
+
+def build_plan(foods, request: dict, warm: dict = None) -> dict:
+    """依 canonical_request 的結果算出整份配方（不經過快取）
+
+    warm：同一位使用者上一份配方的 {食材: 克數}，只用來熱啟動求解（見 solver.solve），不影響結果
+    """
+    t0 = time.perf_counter()
+    req = engine.energy_requirements(request["weight"], request["age_group"], request["activity"])
+    energy = {k: float(v) for k, v in req.items()}
+    target = [energy["mer"], energy["recommend_protein_g"], energy["recommend_fat_g"], energy["target_carb_g"]]
+
+    dry = engine.dry_deduction(foods, dict(request["dry"]))
+    dry_totals = [dry["kcal"], dry["protein_g"], dry["fat_g"], dry["carb_g"]]
+    plan = {
+        "request": request,
+        "energy": energy,
+        "dry": {"totals": dry_totals, "rows": dry["rows"]},
+        "fresh": None,
+        "fixed": None,
+        "prep": [],
+    }
+
+    # 自動配比：鮮食補足乾糧以外的缺口
+    fresh = request["fresh"]
+    if fresh:
+        res = solver.solve(foods.matrix(fresh), solver.remaining_target(target, dry_totals), x0=_x0(warm, fresh))
+        kcal, prot, fat, carb = res["achieved"]
+        plan["fresh"] = {
+            "grams": dict(zip(fresh, _floats(res["grams"]))),
+            "achieved": _floats(res["achieved"]),
+            "residual": _floats(res["residual"]),
+            "percentages": _floats(engine.macro_percentages(kcal, prot, fat, carb)),
+            "seconds": res["seconds"],
+        }
+
+    # 固定克數模式：扣掉乾糧與手邊食材，0 g 的食材補足剩下的（與頁面相同，缺口不足 0 以 0 計）
+    if request["fixed"]:
+        names = [n for n, _ in request["fixed"]]
+        grams = [g for _, g in request["fixed"]]
+        fixed_totals = engine.macro_totals(foods.matrix(names), grams)
+        remain = np.maximum(np.asarray(target) - np.asarray(dry_totals) - fixed_totals, 0.0)
+        auto_items = [n for n, g in request["fixed"] if g == 0]
+        auto, auto_totals, seconds = {}, np.zeros(4), 0.0
+        if auto_items and remain[0] > 0:
+            auto_matrix = foods.matrix(auto_items)
+            res = solver.solve(auto_matrix, remain, x0=_x0(warm, auto_items))
+            auto = dict(zip(auto_items, _floats(res["grams"])))
+            auto_totals = engine.macro_totals(auto_matrix, res["grams"])
+            seconds = res["seconds"]
+        final = fixed_totals + auto_totals + np.asarray(dry_totals)
+        plan["fixed"] = {
+            "totals": _floats(fixed_totals),
+            "remain": _floats(remain),
+            "auto": auto,
+            "auto_totals": _floats(auto_totals),
+            "final": _floats(final),
+            "percentages": _floats(engine.macro_percentages(*final)),
+            "seconds": seconds,
+        }
+
+        # 每日備餐清單：手邊食材（> 0 g）+ 補足量（四捨五入到 0.1 g，同表格），同名合併、依名稱排序
+        daily = {}
+        for name, g in request["fixed"]:
+            if g > 0:
+                daily[name] = daily.get(name, 0.0) + g
+        for name, g in auto.items():
+            daily[name] = daily.get(name, 0.0) + round(g, 1)
+        plan["prep"] = [[name, daily[name]] for name in sorted(daily)]
+
+    plan["seconds"] = time.perf_counter() - t0
+    return plan
+
+
+# --- 兩層快取 ---
+class PlanCache:
+    """行程內 LRU + SQLite；path=None 時只有行程內那一層"""
+
+    def __init__(self, path: str = CACHE_PATH, memory_items: int = MEMORY_ITEMS, max_bytes: int = DISK_MAX_BYTES):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()  # key -> 配方
+        self._lock = threading.Lock()
+        self._local = threading.local()  # sqlite3 連線不能跨執行緒共用，每個執行緒一條
+        self._puts = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0,
+                       "disk_evictions": 0, "disk_errors": 0}
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")  # 多個行程（多個 Streamlit worker）同時讀寫
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS plans (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                         "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS plans_last_used ON plans (last_used)")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, plan: dict) -> None:
+        with self._lock:
+            self._memory[key] = plan
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+                self._stats["memory_evictions"] += 1
+
+    def get(self, key: str):
+        """命中時回傳配方，否則 None（磁碟層壞掉時只當作沒命中）"""
+        with self._lock:
+            plan = self._memory.get(key)
+            if plan is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return plan
+        if self.path is not None:
+            try:
+                conn = self._db()
+                with conn:
+                    row = conn.execute("SELECT value FROM plans WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        conn.execute("UPDATE plans SET last_used = ? WHERE key = ?", (time.time(), key))
+            except sqlite3.Error:
+                self._count("disk_errors")
+                row = None
+            if row is not None:
+                plan = json.loads(row[0])
+                self._remember(key, plan)
+                self._count("disk_hits")
+                return plan
+        self._count("misses")
+        return None
+
+    def put(self, key: str, plan: dict) -> None:
+        self._remember(key, plan)
+        if self.path is None:
+            return
+        value = json.dumps(plan, ensure_ascii=False, separators=(",", ":"))
+        try:
+            conn = self._db()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO plans (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                             (key, value, len(value.encode("utf-8")), time.time()))
+                with self._lock:
+                    self._puts += 1
+                    check = (self._puts - 1) % DISK_CHECK_EVERY == 0
+                if check:
+                    self._count("disk_evictions", self._evict(conn))
+        except sqlite3.Error:
+            self._count("disk_errors")
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """總大小超過 max_bytes → 從最久沒用的開始刪，刪到 DISK_EVICT_TO 為止；回傳刪了幾筆"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM plans").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        excess = total - int(self.max_bytes * DISK_EVICT_TO)
+        keys, freed = [], 0
+        for key, size in conn.execute("SELECT key, size FROM plans ORDER BY last_used"):
+            if freed >= excess:
+                break
+            keys.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM plans WHERE key = ?", keys)
+        return len(keys)
+
+    def get_or_compute(self, key: str, compute) -> dict:
+        plan = self.get(key)
+        if plan is None:
+            plan = compute()
+            self.put(key, plan)
+        return plan
+
+    def stats(self) -> dict:
+        """命中次數與命中率（本行程）；disk_bytes / disk_items 為整個 SQLite 檔（所有行程共用）"""
+        with self._lock:
+            out = dict(self._stats, memory_items=len(self._memory))
+        lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_rate"] = (out["memory_hits"] + out["disk_hits"]) / lookups if lookups else 0.0
+        if self.path is not None:
+            try:
+                out["disk_items"], out["disk_bytes"] = self._db().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM plans").fetchone()
+            except sqlite3.Error:
+                self._count("disk_errors")
+        return out
+
+    def clear(self, disk: bool = False) -> None:
+        with self._lock:
+            self._memory.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+        if disk and self.path is not None:
+            with self._db() as conn:
+                conn.execute("DELETE FROM plans")
+
+
+_lock = threading.Lock()
+_shared = {}  # SQLite 路徑 -> PlanCache
+
+def shared(path: str = CACHE_PATH) -> PlanCache:
+    """行程共用的 PlanCache（每個 SQLite 檔一個）"""
+    with _lock:
+        cache = _shared.get(path)
+        if cache is None:
+            cache = _shared[path] = PlanCache(path)
+        return cache
+
+
+# --- 對外介面 ---
+def _store(foods) -> food_store.FoodStore:
+    return foods if isinstance(foods, food_store.FoodStore) else food_store.store_for(foods)
+
+def get_plan(foods, weight, age_group: str, activity: str, dry_grams: dict = None, fresh=(),
+             fixed: dict = None, cache: PlanCache = None, warm: dict = None) -> dict:
+    """查快取，沒有才計算；foods 為 FoodStore 或食物表（DataFrame）
+
+    回傳的配方另含 "key"（快取鍵），可當作下游顯示 / 匯出的快取鍵；
+    warm 為上一份配方的 {食材: 克數}，快取沒命中（只改了一個輸入）時拿來熱啟動
+    """
+    foods = _store(foods)
+    request = canonical_request(weight, age_group, activity, dry_grams, fresh, fixed, data=foods.digest)
+    key = plan_key(request)
+    return (cache or shared()).get_or_compute(key, lambda: dict(build_plan(foods, request, warm), key=key))
+
+def get_plans(foods, requests, cache: PlanCache = None) -> list:
+    """批次 API：requests 為 dict 清單（欄位同 get_plan 的參數），依序回傳配方；同一批內相同的輸入只算一次"""
+    foods = _store(foods)
+    cache = cache or shared()
+    done = {}
+    plans = []
+    for r in requests:
+        request = canonical_request(r["weight"], r["age_group"], r["activity"], r.get("dry_grams"),
+                                    r.get("fresh", ()), r.get("fixed"), data=foods.digest)
+        key = plan_key(request)
+        if key not in done:
+            done[key] = cache.get_or_compute(key, lambda: dict(build_plan(foods, request), key=key))
+        plans.append(done[key])
+    return plans
+
+
+if __name__ == "__main__":
+    import food_db
+
+    foods = food_store.load(food_db.DRY_PATH, food_db.FRESH_PATH)
+    cache = shared()
+    for _ in range(2):
+        plan = get_plan(foods, 4.0, "結紮成貓", "中", fresh=["雞胸", "雞蛋", "雞肝", "黃肉地瓜"],
+                        fixed={"雞胸": 50.0, "雞蛋": 0.0})
+    print(json.dumps(plan, ensure_ascii=False, indent=1))
+    print(cache.stats())
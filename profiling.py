@@ -0,0 +1,172 @@
+# --- 效能剖析：具名區段計時 + JSONL 追蹤檔 ---
+# 線上覺得慢時，要知道時間花在資料載入、RER/MER、乾糧扣除、配比求解還是 st.dataframe 繪製。
+# 以環境變數 CAT_PROFILE=1 或網址參數 ?profile=1 開啟；關閉時 span() 回傳共用的空 context，幾乎零成本。
+# 每個區段結束就往追蹤檔附加一行 JSON（多個 session / 行程可同時寫），
+# 之後用 summarize()（或 python profiling.py）彙整各區段的 p50 / p95。
+# 追蹤檔超過 TRACE_MAX_BYTES 就換成 spans.jsonl.1（舊的 .1 往後推，只留 TRACE_BACKUPS 份），長時間開著也不會無限長大。
+# 大小直接取寫完這一行後的檔案位置（不另外 stat）；換檔時以 spans.jsonl.lock 的 fcntl 檔案鎖排除其他行程，
+# 拿到鎖後再確認一次大小，多個行程同時超過上限也只會換一次。換檔當下其他行程剛寫的一行會落在 .1，不會遺失。
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows：只有行程內的鎖
+    fcntl = None
+
+ENV_VAR = "CAT_PROFILE"
+QUERY_PARAM = "profile"
+TRACE_ENV_VAR = "CAT_PROFILE_TRACE"
+TRACE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "traces", "spans.jsonl")
+TRACE_MAX_BYTES = 8 << 20
+TRACE_BACKUPS = 2
+TRUTHY = {"1", "true", "yes", "on"}
+
+_NULL = nullcontext()
+_write_lock = threading.Lock()
+
+
+def enabled(query_params=None) -> bool:
+    """環境變數或網址參數（st.query_params）任一開啟即啟用"""
+    if os.environ.get(ENV_VAR, "").strip().lower() in TRUTHY:
+        return True
+    value = query_params.get(QUERY_PARAM) if query_params is not None else None
+    return value is not None and str(value).strip().lower() in TRUTHY | {""}
+
+def trace_path() -> str:
+    return os.environ.get(TRACE_ENV_VAR) or TRACE_PATH
+
+def _rollover(path: str) -> None:
+    """path 超過 TRACE_MAX_BYTES 時：path.1 → path.2、…、path → path.1，最舊的一份丟掉（呼叫端持有 _write_lock）"""
+    with open(f"{path}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # 關檔時釋放
+        try:
+            if os.path.getsize(path) < TRACE_MAX_BYTES:
+                return  # 其他行程剛換過
+        except OSError:
+            return
+        for i in range(TRACE_BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        if TRACE_BACKUPS > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack.append(self.name)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        self.profiler._stack.pop()
+        self.profiler._record(self.name, seconds, error=exc[0] is not None)
+        return False
+
+
+class Profiler:
+    """一個 session 一個；每次整頁 rerun 呼叫 new_run()，fragment 重跑的區段記在同一個 run 底下"""
+
+    def __init__(self, enabled: bool = False, session: str = None, path: str = None):
+        self.enabled = enabled
+        self.session = session or uuid.uuid4().hex[:12]
+        self.path = path or trace_path()
+        self.run = 0
+        self.records = []
+        self._stack = []
+        self._t_run = time.perf_counter()
+
+    def new_run(self, enabled: bool = None) -> None:
+        if enabled is not None:
+            self.enabled = enabled
+        self.run += 1
+        self.records = []
+        self._stack = []
+        self._t_run = time.perf_counter()
+
+    def finish_run(self) -> None:
+        """整頁 rerun 的總時間記成 "rerun" 區段"""
+        if self.enabled:
+            self._record("rerun", time.perf_counter() - self._t_run)
+
+    def span(self, name: str):
+        """with profiler.span("dry_deduction"): ...；巢狀區段會記下上一層的名稱"""
+        return _Span(self, name) if self.enabled else _NULL
+
+    def _record(self, name: str, seconds: float, error: bool = False) -> None:
+        rec = {
+            "ts": round(time.time(), 3),
+            "session": self.session,
+            "run": self.run,
+            "span": name,
+            "parent": self._stack[-1] if self._stack else None,
+            "ms": round(seconds * 1e3, 3),
+        }
+        if error:
+            rec["error"] = True
+        self.records.append(rec)
+        line = (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8")
+        with _write_lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # 每次重新開檔（附加模式）：其他行程換檔後，下一行就會寫進新的檔
+            with open(self.path, "ab") as f:
+                f.write(line)
+                size = f.tell()
+            if size >= TRACE_MAX_BYTES:
+                _rollover(self.path)
+
+    def table(self) -> pd.DataFrame:
+        """這次 rerun 的各區段（依結束順序）"""
+        df = pd.DataFrame(self.records, columns=["span", "parent", "ms"])
+        return df.rename(columns={"span": "區段", "parent": "上層", "ms": "毫秒"})
+
+
+def load(path: str = None) -> pd.DataFrame:
+    """追蹤檔（含換下來的 .1、.2…，由舊到新）"""
+    path = path or trace_path()
+    files = [f"{path}.{i}" for i in range(TRACE_BACKUPS, 0, -1)] + [path]
+    records = []
+    for name in files:
+        if os.path.exists(name):
+            with open(name, encoding="utf-8") as f:
+                records += [json.loads(line) for line in f if line.strip()]
+    if not records:
+        return pd.DataFrame(columns=["ts", "session", "run", "span", "parent", "ms"])
+    return pd.DataFrame(records)
+
+def summarize(path: str = None) -> pd.DataFrame:
+    """各區段跨 session 的次數 / p50 / p95 / 最大值（毫秒）"""
+    df = load(path)
+    if df.empty:
+        return pd.DataFrame(columns=["span", "count", "p50_ms", "p95_ms", "max_ms", "sessions"])
+    g = df.groupby("span")
+    out = pd.DataFrame({
+        "count": g["ms"].size(),
+        "p50_ms": g["ms"].quantile(0.5),
+        "p95_ms": g["ms"].quantile(0.95),
+        "max_ms": g["ms"].max(),
+        "sessions": g["session"].nunique(),
+    })
+    return out.sort_values("p95_ms", ascending=False).reset_index()
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(summarize(sys.argv[1] if len(sys.argv) > 1 else None).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
@@ -0,0 +1,301 @@
+# --- 自動推薦食譜：在整個食物資料庫中挑 k 種食材（分支定界 + 行程池） ---
+# 使用者不必先選食材：給定鮮食要補的 [kcal, 蛋白, 脂肪, 碳水]、允許的分類與最多 k 種食材，
+# 找出「最佳克數（solver.solve 的 NNLS）殘差最小」的前 N 組食材組合。
+#
+# 搜尋樹：食材依單獨使用時的殘差排序後編號，節點 = (已選集合 C, 下一個可選編號 j)，
+# 子節點依序加入 j, j+1, ...，每個節點本身也是一組候選（食材數 ≤ k 皆可）。
+# 下界：C ∪ {j, j+1, ...} 全部食材、不限種類數的 NNLS 殘差——子樹內任何組合都只是它的子集合，
+# 殘差不會更小。j 越大集合越小、下界只增不減，所以下界一旦 ≥ 目前第 N 名就可以整段剪掉。
+# 移除的食材不在上一次 NNLS 解的支撐集時，解不變，不必重算下界。
+#
+# 根節點的子樹切成多段分給行程池；各行程共用一個「目前第 N 名殘差」門檻（multiprocessing.Value），
+# 主行程每收到一段結果就合併並 yield 目前的前 N 名；超過時間預算就停止並回傳目前最好的結果。
+# 行程池整個行程共用一個（延後建立，最多 MAX_WORKERS 個 worker）：頁面上多個 session 同時搜尋時
+# 共用同一批 worker，而不是每次按下搜尋就開一批；門檻放在池建立時分好的 SEARCH_SLOTS 格，
+# 每次搜尋借一格，格子用完時後來的搜尋等前面的結束。
+import heapq
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+import solver
+
+DEFAULT_CATEGORIES = ["肉類", "魚貝類", "蛋類"]
+MACRO_COLUMNS = ["熱量(kcal)", "粗蛋白(g)", "粗脂肪(g)", "總碳水化合物(g)"]
+# 熱量密度太低的食材（大骨湯等）要吃好幾公斤才補得滿，不列入候選
+MIN_KCAL_PER_G = 0.8
+GRAM_TOL = 1e-6         # 克數 ≤ 此值視為沒用到（同一組解會在較小的組合被記錄）
+# 根節點切成幾段：至少每個行程 CHUNKS_PER_WORKER 段，且每段約 CHUNK_NODES 個節點（約 0.2 秒），
+# 段越多，門檻在行程間更新得越頻繁、結果回傳得越即時
+CHUNKS_PER_WORKER = 32
+CHUNK_NODES = 200_000
+MAX_WORKERS = 4         # 共用行程池的大小上限（Streamlit 伺服器還要服務其他 session）
+SEARCH_SLOTS = 8        # 同時進行的平行搜尋數上限
+
+
+def candidates(m, categories=DEFAULT_CATEGORIES, min_kcal_per_g: float = MIN_KCAL_PER_G) -> tuple:
+    """fda_matrix.NutrientMatrix 中指定分類、熱量密度夠的食材 → (名稱, (n, 4) 每 1g 宏量)"""
+    macro = np.nan_to_num(np.asarray(m.columns(MACRO_COLUMNS), dtype=float)) / 100.0
+    keep = macro[:, 0] >= min_kcal_per_g
+    if categories is not None:
+        keep &= np.isin(m.foods["category"], list(categories))
+    rows = np.flatnonzero(keep)
+    return [m.foods["name"][i] for i in rows], macro[rows]
+
+
+# --- 行程內的搜尋 ---
+_A = None           # (4, n) 已加權的係數矩陣，食材依排序後的編號
+_b = None
+_threshold = None   # multiprocessing.Value：全域第 N 名殘差（剪枝門檻）
+_slots = None       # 共用行程池：各次搜尋的門檻（SEARCH_SLOTS 個 multiprocessing.Value）
+
+def _init(A, b, threshold) -> None:
+    global _A, _b, _threshold
+    _A, _b, _threshold = A, b, threshold
+
+def _init_pool(slots) -> None:
+    global _slots
+    _slots = slots
+
+def _pool_chunk(A, b, slot: int, k: int, n_best: int, start: int, stop: int, deadline: float) -> dict:
+    """共用行程池的工作：換上這次搜尋的係數與門檻後搜一段"""
+    _init(A, b, _slots[slot])
+    return _search_chunk(k, n_best, start, stop, deadline)
+
+def _relaxed(cols: np.ndarray) -> tuple:
+    """cols 全部食材、不限種類數的 NNLS → (殘差, 支撐集的欄位編號)"""
+    if len(cols) == 0:
+        return float(np.linalg.norm(_b)), np.array([], dtype=np.intp)
+    from scipy.optimize import nnls
+
+    x, r = nnls(_A[:, cols], _b)
+    return r, cols[x > GRAM_TOL]
+
+def _leaves(base: np.ndarray, lo: int, hi: int) -> tuple:
+    """C ∪ {j}（j = lo ~ hi-1）一次解完：堆疊的正規方程
+
+    無限制最小平方的解全部 > 0 時就是 NNLS 的解；有 ≤ 0 的克數時，NNLS 的解會落在
+    較小的組合上（已在別處記錄），直接略過。回傳 (j, 殘差, 克數) 中有效的那些。
+    """
+    js = np.arange(lo, hi)
+    A = np.concatenate([np.broadcast_to(_A[:, base], (len(js), *_A[:, base].shape)),
+                        _A[:, js].T[:, :, None]], axis=2)                     # (m, 4, |C|+1)
+    At = A.transpose(0, 2, 1)
+    try:
+        x = np.linalg.solve(At @ A, (At @ _b)[:, :, None])[:, :, 0]
+    except np.linalg.LinAlgError:
+        x = (np.linalg.pinv(A) @ _b)
+    ok = (x > GRAM_TOL).all(axis=1)
+    r = np.linalg.norm(np.einsum("mik,mk->mi", A[ok], x[ok]) - _b, axis=1)
+    return js[ok], r, x[ok]
+
+def _search_chunk(k: int, n_best: int, start: int, stop: int, deadline: float) -> dict:
+    """處理根節點第 start ~ stop-1 個子樹；回傳本段的前 n_best 名與統計"""
+    n = _A.shape[1]
+    best = []       # max-heap：(-殘差, 食材編號 tuple, 克數)
+    stats = {"nodes": 0, "pruned": 0, "timed_out": False}
+
+    def bar() -> float:
+        local = -best[0][0] if len(best) >= n_best else np.inf
+        return min(local, _threshold.value)
+
+    def record(chosen: tuple, r: float, x: np.ndarray) -> None:
+        heapq.heappush(best, (-r, chosen, x))
+        if len(best) > n_best:
+            heapq.heappop(best)
+        if len(best) >= n_best:
+            with _threshold.get_lock():
+                _threshold.value = min(_threshold.value, -best[0][0])
+
+    def expand(chosen: tuple, lo: int, hi: int) -> None:
+        """依序加入 lo ~ hi-1 的食材；下界超過門檻時剩下的都剪掉"""
+        base = np.array(chosen, dtype=np.intp)
+        # 子節點 C ∪ {j} 都是候選組合，一次解完；|C| + 1 = k 時它們就是葉節點
+        js, rs, xs = _leaves(base, lo, hi)
+        stats["nodes"] += hi - lo
+        for i in np.argsort(rs)[:n_best]:
+            if rs[i] >= bar():
+                break
+            record(chosen + (int(js[i]),), rs[i], xs[i])
+        if len(chosen) + 1 >= k:
+            return
+
+        bound, support = _relaxed(np.concatenate([base, np.arange(lo, n)]))
+        for j in range(lo, hi):
+            if time.time() > deadline:
+                stats["timed_out"] = True
+                return
+            if j > lo and (j - 1) in support:
+                # 上一個食材被移出候選，而它在 NNLS 的解裡：重算下界
+                bound, support = _relaxed(np.concatenate([base, np.arange(j, n)]))
+            if bound >= bar():
+                stats["pruned"] += hi - j
+                return
+            expand(chosen + (j,), j + 1, n)
+
+    expand((), start, stop)
+    return {"plans": [(-r, c, x) for r, c, x in best], **stats}
+
+
+# --- 對外介面 ---
+def _order(matrix: np.ndarray, target: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """依單獨使用一種食材時的最佳殘差排序：好食材先搜，門檻很快就會變緊"""
+    A = scale[:, None] * matrix.T
+    b = scale * target
+    # 單一欄的非負最小平方有封閉解 x = max(aᵀb, 0) / aᵀa
+    ab = A.T @ b
+    aa = np.maximum((A * A).sum(axis=0), 1e-300)
+    x = np.maximum(ab, 0.0) / aa
+    r = np.linalg.norm(A * x - b[:, None], axis=0)
+    return np.argsort(r, kind="stable")
+
+def _chunks(n: int, k: int, min_chunks: int) -> list:
+    """依子樹大小切段：第 j 個根子樹約有 C(n-j-1, k-1) 個節點，越前面越大，等分編號會嚴重失衡"""
+    j = np.arange(n)
+    work = np.ones(n)
+    for i in range(1, k):
+        work *= np.maximum(n - j - i, 1) / i
+    cum = np.concatenate([[0.0], np.cumsum(work)])
+    n_chunks = int(min(n, max(min_chunks, np.ceil(cum[-1] / CHUNK_NODES))))
+    edges = np.unique(np.searchsorted(cum, np.linspace(0, cum[-1], n_chunks + 1)))
+    edges[0], edges[-1] = 0, n
+    return [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+def _plan(names, matrix, target, scale, cols, grams, rnorm) -> dict:
+    cols = list(cols)
+    achieved = grams @ matrix[cols]
+    return {
+        "names": [names[i] for i in cols],
+        "grams": grams,
+        "achieved": achieved,            # [kcal, 蛋白, 脂肪, 碳水]
+        "residual": achieved - target,
+        "rnorm": rnorm,                  # 加權殘差（同 solver.solve）
+    }
+
+_lock = threading.Lock()
+_pools = {}  # worker 數 -> (ProcessPoolExecutor, 門檻格, 空出來的格子編號)
+
+def shared_pool(workers: int) -> tuple:
+    """行程共用的行程池（每種 worker 數一個，第一次搜尋時才建立）"""
+    with _lock:
+        entry = _pools.get(workers)
+        if entry is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            slots = [multiprocessing.Value("d", np.inf) for _ in range(SEARCH_SLOTS)]
+            free = queue.Queue()
+            for i in range(SEARCH_SLOTS):
+                free.put(i)
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_pool, initargs=(slots,))
+            entry = _pools[workers] = (pool, slots, free)
+        return entry
+
+def _release(free: queue.Queue, slot: int, futures: list) -> None:
+    """這次搜尋的工作全部結束（完成或取消）後才歸還門檻格，避免還在跑的段落改到下一次搜尋的門檻"""
+    left = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            left[0] -= 1
+            last = left[0] == 0
+        if last:
+            free.put(slot)
+
+    if not futures:
+        free.put(slot)
+    for fut in futures:
+        fut.add_done_callback(done)
+
+def search(names, matrix: np.ndarray, target, k: int = 3, n_best: int = 5, time_budget: float = 5.0,
+           workers: int = None, weights: dict = None, kcal_weight: float = solver.KCAL_WEIGHT):
+    """產生器：每完成一段子樹就 yield 一次目前的結果
+
+    yield 的 dict：plans（前 n_best 名，殘差由小到大）、nodes / pruned（已搜尋 / 剪掉的節點數）、
+    done（搜完整棵樹）、timed_out、seconds。workers 預設 min(CPU 數, MAX_WORKERS)，
+    > 1 時用共用行程池（shared_pool），≤ 1 時在目前行程內依序執行。
+    """
+    from scipy.optimize import nnls
+
+    t0 = time.time()
+    deadline = t0 + time_budget
+    target = np.asarray(target, dtype=float)
+    matrix = np.nan_to_num(np.asarray(matrix, dtype=float))
+    scale = solver.row_scale(target, weights, kcal_weight)
+    order = _order(matrix, target, scale)
+    A = np.ascontiguousarray(scale[:, None] * matrix[order].T)
+    b = scale * target
+    n = A.shape[1]
+
+    workers = min(os.cpu_count() or 1, MAX_WORKERS) if workers is None else workers
+    chunks = _chunks(n, k, max(workers, 1) * CHUNKS_PER_WORKER)
+
+    threshold = multiprocessing.Value("d", np.inf)
+    best = []
+    state = {"nodes": 0, "pruned": 0, "timed_out": False, "chunks_done": 0}
+
+    def merge(part: dict, chunk: bool = True) -> dict:
+        for r, cols, x in part["plans"]:
+            if cols not in {c for _, c, _ in best}:
+                best.append((r, cols, x))
+        best.sort(key=lambda t: t[0])
+        del best[n_best:]
+        if len(best) >= n_best:
+            with threshold.get_lock():
+                threshold.value = min(threshold.value, best[-1][0])
+        state["nodes"] += part["nodes"]
+        state["pruned"] += part["pruned"]
+        state["timed_out"] |= part["timed_out"]
+        state["chunks_done"] += chunk
+        return {
+            "plans": [_plan(names, matrix, target, scale, order[list(c)], x, r) for r, c, x in best],
+            "nodes": state["nodes"],
+            "pruned": state["pruned"],
+            "done": state["chunks_done"] == len(chunks) and not state["timed_out"],
+            "timed_out": state["timed_out"],
+            "seconds": time.time() - t0,
+        }
+
+    # 種子：不限種類數的 NNLS 解最多用到 4 種食材（4 條方程）；種類數 ≤ k 時它就是最佳組合，
+    # 先回傳給使用者，n_best = 1 時整棵樹也會立刻被剪掉
+    x, r = nnls(A, b)
+    support = np.flatnonzero(x > GRAM_TOL)
+    seed = [(r, tuple(int(i) for i in support), x[support])] if 0 < len(support) <= k else []
+    yield merge({"plans": seed, "nodes": 1, "pruned": 0, "timed_out": False}, chunk=False)
+
+    if workers <= 1:
+        _init(A, b, threshold)
+        for lo, hi in chunks:
+            yield merge(_search_chunk(k, n_best, lo, hi, deadline))
+            if time.time() > deadline:
+                break
+        return
+
+    from concurrent.futures import as_completed
+
+    pool, slots, free = shared_pool(workers)
+    slot = free.get()
+    slots[slot].value = np.inf
+    futures = []
+    try:
+        futures = [pool.submit(_pool_chunk, A, b, slot, k, n_best, lo, hi, deadline) for lo, hi in chunks]
+        # 每段都會自己檢查期限；多留一點時間給最後一批結果傳回來
+        for fut in as_completed(futures, timeout=max(deadline - time.time(), 0) + 1.0):
+            yield merge(fut.result())
+    except TimeoutError:
+        yield merge({"plans": [], "nodes": 0, "pruned": 0, "timed_out": True}, chunk=False)
+    finally:
+        for fut in futures:
+            fut.cancel()
+        _release(free, slot, futures)
+
+def best_plans(names, matrix: np.ndarray, target, **kwargs) -> dict:
+    """跑完 search()，回傳最後一次的結果"""
+    result = None
+    for result in search(names, matrix, target, **kwargs):
+        pass
+    return result
@@ -0,0 +1,274 @@
+# --- 多隻貓備餐單與採購清單匯出（串流） ---
+# 貓舍 / 中途之家一次要準備 50–500 隻貓、7–30 天的份量。讀一份名冊，每隻貓依固定克數模式算出每日配方
+# （plan_cache.get_plan，相同輸入的貓只算一次），逐隻寫出備餐列，最後附上整批的採購清單。
+#   名冊（CSV 或 XLSX）欄位：貓名、體重(kg)、年齡層、活動量、備餐天數、乾糧、鮮食
+#     乾糧 / 鮮食寫成「名稱:克數;名稱:克數」；鮮食不寫克數（或 0）代表由系統補足，與頁面的固定克數模式相同
+#   輸出：
+#     .csv  → <名稱>_prep.csv（每隻貓每項食材一列，含該食材到目前為止的累計克數）、<名稱>_shopping.csv
+#     .xlsx → 同一個活頁簿的「備餐單」、「採購清單」、「錯誤」工作表（openpyxl write-only 模式）
+#   有問題的貓（未知的食材、年齡層…）不中斷整批，記在 <名稱>_errors.csv /「錯誤」工作表。
+# 名冊以 CHUNK_CATS 隻為一塊讀進來、交給行程池計算，在途的塊數有上限，寫完就丟：
+# 記憶體只跟塊大小與食材種類數有關，與名冊長度無關。輸出順序與名冊相同。
+# 執行：python roster_export.py roster.csv out.xlsx [--workers N] [--chunk 64]
+import argparse
+import csv
+import os
+import time
+from collections import deque
+
+import pandas as pd
+
+import food_db
+import food_store
+import plan_cache
+
+ROSTER_COLUMNS = {
+    "name": "貓名",
+    "weight": "體重(kg)",
+    "age_group": "年齡層",
+    "activity": "活動量",
+    "days": "備餐天數",
+    "dry": "乾糧",
+    "fresh": "鮮食",
+}
+PREP_COLUMNS = ["貓名", "類別", "食材", "每日克數(g)", "天數", "總克數(g)", "該食材累計(g)"]
+SHOPPING_COLUMNS = ["類別", "食材", "總克數(g)", "貓數"]
+ERROR_COLUMNS = ["列", "貓名", "錯誤"]
+CHUNK_CATS = 64
+MAX_PENDING = 2  # 每個 worker 最多同時排幾塊（限制在途的資料量）
+DRY, FRESH = "乾糧", "鮮食"
+
+
+def parse_items(text) -> dict:
+    """「雞胸:50;雞蛋」→ {"雞胸": 50.0, "雞蛋": 0.0}；全形「：；」也可以；空白或 NaN → {}；負的克數丟 ValueError"""
+    if not isinstance(text, str):
+        return {}
+    items = {}
+    for part in text.replace("；", ";").replace("：", ":").split(";"):
+        name, _, grams = part.partition(":")
+        name, grams = name.strip(), grams.strip()
+        if name:
+            g = float(grams) if grams else 0.0
+            if not g >= 0:
+                raise ValueError(f"{name} 的克數不可為負：{grams}")
+            items[name] = items.get(name, 0.0) + g
+    return items
+
+
+# --- 讀名冊（一次一塊） ---
+def _xlsx_chunks(path: str, chunksize: int):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(c).strip() if c is not None else "" for c in next(rows, ())]
+        block = []
+        for row in rows:
+            if any(c is not None for c in row):
+                block.append(row[:len(header)])
+            if len(block) == chunksize:
+                yield pd.DataFrame(block, columns=header)
+                block = []
+        if block:
+            yield pd.DataFrame(block, columns=header)
+    finally:
+        wb.close()
+
+def read_roster(path: str, chunksize: int = CHUNK_CATS):
+    """依序產生 [{"row", "name", "weight", ...}, ...]，每塊最多 chunksize 隻"""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        chunks = _xlsx_chunks(path, chunksize)
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize, dtype=str, encoding="utf-8-sig")
+    start = 0
+    for chunk in chunks:
+        missing = [c for k, c in ROSTER_COLUMNS.items() if k not in ("dry", "fresh") and c not in chunk.columns]
+        if missing:
+            raise ValueError(f"名冊缺少欄位：{missing}")
+        cols = {c: k for k, c in ROSTER_COLUMNS.items() if c in chunk.columns}
+        records = chunk[list(cols)].rename(columns=cols).to_dict("records")
+        for i, r in enumerate(records):
+            r["row"] = start + i + 2  # 試算表的列號（第 1 列是標題）
+        start += len(records)
+        yield records
+
+
+# --- 每一塊的計算（在 worker 行程內執行） ---
+_paths = (food_db.DRY_PATH, food_db.FRESH_PATH)
+_cache_path = plan_cache.CACHE_PATH
+
+def _init_worker(dry_path: str, fresh_path: str, cache_path: str = plan_cache.CACHE_PATH) -> None:
+    global _paths, _cache_path
+    _paths = (dry_path, fresh_path)
+    _cache_path = cache_path
+
+def cat_rows(foods, cat: dict, cache: plan_cache.PlanCache = None) -> list:
+    """一隻貓 → [(類別, 食材, 每日克數), ...]：乾糧照名冊，鮮食為配方的每日備餐清單（固定 + 補足，0 g 的不列）
+
+    體重 ≤ 0、負的克數丟 ValueError（同 service.parse_request），整隻貓記進錯誤表
+    """
+    weight = float(cat["weight"])
+    if not weight > 0:
+        raise ValueError(f"體重需大於 0：{cat['weight']}")
+    dry = {k: v for k, v in parse_items(cat.get("dry")).items() if v > 0}
+    fixed = parse_items(cat.get("fresh"))
+    missing = sorted(n for n in [*dry, *fixed] if n not in foods)
+    if missing:
+        raise KeyError(f"找不到食材：{missing}")
+    plan = plan_cache.get_plan(foods, weight, str(cat["age_group"]).strip(),
+                               str(cat["activity"]).strip(), dry_grams=dry, fixed=fixed, cache=cache)
+    return ([(DRY, name, grams) for name, grams in dry.items()]
+            + [(FRESH, name, grams) for name, grams in plan["prep"] if grams > 0])
+
+def compute_chunk(records: list) -> list:
+    """[(貓, 天數, 每日列, None) 或 (貓, None, None, 錯誤訊息), ...]，順序同輸入"""
+    foods = food_store.load(*_paths)
+    cache = plan_cache.shared(_cache_path)
+    out = []
+    for cat in records:
+        try:
+            days = float(cat["days"])
+            if not (days >= 1 and days.is_integer()):
+                raise ValueError(f"備餐天數需為 ≥ 1 的整數：{cat['days']}")
+            days = int(days)
+            out.append((cat, days, cat_rows(foods, cat, cache), None))
+        except (KeyError, ValueError, TypeError) as e:
+            msg = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+            out.append((cat, None, None, f"{type(e).__name__}: {msg}"))
+    return out
+
+
+# --- 輸出 ---
+class _CsvSink:
+    def __init__(self, out_path: str):
+        stem = os.path.splitext(out_path)[0]
+        self.paths = {"prep": f"{stem}_prep.csv", "shopping": f"{stem}_shopping.csv", "errors": f"{stem}_errors.csv"}
+        # 錯誤檔只在有錯誤時才建立：先刪掉上一次留下的，免得沒有錯誤時舊的錯誤檔看起來像這次的
+        try:
+            os.remove(self.paths["errors"])
+        except FileNotFoundError:
+            pass
+        self._files = {}
+        self._writers = {}
+
+    def _writer(self, kind: str, header: list):
+        if kind not in self._writers:
+            f = self._files[kind] = open(self.paths[kind], "w", newline="", encoding="utf-8-sig")
+            self._writers[kind] = csv.writer(f)
+            self._writers[kind].writerow(header)
+        return self._writers[kind]
+
+    def prep(self, rows: list) -> None:
+        self._writer("prep", PREP_COLUMNS).writerows(rows)
+
+    def error(self, row: list) -> None:
+        self._writer("errors", ERROR_COLUMNS).writerow(row)
+
+    def close(self, shopping: list) -> list:
+        self._writer("prep", PREP_COLUMNS)
+        self._writer("shopping", SHOPPING_COLUMNS).writerows(shopping)
+        for f in self._files.values():
+            f.close()
+        return [p for k, p in self.paths.items() if k in self._files]
+
+class _XlsxSink:
+    def __init__(self, out_path: str):
+        from openpyxl import Workbook
+
+        self.path = out_path
+        self.wb = Workbook(write_only=True)  # 逐列寫進暫存檔，不在記憶體留整張表
+        self.prep_ws = self.wb.create_sheet("備餐單")
+        self.prep_ws.append(PREP_COLUMNS)
+        self.shopping_ws = self.wb.create_sheet("採購清單")
+        self.errors_ws = None
+
+    def prep(self, rows: list) -> None:
+        for row in rows:
+            self.prep_ws.append(row)
+
+    def error(self, row: list) -> None:
+        if self.errors_ws is None:
+            self.errors_ws = self.wb.create_sheet("錯誤")
+            self.errors_ws.append(ERROR_COLUMNS)
+        self.errors_ws.append(row)
+
+    def close(self, shopping: list) -> list:
+        self.shopping_ws.append(SHOPPING_COLUMNS)
+        for row in shopping:
+            self.shopping_ws.append(row)
+        self.wb.save(self.path)
+        return [self.path]
+
+
+def export(roster_path: str, out_path: str, workers: int = None, chunksize: int = CHUNK_CATS,
+           dry_path: str = food_db.DRY_PATH, fresh_path: str = food_db.FRESH_PATH,
+           cache_path: str = plan_cache.CACHE_PATH, progress=None) -> dict:
+    """名冊 → 備餐單 + 採購清單；回傳 {"cats", "errors", "rows", "ingredients", "files", "seconds"}
+
+    workers：行程池大小（預設 CPU 數；1 = 在本行程內逐塊計算）
+    cache_path：配方快取（plan_cache）的 SQLite 路徑，各 worker 共用
+    progress：每寫完一塊呼叫 progress(已處理的貓數)
+    """
+    t0 = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    sink = _XlsxSink(out_path) if out_path.lower().endswith(".xlsx") else _CsvSink(out_path)
+    totals = {}  # (類別, 食材) -> [總克數, 貓數]
+    summary = {"cats": 0, "errors": 0, "rows": 0}
+
+    def write(results: list) -> None:
+        rows = []
+        for cat, days, daily, error in results:
+            summary["cats"] += 1
+            if error is not None:
+                summary["errors"] += 1
+                sink.error([cat["row"], cat.get("name"), error])
+                continue
+            for kind, name, grams in daily:
+                total = totals.setdefault((kind, name), [0.0, 0])
+                total[0] += grams * days
+                total[1] += 1
+                rows.append([cat.get("name"), kind, name, round(grams, 1), days, round(grams * days, 1),
+                             round(total[0], 1)])
+        sink.prep(rows)
+        summary["rows"] += len(rows)
+        if progress is not None:
+            progress(summary["cats"])
+
+    chunks = read_roster(roster_path, chunksize)
+    if workers == 1:
+        _init_worker(dry_path, fresh_path, cache_path)
+        for records in chunks:
+            write(compute_chunk(records))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(dry_path, fresh_path, cache_path)) as pool:
+            pending = deque()
+            for records in chunks:
+                pending.append(pool.submit(compute_chunk, records))
+                if len(pending) >= workers * MAX_PENDING:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    shopping = [[kind, name, round(g, 1), n] for (kind, name), (g, n) in sorted(totals.items())]
+    files = sink.close(shopping)
+    return dict(summary, ingredients=len(shopping), files=files, seconds=time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="多隻貓備餐單與採購清單匯出")
+    ap.add_argument("roster", help="名冊 CSV / XLSX")
+    ap.add_argument("out", help="輸出 .xlsx，或 .csv（會寫成 <名稱>_prep.csv 與 <名稱>_shopping.csv）")
+    ap.add_argument("--workers", type=int, default=None, help="行程池大小（預設 CPU 數）")
+    ap.add_argument("--chunk", type=int, default=CHUNK_CATS, help="每塊幾隻貓")
+    args = ap.parse_args()
+    result = export(args.roster, args.out, args.workers, args.chunk)
+    print(f"{result['cats']} 隻貓（{result['errors']} 隻有錯誤）、{result['rows']} 列備餐、"
+          f"{result['ingredients']} 項採購，{result['seconds']:.2f} s → {', '.join(result['files'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# --- 多天輪替菜單（每天補滿熱量與宏量，微量營養素以整個週期的平均計） ---
+# 同兩種食材一直吃不好，飼主會在一週內輪替蛋白質來源。輸入：
+#   食材池（衛福部營養資料庫的名稱）、幾份菜單（每份是食材池的一部分）、排程（例如 "ABACABC"，一個字母一天）
+# 每一天：鮮食補滿當天的熱量、蛋白 / 脂肪 / 碳水最接近缺口（同 diet_lp 的 L1 相對誤差）；
+# 整個週期：各天加總後的微量營養素達到 AAFCO 每 1000 kcal 的最低量、不超過上限、鈣磷比在範圍內。
+# 某幾天吃得不夠的，由其他天補回來 —— 單一天常常做不到，一週平均就可以。
+#
+# 線性規劃：每天的食材克數與宏量偏差各是一組變數，熱量等式逐天成立，微量營養素的列對所有天加總
+# （與 diet_lp.solve 同一套 micro_constraints，只是欄位是「第幾天的哪種食材」）。
+# 增量重算：Planner 記住每一天的菜單與解。使用者改了某天的菜單、或換掉某份菜單裡的一種食材時，
+# 只有菜單變了的那幾天是變數，其他天的克數沿用、它們提供的營養量當作已知（diet_lp 的 fixed）；
+# 這樣解不出來時才整週重解，整週也解不出來就退回逐天 NNLS（只補宏量，微量營養素照實回報未達標）。
+# 週期營養總量與備餐總克數（每種食材整個週期要準備多少）也只扣掉舊的那幾天、加上新的。
+import time
+
+import numpy as np
+import pandas as pd
+
+import aafco
+import diet_lp
+import solver
+
+LETTERS = "ABCDEFG"
+MIN_GRAMS = 0.05  # 低於此克數的食材不列出（同頁面的微量營養素模式）
+
+
+def parse_schedule(pattern: str, menus: dict) -> list:
+    """"ABAC…" → 每天一份菜單字母；空白與分隔符號略過，大小寫不拘"""
+    days = [c for c in pattern.upper() if c.isalpha()]
+    unknown = sorted(set(days) - set(menus))
+    if unknown:
+        raise KeyError(f"排程用到未定義的菜單：{unknown}")
+    return days
+
+def default_schedule(menu_count: int, days: int = 7) -> str:
+    return "".join(LETTERS[i % menu_count] for i in range(days))
+
+
+def solve_days(macro_blocks, micro_blocks, target, energy: float, fixed=None, keys=None, stage: str = "adult",
+               max_grams=None, weights: dict = None, ca_p: tuple = aafco.CA_P_RATIO) -> dict:
+    """每天一組 (n_d, 4) 宏量 / (n_d, k) 微量 → 各天克數
+
+    target：每天鮮食要補的 [kcal, 蛋白, 脂肪, 碳水]
+    energy：換算每 1000 kcal 用的「整個週期」總熱量（含不在這次變數裡的其他天）
+    fixed：其他天與乾糧已提供的 keys 營養素總量
+    """
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    t0 = time.perf_counter()
+    keys, lo, hi = aafco.limits(stage, keys)
+    target = np.asarray(target, dtype=float)
+    fixed = np.zeros(len(keys)) if fixed is None else np.asarray(fixed, dtype=float)
+    w = dict(solver.DEFAULT_WEIGHTS, **(weights or {}))
+    wvec = np.array([w["protein"], w["fat"], w["carb"]])
+
+    # 變數依天排列：[第 1 天的食材…, 第 1 天的 6 個偏差, 第 2 天的食材…, …]
+    eq_scale = 1.0 / np.maximum(target, solver.MIN_SCALE_TARGET)
+    dev = sparse.vstack([sparse.csr_matrix((1, 6)), sparse.hstack([-sparse.eye(3), sparse.eye(3)])])
+    eq_blocks, micro_rows, c, upper = [], [], [], []
+    for macro, micro in zip(macro_blocks, micro_blocks):
+        macro = np.nan_to_num(np.asarray(macro, dtype=float))
+        n = len(macro)
+        eq_blocks.append(sparse.hstack([sparse.csr_matrix(macro.T * eq_scale[:, None]), sparse.diags(eq_scale) @ dev]))
+        micro_rows += [np.nan_to_num(np.asarray(micro, dtype=float)), np.zeros((6, len(keys)))]
+        c += [np.zeros(n), wvec, wvec]
+        upper += [np.broadcast_to(np.inf if max_grams is None else float(max_grams), (n,)), np.full(6, np.inf)]
+    A_eq = sparse.block_diag(eq_blocks, format="csr")
+    b_eq = np.tile(target * eq_scale, len(eq_blocks))
+    A_ub, b_ub, _, _ = diet_lp.micro_constraints(np.vstack(micro_rows), keys, lo, hi, energy, fixed, ca_p)
+    upper = np.concatenate(upper)
+    bounds = np.column_stack([np.zeros(len(upper)), upper])
+
+    res = linprog(np.concatenate(c), A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method="highs")
+    grams, start = [], 0
+    for macro in macro_blocks:
+        n = len(macro)
+        grams.append(np.maximum(res.x[start:start + n], 0.0) if res.status == 0 else np.zeros(n))
+        start += n + 6
+    return {"status": {0: "optimal", 2: "infeasible"}.get(res.status, "error"), "message": res.message,
+            "grams": grams, "seconds": time.perf_counter() - t0}
+
+
+class Planner:
+    """固定食材池、目標與標準；update() 每次只重解菜單有變的那幾天"""
+
+    def __init__(self, m, pool, target, energy: float, stage: str = "adult", max_grams=None):
+        """m：fda_matrix.NutrientMatrix；target：每天鮮食要補的 [kcal, 蛋白, 脂肪, 碳水]；energy：每天換算標準用的熱量（見 diet_lp.solve）"""
+        names, macro, micro = diet_lp.candidates(m, names=list(pool))
+        self.pos = {name: i for i, name in enumerate(names)}
+        self.macro, self.micro = macro, micro
+        self.keys, self.lo, self.hi = aafco.limits(stage)
+        self.target = np.asarray(target, dtype=float)
+        self.energy = float(energy)
+        self.stage = stage
+        self.max_grams = max_grams
+        self.days = []      # 每天的菜單（排序後的食材名稱 tuple）
+        self.grams = []     # 每天的克數（與菜單同順序）
+        self.amount = np.zeros(len(self.keys))  # 整個週期的微量營養素總量
+        self.achieved = np.zeros(4)             # 整個週期的宏量總量
+        self.prep = {}      # 食材 -> [整個週期總克數, 使用天數]
+        self.mode = None
+        self._macro_only = {}  # 菜單 -> NNLS 克數（線性規劃解不出來時的退路）
+
+    def _blocks(self, menus) -> tuple:
+        rows = [[self.pos[n] for n in menu] for menu in menus]
+        return [self.macro[r] for r in rows], [self.micro[r] for r in rows]
+
+    def _contribution(self, menu, grams) -> tuple:
+        rows = [self.pos[n] for n in menu]
+        return grams @ self.micro[rows], grams @ self.macro[rows]
+
+    def _set_day(self, d: int, menu: tuple, grams: np.ndarray) -> None:
+        """換掉第 d 天的解，週期總量與備餐總克數只扣舊加新"""
+        if d < len(self.days):
+            amount, achieved = self._contribution(self.days[d], self.grams[d])
+            self.amount -= amount
+            self.achieved -= achieved
+            for name, g in zip(self.days[d], self.grams[d]):
+                if g > MIN_GRAMS:
+                    item = self.prep[name]
+                    item[0] -= g
+                    item[1] -= 1
+                    if item[1] == 0:
+                        del self.prep[name]
+        else:
+            self.days.append(menu)
+            self.grams.append(grams)
+        amount, achieved = self._contribution(menu, grams)
+        self.amount += amount
+        self.achieved += achieved
+        for name, g in zip(menu, grams):
+            if g > MIN_GRAMS:
+                item = self.prep.setdefault(name, [0.0, 0])
+                item[0] += g
+                item[1] += 1
+        self.days[d] = menu
+        self.grams[d] = grams
+
+    def _solve(self, changed: list, menus: list) -> bool:
+        """解 changed 這幾天（其他天當作已知）；成功才寫回"""
+        fixed = self.amount.copy()
+        for d in changed:
+            if d < len(self.days):
+                fixed -= self._contribution(self.days[d], self.grams[d])[0]
+        macro, micro = self._blocks([menus[d] for d in changed])
+        res = solve_days(macro, micro, self.target, self.energy * len(menus), fixed=fixed, stage=self.stage,
+                         max_grams=self.max_grams)
+        if res["status"] != "optimal":
+            return False
+        for d, grams in zip(changed, res["grams"]):
+            self._set_day(d, menus[d], grams)
+        return True
+
+    def _nnls(self, menu: tuple) -> np.ndarray:
+        if menu not in self._macro_only:
+            self._macro_only[menu] = solver.solve(self.macro[[self.pos[n] for n in menu]], self.target)["grams"]
+        return self._macro_only[menu]
+
+    def update(self, menus) -> dict:
+        """menus：每天的食材名稱清單 → 全部天數的結果（見 result()）"""
+        t0 = time.perf_counter()
+        menus = [tuple(sorted(set(menu))) for menu in menus]
+        truncated = len(self.days) > len(menus)
+        while len(self.days) > len(menus):  # 排程變短：拿掉多出來的天
+            self._set_day(len(self.days) - 1, (), np.zeros(0))
+            self.days.pop()
+            self.grams.pop()
+        changed = [d for d, menu in enumerate(menus) if d >= len(self.days) or self.days[d] != menu]
+        if truncated and not changed:
+            # 拿掉的天原本分擔了週期的微量營養素，剩下的天不一定還達標：不能沿用，整個週期重解
+            # （有其他天改了菜單時照常先試增量，週期總量已扣掉拿掉的天）
+            changed = list(range(len(menus)))
+        if not changed:
+            self.mode = "cached"
+        elif len(changed) < len(menus) and self.mode != "macro_only" and self._solve(changed, menus):
+            self.mode = "incremental"
+        elif self._solve(list(range(len(menus))), menus):
+            changed, self.mode = list(range(len(menus))), "full"
+        else:
+            changed, self.mode = list(range(len(menus))), "macro_only"
+            for d, menu in enumerate(menus):
+                self._set_day(d, menu, self._nnls(menu))
+        return dict(self.result(), resolved=changed, seconds=time.perf_counter() - t0)
+
+    def result(self) -> dict:
+        """{"mode", "days": [{"menu", "grams", "achieved", "residual"}], "nutrients", "ca_p", "adequate", "prep"}"""
+        days = []
+        for menu, grams in zip(self.days, self.grams):
+            achieved = self._contribution(menu, grams)[1]
+            days.append({
+                "menu": menu,
+                "grams": {n: float(g) for n, g in zip(menu, grams) if g > MIN_GRAMS},
+                "achieved": achieved,
+                "residual": achieved - self.target,
+            })
+        n = max(len(self.days), 1)
+        week = diet_lp.report(self.achieved[None], self.amount[None], np.ones(1), self.target * n,
+                              self.keys, self.lo, self.hi, self.energy * n, np.zeros(len(self.keys)))
+        return {
+            "mode": self.mode,
+            "days": days,
+            "nutrients": week["nutrients"],
+            "ca_p": week["ca_p"],
+            "adequate": bool(week["nutrients"]["達標"].all()),
+            "prep": [[name, g, used] for name, (g, used) in sorted(self.prep.items())],
+        }
+
+
+if __name__ == "__main__":
+    import fda_matrix
+
+    m = fda_matrix.open_matrix()
+    base = ["豬小里肌", "去骨鴨掌", "山豬肉片", "白對蝦(小)(2022年取樣)", "正櫻蝦乾", "環文蛤", "雪螺"]
+    menus = {"A": base + ["雞肝(肉雞)"], "B": base + ["雞蛋平均值"], "C": base + ["紅肉鮭魚切片"]}
+    planner = Planner(m, sorted({n for v in menus.values() for n in v}), [250.0, 20.0, 8.0, 4.0], 250.0,
+                      max_grams=150)
+    for pattern in ["ABABABA", "ABABABA", "ABCBABA", "ABABABA"]:
+        r = planner.update([menus[c] for c in parse_schedule(pattern, menus)])
+        print(pattern, r["mode"], r["resolved"], f"{r['seconds'] * 1e3:.1f} ms", "達標" if r["adequate"] else "未達標")
+    print(pd.DataFrame(r["prep"], columns=["食材", "總克數(g)", "天數"]).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
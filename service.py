@@ -0,0 +1,316 @@
+# --- 本機 HTTP 計算服務（asyncio，只用標準函式庫） ---
+# 預約系統與手機 App 需要與頁面相同的數字，但不能操作 Streamlit 介面。
+# 端點（皆為 JSON）：
+#   GET  /health       資料版本、食物數
+#   GET  /stats        服務計數與配方快取命中率
+#   POST /energy       {"weight", "age_group", "activity"} → RER / MER 與每日營養目標
+#   POST /dry          {"dry_grams": {乾糧: 每日克數}} → 乾糧扣除
+#   POST /auto-ratio   {"weight", "age_group", "activity", "dry_grams", "fresh": [鮮食]} → 鮮食克數（NNLS）
+#   POST /fixed        {"weight", "age_group", "activity", "dry_grams", "fixed": {鮮食: 克數}} → 補足量、最終營養、備餐清單
+#   POST /plan         上面全部（同 plan_cache.get_plan）
+#   POST /batch        {"requests": [同 /plan 的內容, ...]} → {"plans": [...]}，依序對應
+# 求解丟到行程池（ProcessPoolExecutor），事件迴圈只做解析、查配方快取（plan_cache）與回應；
+# 同一個鍵正在求解時，後到的請求直接等同一個 Future（coalescing），不重複求解。
+# 只讀本機 data/ 與 .cache/，不需要網路。
+# 執行：python service.py [--host 127.0.0.1] [--port 8765] [--workers N] [--cache PATH]
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http import HTTPStatus
+
+import engine
+import food_db
+import food_store
+import food_watch
+import plan_cache
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BODY = 8 * 1024 * 1024
+BATCH_MAX = 10_000   # 一次 /batch 最多幾筆
+BATCH_CHUNK = 64     # 未命中的配方每幾筆包成一個行程池工作（減少行程間往返）
+
+
+class BadRequest(ValueError):
+    """輸入有誤 → 400"""
+
+
+# --- 行程池工作（在 worker 行程內執行） ---
+_paths = None
+
+def _init_worker(dry_path: str, fresh_path: str) -> None:
+    global _paths
+    _paths = (dry_path, fresh_path)
+    food_store.load(*_paths)
+    import scipy.optimize  # noqa: F401  先載入，第一個請求不必等
+
+def _solve(requests: list) -> list:
+    """以 worker 自己讀到的資料計算；資料版本以 worker 的為準（寫回 request["data"]）"""
+    foods = food_store.load(*_paths)
+    return [plan_cache.build_plan(foods, dict(r, data=foods.digest)) for r in requests]
+
+
+# --- 輸入 ---
+def _grams(value, field: str) -> dict:
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise BadRequest(f"{field} 需為 {{食物名稱: 克數}}")
+    try:
+        grams = {str(k): float(v) for k, v in value.items()}
+    except (TypeError, ValueError):
+        raise BadRequest(f"{field} 的克數需為數字") from None
+    if any(g < 0 for g in grams.values()):
+        raise BadRequest(f"{field} 的克數不可為負")
+    return grams
+
+def parse_request(body: dict, foods) -> dict:
+    """JSON 內容 → canonical_request；未知的選項或食材回 BadRequest"""
+    if not isinstance(body, dict):
+        raise BadRequest("請求內容需為 JSON 物件")
+    try:
+        weight = float(body["weight"])
+        age_group, activity = body["age_group"], body["activity"]
+    except KeyError as e:
+        raise BadRequest(f"缺少欄位：{e.args[0]}") from None
+    except (TypeError, ValueError):
+        raise BadRequest("weight 需為數字") from None
+    if not (math.isfinite(weight) and weight > 0):
+        raise BadRequest("weight 需為大於 0 的有限數字")
+    fresh = body.get("fresh") or []
+    if not isinstance(fresh, list):
+        raise BadRequest("fresh 需為食材名稱清單")
+    dry_grams = _grams(body.get("dry_grams"), "dry_grams")
+    fixed = _grams(body.get("fixed"), "fixed")
+    missing = sorted({str(n) for n in [*dry_grams, *fresh, *fixed] if str(n) not in foods})
+    if missing:
+        raise BadRequest(f"找不到食材：{missing}")
+    try:
+        return plan_cache.canonical_request(weight, age_group, activity, dry_grams, fresh, fixed, data=foods.digest)
+    except KeyError as e:
+        raise BadRequest(e.args[0]) from None
+
+
+# --- 服務 ---
+class Service:
+    def __init__(self, dry_path: str = food_db.DRY_PATH, fresh_path: str = food_db.FRESH_PATH, workers: int = None,
+                 cache: plan_cache.PlanCache = None):
+        self.watcher = food_watch.shared(dry_path, fresh_path)
+        self.cache = cache or plan_cache.shared()
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(dry_path, fresh_path))
+        self._inflight = {}  # 鍵 -> 求解中的 Future
+        self.counters = {"requests": 0, "errors": 0, "plans": 0, "cache_hits": 0, "coalesced": 0, "solved": 0}
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/stats"): self.stats,
+            ("POST", "/energy"): self.energy,
+            ("POST", "/dry"): self.dry,
+            ("POST", "/auto-ratio"): self.auto_ratio,
+            ("POST", "/fixed"): self.fixed,
+            ("POST", "/plan"): self.plan,
+            ("POST", "/batch"): self.batch,
+        }
+
+    # 配方：快取 → 正在求解的同鍵請求 → 行程池
+    async def plans(self, requests: list) -> list:
+        loop = asyncio.get_running_loop()
+        keys = [plan_cache.plan_key(r) for r in requests]
+        found, todo = {}, {}
+        for key, request in zip(keys, requests):
+            if key in found or key in todo:
+                continue  # 同一批內重複
+            self.counters["plans"] += 1
+            plan = self.cache.get(key)
+            if plan is not None:
+                self.counters["cache_hits"] += 1
+                found[key] = plan
+            elif key in self._inflight:
+                self.counters["coalesced"] += 1
+                found[key] = self._inflight[key]
+            else:
+                todo[key] = request
+
+        items = list(todo.items())
+        for i in range(0, len(items), BATCH_CHUNK):
+            chunk = [key for key, _ in items[i:i + BATCH_CHUNK]]
+            for key in chunk:
+                found[key] = self._inflight[key] = loop.create_future()
+            work = loop.run_in_executor(self.pool, _solve, [todo[key] for key in chunk])
+            work.add_done_callback(partial(self._settle, chunk))
+
+        # shield：某個連線中斷被取消時，不影響共用同一個 Future 的其他請求
+        pending = [key for key, value in found.items() if isinstance(value, asyncio.Future)]
+        for key, plan in zip(pending, await asyncio.gather(*(asyncio.shield(found[k]) for k in pending))):
+            found[key] = plan
+        return [found[key] for key in keys]
+
+    def _settle(self, keys: list, work: asyncio.Future) -> None:
+        # 行程池關閉時工作會被取消：等這些鍵的請求一律失敗，不留下永遠不會完成的 Future
+        error = RuntimeError("求解已取消（服務關閉中）") if work.cancelled() else work.exception()
+        for i, key in enumerate(keys):
+            future = self._inflight.pop(key)
+            if error is not None:
+                future.set_exception(error)
+                continue
+            plan = work.result()[i]
+            plan["key"] = plan_cache.plan_key(plan["request"])
+            self.cache.put(plan["key"], plan)
+            self.counters["solved"] += 1
+            future.set_result(plan)
+
+    # 端點
+    async def health(self, body) -> dict:
+        foods = self.watcher.store
+        return {"status": "ok", "data": foods.digest, "version": foods.version, "foods": len(foods)}
+
+    async def stats(self, body) -> dict:
+        return {"service": dict(self.counters, inflight=len(self._inflight)), "cache": self.cache.stats()}
+
+    async def energy(self, body) -> dict:
+        request = parse_request(dict(body, fresh=[], dry_grams=None, fixed=None), self.watcher.store)
+        req = engine.energy_requirements(request["weight"], request["age_group"], request["activity"])
+        return {k: float(v) for k, v in req.items()}
+
+    async def dry(self, body) -> dict:
+        foods = self.watcher.store
+        dry_grams = _grams(body.get("dry_grams"), "dry_grams")
+        missing = sorted(n for n in dry_grams if n not in foods)
+        if missing:
+            raise BadRequest(f"找不到食材：{missing}")
+        return engine.dry_deduction(foods, dry_grams)
+
+    async def auto_ratio(self, body) -> dict:
+        request = parse_request(dict(body, fixed=None), self.watcher.store)
+        if not request["fresh"]:
+            raise BadRequest("fresh 至少要有一項食材")
+        plan = (await self.plans([request]))[0]
+        return {k: plan[k] for k in ("key", "request", "energy", "dry", "fresh")}
+
+    async def fixed(self, body) -> dict:
+        request = parse_request(dict(body, fresh=[]), self.watcher.store)
+        if not request["fixed"]:
+            raise BadRequest("fixed 至少要有一項食材")
+        plan = (await self.plans([request]))[0]
+        return {k: plan[k] for k in ("key", "request", "energy", "dry", "fixed", "prep")}
+
+    async def plan(self, body) -> dict:
+        return (await self.plans([parse_request(body, self.watcher.store)]))[0]
+
+    async def batch(self, body) -> dict:
+        items = body.get("requests") if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            raise BadRequest("需要 requests 清單")
+        if len(items) > BATCH_MAX:
+            raise BadRequest(f"一次最多 {BATCH_MAX} 筆")
+        foods = self.watcher.store
+        requests = []
+        for i, item in enumerate(items):
+            try:
+                requests.append(parse_request(item, foods))
+            except BadRequest as e:
+                raise BadRequest(f"requests[{i}]：{e}") from None
+        return {"plans": await self.plans(requests)}
+
+    # HTTP
+    async def dispatch(self, method: str, path: str, data: bytes) -> tuple:
+        self.counters["requests"] += 1
+        route = self.routes.get((method, path))
+        if route is None:
+            known = any(p == path for _, p in self.routes)
+            status = HTTPStatus.METHOD_NOT_ALLOWED if known else HTTPStatus.NOT_FOUND
+            return status, {"error": status.phrase}
+        try:
+            body = json.loads(data) if data else {}
+            if not isinstance(body, dict):
+                raise BadRequest("請求內容需為 JSON 物件")
+            return HTTPStatus.OK, await route(body)
+        except (BadRequest, json.JSONDecodeError, UnicodeDecodeError) as e:
+            self.counters["errors"] += 1
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            self.counters["errors"] += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """一條連線；HTTP/1.1 預設 keep-alive"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "bad request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, False)
+                    break
+                data = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method.upper(), target.split("?", 1)[0], data)
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep)
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status: HTTPStatus, payload: dict, keep: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(host: str = HOST, port: int = PORT, workers: int = None, cache_path: str = plan_cache.CACHE_PATH,
+                dry_path: str = food_db.DRY_PATH, fresh_path: str = food_db.FRESH_PATH) -> None:
+    workers = workers or os.cpu_count() or 1
+    service = Service(dry_path, fresh_path, workers, plan_cache.shared(cache_path))
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"listening on http://{host}:{port}（{workers} workers）", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="貓咪營養計算 HTTP 服務")
+    ap.add_argument("--host", default=HOST)
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--workers", type=int, default=None, help="行程池大小（預設 CPU 數）")
+    ap.add_argument("--cache", default=plan_cache.CACHE_PATH, help="配方快取的 SQLite 路徑")
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.cache))
+    except KeyboardInterrupt:
+        print(f"stopped after {time.perf_counter() - t0:.0f} s")
+
+
+if __name__ == "__main__":
+    main()
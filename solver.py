@@ -0,0 +1,143 @@
+# --- 鮮食克數求解（NNLS，非負最小平方法） ---
+# 由 test_least_squares.py 的原型發展而來：取代 engine.allocate_* 的反距離權重（w = 1/(d + 1e-6)），
+# 直接找出讓 蛋白 / 脂肪 / 碳水 最接近缺口、且熱量剛好補滿的非負克數。
+#
+# 方程組（列順序與 engine.MACRO_FIELDS 相同）：
+#   kcal    列：權重 KCAL_WEIGHT，遠大於其他列 → 近似等式限制
+#   蛋白 / 脂肪 / 碳水 列：依 weights 加權，並除以目標量 → 比較的是「相對誤差」
+# 目標量已扣掉乾糧與固定克數食材的貢獻（見 remaining_target）。
+# scipy 匯入要好幾百 ms，只在真的要求解時才載入（remaining_target 等不需要它）。
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_WEIGHTS = {"protein": 1.0, "fat": 1.0, "carb": 0.5}
+KCAL_WEIGHT = 100.0
+MIN_SCALE_TARGET = 1.0  # 目標為 0（例如碳水已被乾糧補滿）時，以 1 g / 1 kcal 當比例尺
+
+_lock = threading.Lock()
+_warm = {"hits": 0, "misses": 0}  # 熱啟動：沿用上一次的 passive set 就通過 KKT / 要退回 nnls
+
+
+def remaining_target(total, *contributions) -> np.ndarray:
+    """[kcal, 蛋白, 脂肪, 碳水] 目標扣掉乾糧 / 固定食材等貢獻，負值視為 0"""
+    t = np.asarray(total, dtype=float).copy()
+    for c in contributions:
+        t = t - np.asarray(c, dtype=float)
+    return np.maximum(t, 0.0)
+
+def row_scale(target, weights: dict = None, kcal_weight: float = KCAL_WEIGHT) -> np.ndarray:
+    """每一列的權重 / 比例尺；target 可為 (4,) 或 (k, 4)"""
+    w = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    wvec = np.array([kcal_weight, w["protein"], w["fat"], w["carb"]])
+    return wvec / np.maximum(np.asarray(target, dtype=float), MIN_SCALE_TARGET)
+
+def _tolerance(A: np.ndarray) -> float:
+    return 10 * np.finfo(float).eps * np.abs(A).sum(axis=-2).max(initial=1.0) * max(A.shape[-2:])
+
+def _kkt_on_support(A: np.ndarray, b: np.ndarray, passive: np.ndarray, tol: float) -> tuple:
+    """限定在 passive set 上解最小平方，回傳 (克數, 是否滿足 KKT 最佳條件)
+
+    A 為 (m, n) 或堆疊的 (k, m, n)；堆疊時以虛擬反矩陣一次解完所有問題。
+    最佳條件：passive 內的解皆 > 0，其餘變數的梯度 Aᵀ(b − Ax) 皆 ≤ 0（加進來也不會更好）
+    """
+    if A.ndim == 2:
+        x = np.zeros(A.shape[1])
+        Ap = A[:, passive]
+        if 0 < Ap.shape[1] <= Ap.shape[0]:
+            try:
+                x[passive] = np.linalg.solve(Ap.T @ Ap, Ap.T @ b)  # 正規方程，小矩陣比 lstsq 快
+            except np.linalg.LinAlgError:
+                x[passive] = np.linalg.lstsq(Ap, b, rcond=None)[0]
+        elif Ap.shape[1]:
+            x[passive] = np.linalg.lstsq(Ap, b, rcond=None)[0]
+        grad = A.T @ (b - A @ x)
+        return x, bool((x[passive] > tol).all() and (grad[~passive] <= tol).all())
+
+    k, _, n = A.shape
+    x = np.zeros((k, n))
+    if passive.any():
+        x[:, passive] = (np.linalg.pinv(A[:, :, passive]) @ b[:, :, None])[:, :, 0]
+    grad = np.einsum("kmn,km->kn", A, b - np.einsum("kmn,kn->km", A, x))
+    ok = (x[:, passive] > tol).all(axis=1) & (grad[:, ~passive] <= tol).all(axis=1)
+    return x, ok
+
+def _result(matrix, grams, target, scale, seconds, method) -> dict:
+    achieved = np.asarray(grams) @ np.nan_to_num(matrix)
+    residual = achieved - target
+    return {
+        "grams": grams,
+        "achieved": achieved,           # [kcal, 蛋白, 脂肪, 碳水]
+        "residual": residual,           # 實際 - 目標
+        "rnorm": np.linalg.norm(residual * scale, axis=-1),  # 加權後的殘差範數（求解的目標函數）
+        "seconds": seconds,
+        "method": method,               # "nnls" / "warm" / "batch"
+    }
+
+def solve(matrix: np.ndarray, target, weights: dict = None, kcal_weight: float = KCAL_WEIGHT,
+          x0=None) -> dict:
+    """單一問題：matrix 為 (n, 4) 每 1g 營養，target 為 [kcal, 蛋白, 脂肪, 碳水]
+
+    x0（上一次的解，與 matrix 同順序）有用到的食材時先熱啟動：只在它的 passive set 上解一次最小平方，
+    滿足 KKT 條件就直接採用（只改了體重或某個克數時通常如此），否則退回 scipy.optimize.nnls 冷啟動。
+    命中 / 退回次數見 warm_stats()。
+    """
+    t0 = time.perf_counter()
+    target = np.asarray(target, dtype=float)
+    scale = row_scale(target, weights, kcal_weight)
+    A = scale[:, None] * np.nan_to_num(matrix).T
+    b = scale * target
+    passive = None if x0 is None else np.asarray(x0, dtype=float) > 0
+    if passive is not None and len(passive) == A.shape[1] and passive.any():
+        grams, ok = _kkt_on_support(A, b, passive, _tolerance(A))
+        with _lock:
+            _warm["hits" if ok else "misses"] += 1
+        if ok:
+            return _result(matrix, grams, target, scale, time.perf_counter() - t0, "warm")
+
+    from scipy.optimize import nnls
+
+    grams, _ = nnls(A, b)
+    return _result(matrix, grams, target, scale, time.perf_counter() - t0, "nnls")
+
+def warm_stats() -> dict:
+    """本行程熱啟動的命中 / 退回次數與命中率"""
+    with _lock:
+        out = dict(_warm)
+    tried = out["hits"] + out["misses"]
+    out["hit_rate"] = out["hits"] / tried if tried else 0.0
+    return out
+
+def solve_batch(matrix: np.ndarray, targets, weights: dict = None, kcal_weight: float = KCAL_WEIGHT) -> dict:
+    """多隻貓、同一組食材：targets 為 (k, 4)，一次求出 (k, n) 克數
+
+    同一組食材下，大多數貓的最佳解用到的食材（passive set）都一樣：
+    先用 nnls 解出一隻貓，再把它的 passive set 套用到所有尚未解完的貓，
+    以堆疊的虛擬反矩陣一次求解並檢查 KKT 條件；不符合的才換下一種 passive set。
+    """
+    from scipy.optimize import nnls
+
+    t0 = time.perf_counter()
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    scale = row_scale(targets, weights, kcal_weight)                       # (k, 4)
+    A = scale[:, :, None] * np.nan_to_num(matrix).T[None, :, :]          # (k, 4, n)
+    b = scale * targets                                                   # (k, 4)
+
+    grams = np.zeros((len(targets), A.shape[2]))
+    todo = np.arange(len(targets))
+    supports = 0
+    while len(todo):
+        i = todo[0]
+        grams[i], _ = nnls(A[i], b[i])
+        tol = _tolerance(A[i])
+        x, ok = _kkt_on_support(A[todo], b[todo], grams[i] > tol, tol)
+        grams[todo[ok]] = x[ok]
+        ok[0] = True  # 代表問題本身已由 nnls 解出
+        todo = todo[~ok]
+        supports += 1
+    grams = np.maximum(grams, 0.0)
+
+    res = _result(matrix, grams, targets, scale, time.perf_counter() - t0, "batch")
+    res["supports"] = supports  # 用到幾種不同的 passive set（越少越快）
+    return res
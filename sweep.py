@@ -0,0 +1,119 @@
+# --- 情境掃描：體重 × 年齡層 × 活動量 ---
+# 獸醫常問「2–8 kg 的貓在各年齡層、活動量下每天該吃多少」：不必在頁面上一個一個切換輸入。
+# 參數格網攤平成一維陣列後交給 engine.batch_requirements（RER/MER、係數表、1.15 安全係數都是向量運算）；
+# 有選鮮食食材時，再以 solver.solve_batch 一次求出每個格點的鮮食克數。
+# 乾糧為固定每日克數（與頁面上的乾糧區相同），各格點的鮮食缺口都先扣掉它。
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import solver
+
+WEIGHT_RANGE = (2.0, 8.0, 0.5)  # 預設體重範圍（kg）：起、迄、間隔
+
+# 下載 / 顯示用的中文欄名；鮮食克數欄為「<食材>(g)」
+COLUMN_LABELS = {
+    "weight": "體重(kg)",
+    "age_group": "年齡層",
+    "activity": "活動量",
+    "rer": "RER(kcal)",
+    "mer": "MER(kcal)",
+    "min_protein_g": "最低蛋白(g)",
+    "min_fat_g": "最低脂肪(g)",
+    "recommend_protein_g": "建議蛋白(g)",
+    "recommend_fat_g": "建議脂肪(g)",
+    "target_carb_g": "目標碳水(g)",
+    "dry_kcal": "乾糧熱量(kcal)",
+    "dry_protein_g": "乾糧蛋白(g)",
+    "dry_fat_g": "乾糧脂肪(g)",
+    "dry_carb_g": "乾糧碳水(g)",
+    "remain_kcal": "鮮食需補熱量(kcal)",
+    "remain_protein_g": "鮮食需補蛋白(g)",
+    "remain_fat_g": "鮮食需補脂肪(g)",
+    "remain_carb_g": "鮮食需補碳水(g)",
+    "fresh_total_g": "鮮食總克數(g)",
+    "fresh_kcal": "鮮食熱量(kcal)",
+    "residual_protein_g": "蛋白差(g)",
+    "residual_fat_g": "脂肪差(g)",
+    "residual_carb_g": "碳水差(g)",
+}
+
+
+def weight_range(lo: float, hi: float, step: float) -> np.ndarray:
+    """lo 到 hi（含）每隔 step 一個體重"""
+    if step <= 0 or hi < lo:
+        raise ValueError("體重範圍需滿足 起 ≤ 迄 且 間隔 > 0")
+    return np.round(np.arange(lo, hi + step / 2, step), 6)
+
+def grid(weights, age_groups=None, activities=None) -> pd.DataFrame:
+    """所有組合攤平成一列一個格點：體重在最外層、活動量在最內層"""
+    weights = np.asarray(weights, dtype=float).ravel()
+    age_groups = np.asarray(list(engine.AGE_GROUPS if age_groups is None else age_groups), dtype=object)
+    activities = np.asarray(list(engine.ACTIVITY_LEVELS if activities is None else activities), dtype=object)
+    wi, ai, ci = np.meshgrid(np.arange(len(weights)), np.arange(len(age_groups)), np.arange(len(activities)),
+                             indexing="ij")
+    return pd.DataFrame({
+        "weight": weights[wi.ravel()],
+        "age_group": age_groups[ai.ravel()],
+        "activity": activities[ci.ravel()],
+    })
+
+def run(weights, age_groups=None, activities=None, foods=None, dry_grams: dict = None, fresh_names=None,
+        solver_weights: dict = None) -> dict:
+    """掃描整個格網
+
+    foods：食物表、food_index.FoodIndex 或 food_store.FoodStore（有乾糧或鮮食時必填）
+    dry_grams：{乾糧名稱: 每日克數}，每個格點相同
+    fresh_names：鮮食食材；有給時每個格點都求一次 NNLS 克數（一次批次求解）
+    回傳 {"table": 每格點一列的 DataFrame, "points", "supports", "seconds"}
+    """
+    t0 = time.perf_counter()
+    g = grid(weights, age_groups, activities)
+    n = len(g)
+
+    dry = None
+    if dry_grams:
+        names = list(dry_grams)
+        grams = np.array([float(dry_grams[k]) for k in names])
+        dry = pd.DataFrame(np.broadcast_to(grams, (n, len(names))), columns=names)
+    out = engine.batch_requirements(g["weight"].to_numpy(), g["age_group"].to_numpy(), g["activity"].to_numpy(),
+                                    dry_grams=dry, foods=foods)
+    table = pd.concat([g, out], axis=1)
+
+    supports = 0
+    fresh_names = list(fresh_names or [])
+    if fresh_names:
+        matrix = engine.food_matrix(foods, fresh_names)
+        targets = table[["remain_kcal", "remain_protein_g", "remain_fat_g", "remain_carb_g"]].to_numpy()
+        res = solver.solve_batch(matrix, targets, weights=solver_weights)
+        supports = res["supports"]
+        fresh = pd.DataFrame(res["grams"].round(1), columns=[f"{name}(g)" for name in fresh_names])
+        fresh["fresh_total_g"] = res["grams"].sum(axis=1).round(1)
+        fresh["fresh_kcal"] = res["achieved"][:, 0]
+        fresh["residual_protein_g"] = res["residual"][:, 1]
+        fresh["residual_fat_g"] = res["residual"][:, 2]
+        fresh["residual_carb_g"] = res["residual"][:, 3]
+        table = pd.concat([table, fresh], axis=1)
+
+    return {"table": table, "points": n, "supports": supports, "seconds": time.perf_counter() - t0}
+
+def labeled(table: pd.DataFrame, decimals: int = 1) -> pd.DataFrame:
+    """中文欄名、數值四捨五入，給頁面顯示與下載用"""
+    return table.round(decimals).rename(columns=COLUMN_LABELS)
+
+def to_csv(table: pd.DataFrame) -> bytes:
+    """UTF-8 含 BOM，Excel 直接開啟不會亂碼"""
+    return labeled(table).to_csv(index=False).encode("utf-8-sig")
+
+
+if __name__ == "__main__":
+    import sys
+
+    import food_db
+    import food_index
+
+    foods = food_index.index_for(food_db.load_food_db(food_db.DRY_PATH, food_db.FRESH_PATH))
+    result = run(weight_range(*WEIGHT_RANGE), foods=foods, fresh_names=["雞胸", "雞蛋", "雞肝", "黃肉地瓜"])
+    labeled(result["table"]).to_csv(sys.argv[1] if len(sys.argv) > 1 else sys.stdout, index=False)
@@ -0,0 +1,194 @@
+# --- 成長 / 減重預測（逐週推算體重、MER 與鮮食克數） ---
+# 幼貓與減重的年齡層在頁面上只是某一刻的快照：幼貓每週都在長大，減重的貓每週都在變輕，MER 跟著變。
+# 這裡把未來幾週到幾個月攤成 (貓數, 週數) 的陣列一次推算：
+#   幼貓：依月齡查 GROWTH_CURVE（佔成貓體重的比例），以目前體重與預估成貓體重校正，滿 4 / 6 個月換年齡層，
+#         6 個月後改用 adult_group（engine 沒有 6–12 月的係數）；體重只增不減，不超過 max(目前體重, 成貓體重)
+#   減重：每週減 loss_rate（佔當週體重），到 target_weight 就停，之後改用 adult_group 維持
+#   其他年齡層：體重不變（MER 也不變），照樣列出方便整批名冊一起算
+# 體重先四捨五入到 plan_cache.WEIGHT_STEP（與頁面的體重輸入相同），相同（體重, 年齡層, 活動量）的週只算一次；
+# 有選鮮食時以 solver.solve_batch 一次求出所有不重複的組合，整張時間軸算好後拖動週數只是查表。
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import plan_cache
+import solver
+import sweep
+
+# 月齡 → 佔成貓體重的比例（家貓常見的成長曲線，粗略參考值）
+GROWTH_CURVE = (
+    np.array([0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 8.0, 10.0, 12.0]),
+    np.array([0.025, 0.11, 0.22, 0.33, 0.45, 0.56, 0.66, 0.8, 0.9, 1.0]),
+)
+KITTEN_STAGES = [(4.0, "幼貓 0-4月"), (6.0, "幼貓 4-6月")]  # 月齡未滿 → 年齡層
+DEFAULT_AGE_MONTHS = {"幼貓 0-4月": 2.0, "幼貓 4-6月": 5.0}
+DEFAULT_ADULT_WEIGHT = 4.5
+DEFAULT_TARGET_FRACTION = 0.85  # 減重沒給目標時：目前體重的 85%
+CURVE_RATIO_RANGE = (0.6, 1.6)  # 目前體重 ÷ 成長曲線在此月齡的預期體重，超出範圍代表月齡 / 成貓體重可能填錯
+ADULT_GROUP = "結紮成貓"
+WEIGHT_LOSS_RATE = 0.01  # 每週減少體重的比例（一般建議 0.5–2%）
+DAYS_PER_MONTH = 30.44
+
+# 其餘欄名同 sweep.COLUMN_LABELS
+COLUMN_LABELS = {
+    "cat": "貓",
+    "week": "週",
+    "age_months": "月齡",
+    "stage_changed": "換年齡層",
+}
+
+
+def _growth_fraction(age_months) -> np.ndarray:
+    return np.interp(age_months, *GROWTH_CURVE)
+
+def _or_default(values, default: np.ndarray, n: int) -> np.ndarray:
+    """單值或每隻貓一個；None / NaN 的位置用 default"""
+    if values is None:
+        return default
+    values = np.broadcast_to(np.asarray(values, dtype=float), (n,))
+    return np.where(np.isnan(values), default, values)
+
+def _codes(values, names) -> np.ndarray:
+    """字串 → names 中的位置；未知的直接丟 KeyError（同 engine.energy_requirements）"""
+    pos = {name: i for i, name in enumerate(names)}
+    missing = sorted({v for v in values if v not in pos})
+    if missing:
+        raise KeyError(f"未知的選項：{missing}")
+    return np.array([pos[v] for v in values], dtype=np.int64)
+
+
+def project(weights, age_groups, activities, weeks: int = 26, age_months=None, adult_weights=None,
+            target_weights=None, adult_group=ADULT_GROUP, loss_rate=WEIGHT_LOSS_RATE) -> dict:
+    """每隻貓未來 weeks 週（含第 0 週）的體重、月齡、年齡層與能量需求
+
+    weights / age_groups / activities：目前的狀態，單值或每隻貓一個
+    age_months：幼貓目前月齡（預設為該年齡層的中間值）；adult_weights：幼貓預估的成貓體重
+    target_weights：減重的目標體重；這三個都可以是每隻貓一個，None / NaN 用預設值
+    adult_group：幼貓長大、減重達標後改用的年齡層
+    回傳 {"weights", "age_months", "age_groups", "changed"（各為 (貓數, weeks + 1)）, "activities",
+          "requirements"（engine.energy_requirements，同形狀）, "unique"（不重複的組合）, "changes",
+          "curve_ratio"（幼貓目前體重 ÷ 曲線預期體重）, "off_curve"（超出 CURVE_RATIO_RANGE 的幼貓）, "seconds"}
+    """
+    t0 = time.perf_counter()
+    weights = np.atleast_1d(np.asarray(weights, dtype=float))
+    n = len(weights)
+    group_names = np.array(engine.AGE_GROUPS, dtype=object)
+    act_names = np.array(engine.ACTIVITY_LEVELS, dtype=object)
+    age_groups = np.broadcast_to(np.asarray(age_groups, dtype=object), (n,))
+    g0 = _codes(age_groups.tolist(), engine.AGE_GROUPS)[:, None]
+    acts = _codes(np.broadcast_to(np.asarray(activities, dtype=object), (n,)).tolist(), engine.ACTIVITY_LEVELS)
+    adult = _codes(np.broadcast_to(np.asarray(adult_group, dtype=object), (n,)).tolist(), engine.AGE_GROUPS)[:, None]
+    t = np.arange(weeks + 1, dtype=float)[None, :]
+
+    kitten = np.isin(age_groups, list(DEFAULT_AGE_MONTHS))[:, None]
+    losing = (age_groups == "減重")[:, None]
+
+    # 幼貓：成長曲線在現在這一點對齊目前體重，往成貓體重逐漸收斂
+    default_age = np.array([DEFAULT_AGE_MONTHS.get(g, 12.0) for g in age_groups.tolist()])
+    age0 = _or_default(age_months, default_age, n)
+    adult_w = _or_default(adult_weights, np.full(n, DEFAULT_ADULT_WEIGHT), n)
+    months = age0[:, None] + t * 7.0 / DAYS_PER_MONTH
+    f0, f = _growth_fraction(age0)[:, None], _growth_fraction(months)
+    progress = np.clip((f - f0) / np.maximum(1.0 - f0, 1e-9), 0.0, 1.0)
+    ratio = weights[:, None] / (adult_w[:, None] * f0)
+    grow = adult_w[:, None] * f * (ratio + (1.0 - ratio) * progress)
+    # ratio 偏離 1 很多時（例如 2 月齡已 4 kg）上式會先衝過成貓體重再「縮回去」：夾住上限、且只增不減
+    grow = np.maximum.accumulate(np.minimum(grow, np.maximum(weights, adult_w)[:, None]), axis=1)
+    lo, hi = CURVE_RATIO_RANGE
+    off_curve = kitten[:, 0] & ((ratio[:, 0] < lo) | (ratio[:, 0] > hi))
+    kitten_code = np.select([months < limit for limit, _ in KITTEN_STAGES],
+                            _codes([g for _, g in KITTEN_STAGES], engine.AGE_GROUPS), default=adult)
+
+    # 減重：每週乘上 (1 − loss_rate)，不低於目標體重
+    target = _or_default(target_weights, weights * DEFAULT_TARGET_FRACTION, n)[:, None]
+    rate = np.broadcast_to(np.asarray(loss_rate, dtype=float), (n,))[:, None]
+    lose = np.maximum(weights[:, None] * (1.0 - rate) ** t, np.minimum(target, weights[:, None]))
+    reached = lose <= target * (1 + 1e-9)
+
+    # 體重取到 WEIGHT_STEP 的整數倍、年齡層 / 活動量換成編號，三者合成一個整數鍵：相同的鍵 MER 與配方都相同
+    w_steps = np.rint(np.where(kitten, grow, np.where(losing, lose, weights[:, None])) / plan_cache.WEIGHT_STEP)
+    w_steps = w_steps.astype(np.int64)
+    codes = np.where(kitten, kitten_code, np.where(losing & reached, adult, g0))
+    key = (w_steps * len(group_names) + codes) * len(act_names) + acts[:, None]
+    uniq, inv = np.unique(key.ravel(), return_inverse=True)
+    u_weights = np.round(uniq // (len(group_names) * len(act_names)) * plan_cache.WEIGHT_STEP, 6)
+    u_groups = group_names[uniq // len(act_names) % len(group_names)]
+    u_acts = act_names[uniq % len(act_names)]
+    u_req = engine.energy_requirements(u_weights, u_groups, u_acts)
+
+    w = np.round(w_steps * plan_cache.WEIGHT_STEP, 6)
+    groups = group_names[codes]
+    req = {k: v[inv].reshape(w.shape) for k, v in u_req.items()}
+    changed = np.zeros(w.shape, dtype=bool)
+    changed[:, 1:] = codes[:, 1:] != codes[:, :-1]
+    cat, week = np.nonzero(changed)
+    changes = pd.DataFrame({
+        "cat": cat,
+        "week": week,
+        "weight": w[cat, week],
+        "from": groups[cat, week - 1],
+        "to": groups[cat, week],
+        "mer_before": req["mer"][cat, week - 1],
+        "mer_after": req["mer"][cat, week],
+    })
+    return {"weights": w, "age_months": np.where(kitten, months, np.nan), "age_groups": groups,
+            "activities": act_names[acts], "requirements": req, "changed": changed, "changes": changes,
+            "unique": {"weights": u_weights, "age_groups": u_groups, "activities": u_acts, "inverse": inv},
+            "curve_ratio": np.where(kitten[:, 0], ratio[:, 0], np.nan), "off_curve": off_curve,
+            "seconds": time.perf_counter() - t0}
+
+
+def plans(projection: dict, foods=None, dry_grams: dict = None, fresh_names=None, solver_weights: dict = None) -> dict:
+    """每隻貓每一週的鮮食需補量與克數；相同（體重, 年齡層, 活動量）只求解一次
+
+    foods：食物表、food_index.FoodIndex 或 food_store.FoodStore（有乾糧或鮮食時必填）
+    回傳 {"table": 每隻貓每週一列的 DataFrame, "unique", "supports", "seconds"}
+    """
+    t0 = time.perf_counter()
+    w, u = projection["weights"], projection["unique"]
+    n, steps = w.shape
+
+    dry = None
+    if dry_grams:
+        names = list(dry_grams)
+        grams = np.array([float(dry_grams[k]) for k in names])
+        dry = pd.DataFrame(np.broadcast_to(grams, (len(u["weights"]), len(names))), columns=names)
+    out = engine.batch_requirements(u["weights"], u["age_groups"], u["activities"], dry_grams=dry, foods=foods)
+
+    supports = 0
+    fresh_names = list(fresh_names or [])
+    if fresh_names:
+        targets = out[["remain_kcal", "remain_protein_g", "remain_fat_g", "remain_carb_g"]].to_numpy()
+        res = solver.solve_batch(engine.food_matrix(foods, fresh_names), targets, weights=solver_weights)
+        supports = res["supports"]
+        for j, name in enumerate(fresh_names):
+            out[f"{name}(g)"] = res["grams"][:, j].round(1)
+        out["fresh_total_g"] = res["grams"].sum(axis=1).round(1)
+
+    table = out.iloc[u["inverse"]].reset_index(drop=True)
+    table.insert(0, "cat", np.repeat(np.arange(n), steps))
+    table.insert(1, "week", np.tile(np.arange(steps), n))
+    table.insert(2, "age_months", projection["age_months"].ravel())
+    table.insert(3, "weight", w.ravel())
+    table.insert(4, "age_group", projection["age_groups"].ravel())
+    table.insert(5, "activity", np.repeat(projection["activities"], steps))
+    table.insert(6, "stage_changed", projection["changed"].ravel())
+    return {"table": table, "unique": len(u["weights"]), "supports": supports, "seconds": time.perf_counter() - t0}
+
+def labeled(table: pd.DataFrame, decimals: int = 1) -> pd.DataFrame:
+    """中文欄名、數值四捨五入"""
+    return table.round(decimals).rename(columns={**sweep.COLUMN_LABELS, **COLUMN_LABELS})
+
+
+if __name__ == "__main__":
+    import food_store
+
+    foods = food_store.load()
+    p = project([1.2, 6.0], ["幼貓 0-4月", "減重"], ["中", "低"], weeks=40, age_months=[2.5, None],
+                adult_weights=4.5, target_weights=[None, 5.0])
+    print(p["changes"].to_string(index=False))
+    r = plans(p, foods, fresh_names=["雞胸", "雞蛋", "雞肝", "黃肉地瓜"])
+    print(f"{len(r['table'])} 週 × 貓，{r['unique']} 組不重複，{r['seconds'] * 1e3:.1f} ms")
+    print(labeled(r["table"][r["table"]["week"] % 8 == 0]).to_string(index=False))
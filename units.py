@@ -0,0 +1,97 @@
+# --- 向量化單位解析 ---
+# 取代舊版 _num 的逐格 re.search 與 clean_dry / clean_fresh 裡逐列判斷熱量單位的迴圈：
+# 一次處理整欄（pandas .str 向量運算），大表（例如 2,500 列 × 100+ 欄的衛福部資料）也很快。
+# 同一欄常有大量重複值（"10%"、"0"），所以先 factorize，只解析不重複的字串再依代碼展開。
+# 支援：8.1%、22.4g/100g、4025cal/1kg、104kcal/100公克、全形字（４０２５ｃａｌ／１ｋｇ）等寫法。
+import numpy as np
+import pandas as pd
+
+NUMBER_PATTERN = r"([-+]?\d*\.?\d+)"  # 與舊版 _num 相同：抓第一個數字
+
+
+def _factorize(col: pd.Series) -> tuple:
+    """(代碼陣列, 正規化後的不重複字串 Series)；缺值代碼為 -1"""
+    codes, uniq = pd.factorize(col)
+    # 保持 object dtype：pandas 的 string dtype 在 .str 運算時會逐格轉換，反而慢
+    txt = pd.Series([u if isinstance(u, str) else str(u) for u in np.asarray(uniq, dtype=object)], dtype=object)
+    if not "".join(txt).isascii():
+        txt = txt.str.normalize("NFKC")  # 全形 → 半形
+    return codes, txt
+
+def _expand(codes: np.ndarray, per_unique: np.ndarray, index, fill=np.nan) -> pd.Series:
+    out = np.append(per_unique, fill)[codes]  # 代碼 -1 會取到最後一格的 fill
+    return pd.Series(out, index=index)
+
+def _extract_number(txt: pd.Series) -> np.ndarray:
+    # 大部分儲存格本來就是純數字（"74.8"、" 12 "）：先用 to_numeric 一次轉完，
+    # 剩下帶單位的字串才跑 regex。科學記號 / inf 交給 regex，維持與舊版 _num 相同的結果。
+    values = pd.to_numeric(txt, errors="coerce").to_numpy(dtype=float, copy=True)
+    plain = np.isfinite(values) & (np.char.find(np.char.lower(txt.to_numpy(dtype=str)), "e") < 0)
+    if not plain.all():
+        rest = txt[~plain]
+        values[~plain] = pd.to_numeric(rest.str.extract(NUMBER_PATTERN, expand=False), errors="coerce")
+    return values
+
+def _blank_failures(txt: pd.Series, values: np.ndarray) -> np.ndarray:
+    """抓不到數字、且不是空白字串的格子"""
+    failed = np.isnan(values)
+    if failed.any():
+        failed[failed] = (txt[failed].str.strip() != "").to_numpy(dtype=bool)
+    return failed
+
+def parse_number(col: pd.Series) -> tuple:
+    """整欄抓第一個數字 → (float Series, 解析失敗的 bool Series)
+
+    解析失敗：儲存格有值、但找不到任何數字（例如 "-"、"微量"）
+    """
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float), pd.Series(False, index=col.index)
+
+    codes, txt = _factorize(col)
+    values = _extract_number(txt)
+    failed = _blank_failures(txt, values)
+    return _expand(codes, values, col.index), _expand(codes, failed, col.index, fill=False).astype(bool)
+
+def kcal_denominator(txt: pd.Series, values: np.ndarray, kind: str) -> np.ndarray:
+    """依熱量字串的單位決定除數：每公斤 1000、每 100g 100
+
+    沒寫單位時：乾糧看數值大小（>50 多半是每公斤），鮮食一律當每 100g
+    """
+    compact = txt.str.replace(r"\s+", "", regex=True)
+    per_kg = compact.str.contains("kg", regex=False).to_numpy(dtype=bool)
+    per_100g = (compact.str.contains("100g", regex=False)
+                | compact.str.contains("100公克", regex=False)).to_numpy(dtype=bool)
+
+    if kind == "dry":
+        fallback = np.where(values > 50, 1000.0, 100.0)
+    elif kind == "fresh":
+        fallback = np.full(len(values), 100.0)
+    else:
+        raise ValueError(f"未知的資料種類：{kind}")
+    return np.where(per_kg, 1000.0, np.where(per_100g, 100.0, fallback))
+
+def parse_kcal(col: pd.Series, kind: str) -> tuple:
+    """熱量欄 → (kcal/g Series, 解析失敗的 bool Series)"""
+    codes, txt = _factorize(col)
+    values = _extract_number(txt)
+    kcal_per_g = values / kcal_denominator(txt.str.lower(), values, kind)
+    failed = _blank_failures(txt, values)
+    return _expand(codes, kcal_per_g, col.index), _expand(codes, failed, col.index, fill=False).astype(bool)
+
+def failures_report(failed: dict, raw: pd.DataFrame) -> pd.DataFrame:
+    """{欄名: 失敗 bool Series} → 每個失敗儲存格一列（row / column / value）"""
+    rows = []
+    for c, mask in failed.items():
+        idx = mask[mask].index
+        if len(idx):
+            rows.append(pd.DataFrame({"row": idx, "column": c, "value": raw.loc[idx, c].astype(str).to_numpy()}))
+    if not rows:
+        return pd.DataFrame(columns=["row", "column", "value"])
+    return pd.concat(rows, ignore_index=True)
+
+def parse_frame(raw: pd.DataFrame, columns) -> tuple:
+    """多欄一起解析成數字 → (數值 DataFrame, 失敗報告 DataFrame)"""
+    values, failed = {}, {}
+    for c in columns:
+        values[c], failed[c] = parse_number(raw[c])
+    return pd.DataFrame(values, index=raw.index), failures_report(failed, raw)
@@ -0,0 +1,293 @@
+# --- Excel 版食物資料（0350 / 0930）→ 欄式快照 + 版本差異 ---
+# data/food_data_0350.xlsx、food_data_0930.xlsx 各約 1 MB，是衛福部資料庫（「food_data」工作表）
+# 與乾糧成分表（「工作表1」）的兩個版本。openpyxl 解析一次約 1 秒，比讀 CSV 慢上百倍，不能每次載入都付。
+# convert() 以 read_only 模式逐列串流讀入（不建整本活頁簿的儲存格物件），正規化後寫成 Parquet：
+#   <kind>.parquet            與清洗後的 CSV 同一套欄位（engine.FOOD_COLUMNS，經 food_db.CLEANERS 同一套清洗）
+#   <kind>-nutrients.parquet  全部營養素欄（數值已解析成 float），給 diff() 比對版本用
+#   manifest.json             來源檔名 / 大小 / 內容雜湊、版本代號（檔名中的 0350 / 0930）、各表列數與欄位
+# 來源內容雜湊與 manifest 相同就不重轉；manifest 最後才換上，讀取端看到它時 Parquet 一定已經就位。
+# diff() 比較兩個版本：新增 / 移除的食物、改名的食物，以及每種食物哪幾個營養素的數值變了。
+# 執行：python xlsx_snapshot.py [--force]（轉出所有版本並寫出 0350 → 0930 的差異報告 CSV）
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import fda_matrix
+import food_db
+import units
+
+SOURCES = ["data/food_data_0350.xlsx", "data/food_data_0930.xlsx"]
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "xlsx_snapshot")
+FORMAT_VERSION = 1
+
+# kind -> 工作表、用來找標題列的欄名、比對版本用的鍵、非數值欄
+SHEETS = {
+    "fresh": {"sheet": "food_data", "header": "整合編號", "key": "整合編號", "meta": list(fda_matrix.META_COLUMNS)},
+    "dry": {"sheet": "工作表1", "header": "品牌", "key": "食物名稱", "meta": ["食物名稱", "品牌", "品名", "類型"]},
+}
+# 衛福部欄名 → 清洗前 CSV 的欄名（鮮食的熱量為每 100 g，乾糧為每公斤，單位判斷交給 units.parse_kcal）
+FRESH_COLUMNS = {"樣品名稱": "食物名稱", "水分(g)": "水分", "粗蛋白(g)": "蛋白質", "粗脂肪(g)": "脂肪",
+                 "總碳水化合物(g)": "碳水", "熱量(kcal)": "熱量"}
+RAW_COLUMNS = ["食物名稱", "類型", "水分", "蛋白質", "脂肪", "碳水", "熱量"]
+MISSING = {"-": None, "－": None}
+
+_lock = threading.Lock()
+_memory = {}  # (Parquet 路徑) -> (manifest mtime_ns, DataFrame)
+
+
+def revision(path: str) -> str:
+    """"data/food_data_0930.xlsx" → "0930"；檔名沒有版本號時用檔名本身"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    m = re.search(r"_(\d+)$", stem)
+    return m.group(1) if m else stem
+
+def snapshot_dir(rev: str, out_dir: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(out_dir, rev)
+
+
+# --- 串流讀取與正規化 ---
+def read_sheet(ws, header_name: str) -> tuple:
+    """逐列讀工作表 → (全部為 object 的 DataFrame, 標題列號)
+
+    標題列之前的說明文字（0350 版第一列「本資料庫所列數值單位…」）略過；沒有欄名的欄（網址）與全空的列不讀
+    """
+    rows = ws.iter_rows(values_only=True)
+    header_row, header = 0, None
+    for header_row, row in enumerate(rows, start=1):
+        if header_name in [str(c).strip() if c is not None else None for c in row]:
+            header = row
+            break
+    if header is None:
+        raise ValueError(f"工作表「{ws.title}」找不到標題列（{header_name}）")
+
+    keep = [(i, str(c).strip()) for i, c in enumerate(header)
+            if c is not None and str(c).strip() and str(c).strip() not in fda_matrix.SKIP_COLUMNS]
+    columns = {name: [] for _, name in keep}
+    for row in rows:
+        if not any(c is not None for c in row):
+            continue
+        for i, name in keep:
+            c = row[i] if i < len(row) else None
+            columns[name].append(c.strip() if isinstance(c, str) else c)
+    return pd.DataFrame(columns, dtype=object), header_row
+
+def _raw_fresh(df: pd.DataFrame) -> pd.DataFrame:
+    raw = df[list(FRESH_COLUMNS)].rename(columns=FRESH_COLUMNS)
+    raw["類型"] = None  # clean_fresh 補成「生食」
+    return raw[RAW_COLUMNS]
+
+def _raw_dry(df: pd.DataFrame) -> pd.DataFrame:
+    # 同一品牌的後續列品牌欄留空：往下補
+    df["品牌"] = df["品牌"].ffill()
+    df["食物名稱"] = (df["品牌"].fillna("").astype(str) + " " + df["品名"].fillna("").astype(str)).str.strip()
+    df.loc[df["品名"].isna(), "食物名稱"] = None
+    return df[RAW_COLUMNS]
+
+def normalise(df: pd.DataFrame, kind: str, failures: list = None) -> tuple:
+    """工作表原始內容 → (清洗後的食物表, 營養素表)
+
+    食物表與 food_db.load_clean 讀 CSV 的結果同欄位、同清洗；營養素表保留非數值欄，其餘欄解析成 float
+    """
+    df = df.replace(MISSING)
+    raw = _raw_fresh(df) if kind == "fresh" else _raw_dry(df)
+    foods = food_db.CLEANERS[kind](raw, failures).dropna(subset=["食物名稱"]).reset_index(drop=True)
+
+    meta = [c for c in SHEETS[kind]["meta"] if c in df]
+    nutrient_cols = [c for c in df.columns if c not in meta]
+    values, _ = units.parse_frame(df, nutrient_cols)
+    nutrients = pd.concat([df[meta].astype("string"), values], axis=1)
+    nutrients = nutrients[nutrients[SHEETS[kind]["key"]].notna()].reset_index(drop=True)
+    return foods, nutrients
+
+def read_workbook(path: str) -> dict:
+    """{kind: (食物表, 營養素表, 標題列號, 解析失敗)}；read_only 模式，一次只握一列"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        out = {}
+        for kind, spec in SHEETS.items():
+            if spec["sheet"] not in wb.sheetnames:
+                continue
+            df, header_row = read_sheet(wb[spec["sheet"]], spec["header"])
+            failures = []
+            foods, nutrients = normalise(df, kind, failures)
+            out[kind] = (foods, nutrients, header_row, failures)
+        return out
+    finally:
+        wb.close()
+
+
+# --- 快照 ---
+def read_manifest(rev: str, out_dir: str = SNAPSHOT_DIR) -> dict:
+    try:
+        with open(os.path.join(snapshot_dir(rev, out_dir), "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_stale(path: str, out_dir: str = SNAPSHOT_DIR) -> bool:
+    """沒有快照、格式 / 清洗版本不同，或來源內容（大小 + 雜湊，不看 mtime）改變"""
+    m = read_manifest(revision(path), out_dir)
+    if m is None or m.get("format_version") != FORMAT_VERSION or m.get("clean_version") != food_db.CACHE_VERSION:
+        return True
+    fp = food_db.fingerprint(path)
+    return [m["source"]["size"], m["source"]["hash"]] != [fp[1], fp[3]]
+
+def convert(path: str, out_dir: str = SNAPSHOT_DIR, force: bool = False) -> dict:
+    """轉出一個版本的快照；來源沒變（且未 force）時沿用。回傳 manifest（另加 "converted"）"""
+    rev = revision(path)
+    if not force and not is_stale(path, out_dir):
+        return dict(read_manifest(rev, out_dir), converted=False)
+
+    t0 = time.perf_counter()
+    fp = food_db.fingerprint(path)
+    tables = read_workbook(path)
+    target = snapshot_dir(rev, out_dir)
+    os.makedirs(target, exist_ok=True)
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    files = []
+    for kind, (foods, nutrients, _, _) in tables.items():
+        for name, df in [(f"{kind}.parquet", foods), (f"{kind}-nutrients.parquet", nutrients)]:
+            df.to_parquet(os.path.join(target, name + suffix), index=False)
+            files.append(name)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "clean_version": food_db.CACHE_VERSION,
+        "revision": rev,
+        "source": {"name": os.path.basename(path), "size": fp[1], "hash": fp[3]},
+        "tables": {kind: {
+            "sheet": SHEETS[kind]["sheet"],
+            "header_row": header_row,
+            "rows": len(foods),
+            "nutrient_rows": len(nutrients),
+            "nutrients": [c for c in nutrients.columns if c not in SHEETS[kind]["meta"]],
+            "parse_failures": len(failures),
+        } for kind, (foods, nutrients, header_row, failures) in tables.items()},
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+    with open(os.path.join(target, "manifest.json" + suffix), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    for name in files + ["manifest.json"]:
+        os.replace(os.path.join(target, name + suffix), os.path.join(target, name))
+    return dict(manifest, converted=True)
+
+def convert_all(paths=SOURCES, out_dir: str = SNAPSHOT_DIR, force: bool = False) -> dict:
+    return {revision(p): convert(p, out_dir, force) for p in paths}
+
+def load(rev: str, kind: str = "fresh", nutrients: bool = False, out_dir: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """讀某個版本的快照表（行程內快取，manifest 換過才重讀）
+
+    nutrients=False：清洗後的食物表（同 food_db.load_clean）；True：全部營養素欄。回傳的表請勿就地修改
+    """
+    if kind not in SHEETS:
+        raise ValueError(f"未知的資料種類：{kind}")
+    target = snapshot_dir(rev, out_dir)
+    try:
+        mtime = os.stat(os.path.join(target, "manifest.json")).st_mtime_ns
+    except OSError:
+        raise FileNotFoundError(f"版本 {rev} 尚未轉檔（python xlsx_snapshot.py）") from None
+    path = os.path.join(target, f"{kind}-nutrients.parquet" if nutrients else f"{kind}.parquet")
+    with _lock:
+        cached = _memory.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    df = pd.read_parquet(path)
+    with _lock:
+        _memory[path] = (mtime, df)
+    return df
+
+def clear_cache() -> None:
+    with _lock:
+        _memory.clear()
+
+
+# --- 版本差異 ---
+def diff(old: str, new: str, kind: str = "fresh", out_dir: str = SNAPSHOT_DIR, atol: float = 1e-9) -> dict:
+    """兩個版本的營養素表比對（以 SHEETS[kind]["key"] 對齊）
+
+    回傳 {"added", "removed"（各為鍵與名稱的表）, "renamed"（鍵、舊名、新名）,
+          "changed"（每個改變的營養素一列：鍵、名稱、營養素、舊值、新值、差值）,
+          "foods"（每種有改變的食物一列：鍵、名稱、改變的營養素數、營養素清單）,
+          "columns"（{"added", "removed"} 新增 / 移除的營養素欄）, "key", "name"（鍵與名稱欄名）, "old", "new"（版本代號）}
+    兩邊都是空值視為相同
+    """
+    key = SHEETS[kind]["key"]
+    name = "樣品名稱" if kind == "fresh" else "食物名稱"
+    a = load(old, kind, nutrients=True, out_dir=out_dir).drop_duplicates(key).set_index(key, drop=False)
+    b = load(new, kind, nutrients=True, out_dir=out_dir).drop_duplicates(key).set_index(key, drop=False)
+    meta = SHEETS[kind]["meta"]
+    ids = list(dict.fromkeys([key, name]))
+    cols_a = [c for c in a.columns if c not in meta]
+    cols_b = [c for c in b.columns if c not in meta]
+    cols = [c for c in cols_b if c in cols_a]
+
+    common = b.index.intersection(a.index, sort=False)
+    added = b.loc[b.index.difference(a.index, sort=False), ids].reset_index(drop=True)
+    removed = a.loc[a.index.difference(b.index, sort=False), ids].reset_index(drop=True)
+    if name == key:
+        renamed = pd.DataFrame(columns=[key, "舊名稱", "新名稱"])
+    else:
+        old_names, new_names = a.loc[common, name], b.loc[common, name]
+        moved = (old_names != new_names).fillna(old_names.isna() != new_names.isna()).to_numpy(dtype=bool)
+        renamed = pd.DataFrame({key: common[moved], "舊名稱": old_names[moved].tolist(),
+                                "新名稱": new_names[moved].tolist()})
+
+    va = a.loc[common, cols].to_numpy(dtype=float)
+    vb = b.loc[common, cols].to_numpy(dtype=float)
+    same = np.isclose(va, vb, rtol=0.0, atol=atol, equal_nan=True)
+    row, col = np.nonzero(~same)
+    changed = pd.DataFrame({
+        **{c: b.loc[common, c].to_numpy(dtype=object)[row] for c in ids},
+        "營養素": np.asarray(cols, dtype=object)[col],
+        "舊值": va[row, col],
+        "新值": vb[row, col],
+    })
+    changed["差值"] = changed["新值"] - changed["舊值"]
+    foods = (changed.groupby(ids, sort=False, dropna=False)["營養素"]
+             .agg(營養素數="size", 營養素=lambda s: "、".join(s)).reset_index())
+    return {"added": added, "removed": removed, "renamed": renamed, "changed": changed, "foods": foods,
+            "columns": {"added": [c for c in cols_b if c not in cols_a], "removed": [c for c in cols_a if c not in cols_b]},
+            "key": key, "name": name, "old": old, "new": new}
+
+def report(d: dict) -> pd.DataFrame:
+    """diff() → 一張可存成 CSV 的差異報告（異動、鍵、名稱、營養素、舊值、新值、差值）"""
+    ids = list(dict.fromkeys([d["key"], d["name"]]))
+    renamed = d["renamed"].rename(columns={"舊名稱": "舊值"}).assign(營養素=d["name"])
+    renamed[d["name"]] = renamed["新值"] = renamed.pop("新名稱")
+    parts = [d["added"].assign(異動="新增"), d["removed"].assign(異動="移除"), renamed.assign(異動="改名"),
+             d["changed"].assign(異動="數值改變")]
+    columns = ["異動", *ids, "營養素", "舊值", "新值", "差值"]
+    return pd.concat([p for p in parts if len(p)] or [pd.DataFrame(columns=columns)],
+                     ignore_index=True).reindex(columns=columns)
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Excel 版食物資料 → 欄式快照與版本差異報告")
+    ap.add_argument("--force", action="store_true", help="來源沒變也重轉")
+    args = ap.parse_args()
+
+    manifests = convert_all(force=args.force)
+    for rev, m in manifests.items():
+        tables = "、".join(f"{kind} {t['rows']} 列" for kind, t in m["tables"].items())
+        state = f"轉檔 {m['seconds']:.2f} s" if m["converted"] else "沿用"
+        print(f"{rev}：{m['source']['name']} {m['source']['hash'][:12]}… {tables}（{state}）")
+
+    old, new = list(manifests)[:2]
+    for kind in SHEETS:
+        d = diff(old, new, kind)
+        print(f"\n[{kind}] {old} → {new}：新增 {len(d['added'])}、移除 {len(d['removed'])}、改名 {len(d['renamed'])}、"
+              f"{len(d['foods'])} 種食物共 {len(d['changed'])} 個營養素數值改變")
+        if d["columns"]["added"] or d["columns"]["removed"]:
+            print(f"  營養素欄 新增 {d['columns']['added']}、移除 {d['columns']['removed']}")
+        if len(d["foods"]):
+            print(d["foods"].head(20).to_string(index=False))
+        out = os.path.join(SNAPSHOT_DIR, f"diff-{old}-{new}-{kind}.csv")
+        report(d).to_csv(out, index=False, encoding="utf-8-sig")
+        print(f"  差異報告 → {out}")